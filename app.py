@@ -21,6 +21,8 @@ Developed and tested with:
   - Desktop/PC (Linux)
 """
 import os
+import time
+STARTUP_T0 = time.perf_counter()
 os.environ['SDL_AUDIODRIVER'] = 'dummy'
 os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
 
@@ -33,8 +35,12 @@ from pathlib import Path
 import pygame
 import argparse
 
+share_journal = None
+
 # Signal handling for clean exit
 def signal_handler(sig, frame):
+    if share_journal is not None:
+        share_journal.close()
     pygame.quit()
     sys.exit(0)
 
@@ -57,6 +63,7 @@ RPi Bitcoin Mining Difficulty Meter Display
 Usage:
   python3 app.py --mode pi       # Raspberry Pi mode (fullscreen, auto-scaling for TFT or HDMI)
   python3 app.py --mode desktop  # Desktop/PC mode (windowed 480×320, for Linux/Windows/Mac)
+  python3 app.py --mode headless # No display: renders offscreen (servers, CI, benchmarks)
 """.strip()
 
 # Parse arguments with full control
@@ -68,7 +75,7 @@ def parse_arguments():
     )
     parser.add_argument(
         "--mode",
-        choices=["pi", "desktop"],
+        choices=["pi", "desktop", "headless"],
         required=False
     )
     args, unknown = parser.parse_known_args()
@@ -84,32 +91,40 @@ if (args.mode == "desktop" and is_raspberry_pi()) or (args.mode == "pi" and not
     print(USAGE_MESSAGE)
     sys.exit(1)
 
-# Global flag for rendering mode
-IS_DESKTOP_MODE = (args.mode == "desktop")
-
 import src.constants
-src.constants.IS_DESKTOP_MODE = IS_DESKTOP_MODE
+src.constants.STARTUP_T0 = STARTUP_T0
 
-# Set RPi-specific environment variables ONLY in pi mode
-if not IS_DESKTOP_MODE:
+# SDL video driver: KMS/DRM framebuffer on the Pi, offscreen dummy driver when headless
+# or when frames are written to the framebuffer directly (output_backend "framebuffer")
+if args.mode == "pi" and src.constants.OUTPUT_BACKEND == "framebuffer":
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+elif args.mode == "pi":
     os.environ["SDL_VIDEODRIVER"] = "kmsdrm"
     os.environ["SDL_FBDEV"] = "/dev/fb0"
+elif args.mode == "headless":
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
 
 # Early pygame init
 pygame.init()
 
-# Import modules
-from src.constants import MINER_IPS
-from src.websockets import (
-    websocket_listener,
-    run_binance_websocket,
-    run_kraken_websocket,
-    fetch_initial_prices,
+# Import modules needed for the first frame; network modules follow once it is on screen
+from src.constants import (
+    INGEST_ENGINE,
+    MEMPOOL_PUSH,
+    NETWORK_SOURCE,
+    JOURNAL_PATH,
+    JOURNAL_CAPACITY,
+    JOURNAL_FLUSH_INTERVAL,
+    METRICS_PORT,
+    METRICS_BIND,
+    BROADCAST_PORT,
+    BROADCAST_BIND,
+    CONFIG_RELOAD_INTERVAL,
 )
-from src.miners import run_miners_polling
-from src.mempool import mempool_polling_thread
-from src.rendering import main_render_loop
+from src.rendering import init_display, main_render_loop
 from src.data import state
+from src.journal import ShareJournal
+from src.metrics import start_metrics_server
 
 # Logging setup
 BASE_DIR = Path(__file__).resolve().parent
@@ -135,31 +150,64 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
-# Fetch initial prices
-fetch_initial_prices(state)
+init_display(args.mode)
 
-# Start background threads (daemons)
-threading.Thread(target=mempool_polling_thread, daemon=True, name="MempoolPoller").start()
+# Restore shares and session best from the journal
+if JOURNAL_PATH:
+    try:
+        share_journal = ShareJournal(JOURNAL_PATH, JOURNAL_CAPACITY, JOURNAL_FLUSH_INTERVAL)
+        state.attach_journal(share_journal)
+        share_journal.start()
+    except OSError as e:
+        logger.error("Share journal disabled: %s", e)
+        share_journal = None
+
+# Skeleton frame (journal shares, "?" placeholders) before any network work
+main_render_loop(state, max_frames=1, paced=False)
+
+from src.pricefeed import PriceFeed
+from src.config_watch import MinerListeners, config_watch_thread, log_stream_ips
+from src.miners import run_miners_polling
+from src.mempool import mempool_polling_thread, mempool_websocket_thread
+from src.bitcoind import bitcoind_polling_thread
+from src.broadcast import StateBroadcaster
 
-for ip in MINER_IPS:
-    threading.Thread(
-        target=websocket_listener,
-        args=(ip,),
-        daemon=True,
-        name=f"WS-{ip.split('.')[-1]}",
-    ).start()
+if METRICS_PORT:
+    try:
+        start_metrics_server(METRICS_BIND, METRICS_PORT)
+    except OSError as e:
+        logger.error("Metrics endpoint disabled: %s", e)
 
-threading.Thread(
-    target=run_binance_websocket, args=(state,), daemon=True, name="BinanceWS"
-).start()
+# Snapshot + delta websocket feed of the display state for remote viewers
+if BROADCAST_PORT:
+    try:
+        StateBroadcaster(state).start(BROADCAST_BIND, BROADCAST_PORT)
+    except OSError as e:
+        logger.error("State broadcast disabled: %s", e)
 
-threading.Thread(
-    target=run_kraken_websocket, args=(state,), daemon=True, name="KrakenWS"
-).start()
+# Initial REST prices in the background, then Binance live with Kraken on standby
+PriceFeed(state).start()
+
+# Start background threads (daemons)
+if NETWORK_SOURCE == "bitcoind":
+    threading.Thread(target=bitcoind_polling_thread, daemon=True, name="BitcoindPoller").start()
+else:
+    threading.Thread(target=mempool_polling_thread, daemon=True, name="MempoolPoller").start()
+    if MEMPOOL_PUSH:
+        threading.Thread(target=mempool_websocket_thread, daemon=True, name="MempoolWS").start()
+
+# Log listeners for AxeOS miners (cgminer miners report shares through polling);
+# config_watch adds/removes them when config.json changes
+miner_listeners = MinerListeners(INGEST_ENGINE)
+miner_listeners.sync(log_stream_ips(state.snapshot.settings))
+if CONFIG_RELOAD_INTERVAL > 0:
+    threading.Thread(
+        target=config_watch_thread, args=(miner_listeners,), daemon=True, name="ConfigWatch"
+    ).start()
 
 threading.Thread(
     target=run_miners_polling, daemon=True, name="MinersPoller"
 ).start()
 
-logger.info(f"Starting application in {'desktop' if IS_DESKTOP_MODE else 'Raspberry Pi'} mode...")
+logger.info(f"Starting application in {args.mode} mode...")
 main_render_loop(state)
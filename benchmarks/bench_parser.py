@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Miner log parser benchmark.
+
+Replays recorded AxeOS websocket log corpora through handle_miner_message
+(or, with --batch, through handle_miner_frames the way the ingest worker
+drains a miner's queue) and reports parsed lines per second for each corpus.
+
+Usage:
+  python3 benchmarks/bench_parser.py                      # all corpora in benchmarks/corpus/
+  python3 benchmarks/bench_parser.py --lines-per-frame 8  # batch lines like a verbose miner
+  python3 benchmarks/bench_parser.py --batch 32           # frames per ingest worker batch
+  python3 benchmarks/bench_parser.py --min-lines-per-sec 200000  # exit 1 on regression
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+from src.websockets import handle_miner_frames, handle_miner_message
+from src.data import state
+
+CORPUS_DIR = BENCH_DIR / "corpus"
+
+def load_frames(path: Path, lines_per_frame: int) -> list:
+    lines = path.read_text(encoding="utf-8").splitlines()
+    return ["\n".join(lines[i:i + lines_per_frame]) for i in range(0, len(lines), lines_per_frame)]
+
+def bench_corpus(path: Path, lines_per_frame: int, batch: int, min_seconds: float) -> float:
+    frames = load_frames(path, lines_per_frame)
+    lines_per_pass = sum(frame.count("\n") + 1 for frame in frames)
+    if batch > 1:
+        batches = [frames[i:i + batch] for i in range(0, len(frames), batch)]
+
+        def replay() -> None:
+            for frame_batch in batches:
+                handle_miner_frames(frame_batch, "192.0.2.1")
+    else:
+        def replay() -> None:
+            for frame in frames:
+                handle_miner_message(frame, "192.0.2.1")
+    # Warm-up pass (regex compile caches, logger level lookups)
+    replay()
+    passes = 0
+    start = time.perf_counter()
+    elapsed = 0.0
+    while elapsed < min_seconds:
+        replay()
+        passes += 1
+        elapsed = time.perf_counter() - start
+    return passes * lines_per_pass / elapsed
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Miner log parser benchmark")
+    parser.add_argument("corpora", nargs="*", help="Log corpus files (default: benchmarks/corpus/*.log)")
+    parser.add_argument("--lines-per-frame", type=int, default=1)
+    parser.add_argument("--batch", type=int, default=1, help="Frames handed to the parser at once")
+    parser.add_argument("--seconds", type=float, default=2.0, help="Minimum run time per corpus")
+    parser.add_argument("--min-lines-per-sec", type=float, default=0.0,
+                        help="Exit with status 1 if any corpus is slower than this")
+    args = parser.parse_args()
+
+    paths = [Path(p) for p in args.corpora] or sorted(CORPUS_DIR.glob("*.log"))
+    if not paths:
+        print(f"No corpora found in {CORPUS_DIR}")
+        return 1
+
+    slowest = None
+    for path in paths:
+        rate = bench_corpus(path, max(1, args.lines_per_frame), args.batch, args.seconds)
+        slowest = rate if slowest is None else min(slowest, rate)
+        print(f"{path.name:<32} {rate:>14,.0f} lines/sec")
+    print(f"{'shares kept':<32} {len(state.recent_diffs):>14}")
+
+    if slowest is not None and slowest < args.min_lines_per_sec:
+        print(f"REGRESSION: {slowest:,.0f} lines/sec < {args.min_lines_per_sec:,.0f}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
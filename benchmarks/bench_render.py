@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Render loop benchmark (headless, SDL dummy driver).
+
+Drives main_render_loop one frame at a time against a synthetic AppState and
+reports per-phase timings (snapshot, hash, draw, scale, present) and frame
+time percentiles for each scenario:
+
+  share   a new share every frame (whole list scrolls)
+  ticker  only the BTC price changes
+  full    every region redrawn and the whole frame presented
+  stats   share statistics view with a new share every frame
+
+Usage:
+  python3 benchmarks/bench_render.py                      # logical size, no scaling
+  python3 benchmarks/bench_render.py --output 1920x1080   # include HDMI upscaling cost
+  python3 benchmarks/bench_render.py --scenario share --frames 2000
+  python3 benchmarks/bench_render.py --max-p95-ms 20      # exit 1 on regression
+"""
+import os
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+os.environ["SDL_VIDEODRIVER"] = "dummy"
+os.environ["SDL_AUDIODRIVER"] = "dummy"
+os.environ["PYGAME_HIDE_SUPPORT_PROMPT"] = "1"
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+import pygame
+pygame.init()
+
+from benchmarks.common import percentile
+from src import rendering
+from src.data import AppState
+from src.constants import MAX_LINES_ON_SCREEN
+
+MINER_IPS = [f"192.0.2.{i}" for i in range(1, 9)]
+SHARE_DIFFS = (80e3, 2.4e6, 7.1e7, 3.3e9, 6.2e11, 2.1e12)
+
+def seeded_state(rng: random.Random) -> AppState:
+    app_state = AppState()
+    now = time.time()
+    for i in range(MAX_LINES_ON_SCREEN + 1):
+        app_state.add_share(now - 7 * i, rng.choice(SHARE_DIFFS), rng.choice(MINER_IPS))
+    for ip in MINER_IPS:
+        app_state.set_miner_connected(ip, True)
+    app_state.update_ticker("binance", 97_250.0, 1.8)
+    app_state.update_mempool({
+        "fees_sats_vb": 3.2,
+        "block_height": 900_000,
+        "mining_pool": "Foundry USA",
+        "network_hashrate_eh": 950.0,
+        "network_difficulty": 1.3e14,
+        "block_timestamp": int(now) - 120,
+    })
+    app_state.update_miner_stats(9.6, 4.2e12, len(MINER_IPS))
+    return app_state
+
+def step_share(app_state: AppState, i: int, rng: random.Random) -> None:
+    app_state.add_share(time.time(), rng.choice(SHARE_DIFFS) * (1 + i % 97 / 100), rng.choice(MINER_IPS))
+
+def step_ticker(app_state: AppState, i: int, rng: random.Random) -> None:
+    app_state.update_ticker("binance", 97_250.0 + i * 0.01, 1.8)
+
+def step_full(app_state: AppState, i: int, rng: random.Random) -> None:
+    rendering.region_keys.clear()
+    rendering.needs_full_present = True
+    step_ticker(app_state, i, rng)
+
+SCENARIOS = {
+    "share": step_share,
+    "ticker": step_ticker,
+    "full": step_full,
+    "stats": step_share,
+}
+
+def bench_scenario(name: str, frames: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    app_state = seeded_state(rng)
+    rendering.show_share_stats = name == "stats"
+    rendering.region_keys.clear()
+    rendering.last_render_data_hash = None
+    rendering.needs_full_present = True
+    # Warm-up frame (fonts, text cache)
+    rendering.main_render_loop(app_state, max_frames=1, paced=False)
+    timings = {phase: [] for phase in rendering.RENDER_PHASES}
+    step = SCENARIOS[name]
+    for i in range(frames):
+        step(app_state, i, rng)
+        rendering.main_render_loop(app_state, max_frames=1, timings=timings, paced=False)
+    return timings
+
+def parse_size(text: str):
+    w, _, h = text.lower().partition("x")
+    return int(w), int(h)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Headless render loop benchmark")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), action="append",
+                        help="Scenario to run (repeatable, default: all)")
+    parser.add_argument("--frames", type=int, default=500, help="Measured frames per scenario")
+    parser.add_argument("--output", type=parse_size, default=None,
+                        help="Offscreen output size WxH (default: logical size, no scaling)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--max-p95-ms", type=float, default=0.0,
+                        help="Exit with status 1 if any scenario's p95 frame time exceeds this")
+    args = parser.parse_args()
+
+    rendering.init_display("headless", args.output)
+    fb = rendering.fb_output
+    w, h = (fb.width, fb.height) if fb else rendering.screen.get_size()
+    print(f"logical {rendering.SCREEN_WIDTH}×{rendering.logical_screen.get_height()} → "
+          f"{'framebuffer ' + fb.path if fb else 'output'} {w}×{h} "
+          f"(scale {rendering.scale:.2f}), {args.frames} frames per scenario")
+
+    phases = [p for p in rendering.RENDER_PHASES if p != "frame"]
+    print(f"{'scenario':<8} " + " ".join(f"{p + ' ms':>11}" for p in phases)
+          + f" {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} {'fps':>8}")
+    worst_p95 = 0.0
+    for name in args.scenario or list(SCENARIOS):
+        timings = bench_scenario(name, args.frames, args.seed)
+        frame_ms = sorted(t * 1000 for t in timings["frame"])
+        means = [sum(timings[p]) / max(1, len(timings[p])) * 1000 for p in phases]
+        mean_frame = sum(frame_ms) / max(1, len(frame_ms))
+        p95 = percentile(frame_ms, 95)
+        worst_p95 = max(worst_p95, p95)
+        print(f"{name:<8} " + " ".join(f"{m:>11.3f}" for m in means)
+              + f" {percentile(frame_ms, 50):>8.3f} {p95:>8.3f} {percentile(frame_ms, 99):>8.3f}"
+              + f" {frame_ms[-1] if frame_ms else 0.0:>8.3f} {1000 / mean_frame if mean_frame else 0.0:>8.0f}")
+
+    if args.max_p95_ms and worst_p95 > args.max_p95_ms:
+        print(f"REGRESSION: p95 frame time {worst_p95:.3f} ms > {args.max_p95_ms:.3f} ms")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""
+Local miner fleet simulator and ingestion benchmark.
+
+Serves fake miners on 127.0.0.1 (one port per miner). With --api axeos (the
+default) `/api/ws` streams asic_result and filler log lines and
+`/api/system/info` returns hashrate/best difficulty JSON; with --api cgminer
+each port is a cgminer-style TCP API answering "summary+devs+pools" batches
+from a background share process. For each fleet size the app's listeners
+(thread or asyncio engine) and run_miners_polling run in a separate process
+against the fleet, and the script reports share → recent_diffs latency and
+the CPU used by the listeners and the poller. cgminer shares are credited
+at the pool difficulty from counter deltas, so only a new Best Share can
+clear the display threshold, and its latency is bounded by the poll
+interval rather than by ingestion.
+
+Usage:
+  python3 benchmarks/fleet_sim.py run --sizes 10,50,100,200 --duration 30
+  python3 benchmarks/fleet_sim.py run --sizes 100 --engine asyncio --share-rate 2
+  python3 benchmarks/fleet_sim.py run --sizes 50 --disconnect-every 20 --slow-fraction 0.2 --slow-ms 3000
+  python3 benchmarks/fleet_sim.py run --sizes 10,100 --api cgminer --share-rate 20
+  python3 benchmarks/fleet_sim.py serve --miners 20   # simulator only; add 127.0.0.1:18000.. to miner_ips
+
+Difficulties follow the real nonce distribution: P(diff > x) = asic_diff / x,
+so with the defaults about 1 in 300 results clears a 75K display threshold.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import random
+import asyncio
+import argparse
+import tempfile
+import threading
+import subprocess
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+from benchmarks.common import percentile
+
+FILLER_LINES = (
+    "\x1b[0;32mI ({ms}) bm1370Module: Job ID: {job:02X}, Core: 14/1, Ver: 00009995, Nonce: {nonce:08X}\x1b[0m",
+    "\x1b[0;32mI ({ms}) create_jobs_task: New Work Dequeued {job:04x}\x1b[0m",
+    "\x1b[0;32mI ({ms}) power_management: Vin: 5.12V, Pin: 14.8W, Tchip: 55.3C, Fan: 48%\x1b[0m",
+)
+SHARE_LINE = "\x1b[0;32mI ({ms}) asic_result: Ver: 20000000 Nonce {nonce:08X} diff {diff:.1f} of {pool}.\x1b[0m"
+
+# ====================== SIMULATOR ======================
+class VirtualMiner:
+    def __init__(self, port: int, args: argparse.Namespace, rng: random.Random, share_log):
+        self.port = port
+        self.args = args
+        self.rng = rng
+        self.share_log = share_log
+        self.started = time.monotonic()
+        # Hashrate that produces share_rate results/sec at asic_diff
+        self.hashrate_gh = args.share_rate * args.asic_diff * 2 ** 32 / 1e9
+        self.best_diff = 0.0
+        self.accepted = 0
+        self.diff_accepted = 0.0
+
+    def _uptime_ms(self) -> int:
+        return int((time.monotonic() - self.started) * 1000)
+
+    async def process_request(self, connection, request):
+        from websockets.datastructures import Headers
+        from websockets.http11 import Response
+
+        if request.path == "/api/system/info":
+            if self.rng.random() < self.args.slow_fraction:
+                await asyncio.sleep(self.args.slow_ms / 1000)
+            body = json.dumps({
+                "hashRate": self.hashrate_gh * self.rng.uniform(0.97, 1.03),
+                "bestDiff": self.best_diff,
+                "uptimeSeconds": int(time.monotonic() - self.started),
+            }).encode()
+            headers = Headers([
+                ("Content-Type", "application/json"),
+                ("Content-Length", str(len(body))),
+                ("Connection", "close"),
+            ])
+            return Response(200, "OK", headers, body)
+        if request.path != "/api/ws":
+            return connection.respond(404, "Not Found\n")
+        return None
+
+    async def handler(self, ws) -> None:
+        args = self.args
+        rng = self.rng
+        event_rate = args.share_rate + args.filler_rate
+        drop_at = (time.monotonic() + rng.expovariate(1.0 / args.disconnect_every)
+                   if args.disconnect_every > 0 else None)
+        try:
+            while True:
+                await asyncio.sleep(rng.expovariate(event_rate))
+                if drop_at is not None and time.monotonic() >= drop_at:
+                    await ws.close()
+                    return
+                fmt = {"ms": self._uptime_ms(), "nonce": rng.getrandbits(32), "job": rng.getrandbits(8)}
+                if rng.random() * event_rate >= args.share_rate:
+                    await ws.send(rng.choice(FILLER_LINES).format(**fmt))
+                    continue
+                diff = args.asic_diff / (1.0 - rng.random())
+                sent_ts = time.time()
+                await ws.send(SHARE_LINE.format(diff=diff, pool=args.pool_diff, **fmt))
+                if diff >= args.pool_diff:
+                    self.best_diff = max(self.best_diff, diff)
+                if self.share_log is not None and diff >= args.threshold:
+                    self.share_log.write(f"{self.port}\t{diff:.1f}\t{sent_ts:.6f}\n")
+        except Exception:
+            return
+
+    # ----- cgminer API -----
+    async def mine(self) -> None:
+        """Share process behind the cgminer counters (there is no log stream to drive it)."""
+        args = self.args
+        rng = self.rng
+        while True:
+            await asyncio.sleep(rng.expovariate(args.share_rate))
+            diff = args.asic_diff / (1.0 - rng.random())
+            if diff < args.pool_diff:
+                continue
+            self.accepted += 1
+            self.diff_accepted += args.pool_diff
+            # cgminer reports Best Share as an integer
+            best = float(int(diff))
+            if best > self.best_diff:
+                self.best_diff = best
+                if self.share_log is not None and best >= args.threshold:
+                    self.share_log.write(f"{self.port}\t{best:.1f}\t{time.time():.6f}\n")
+
+    def cgminer_section(self, command: str) -> dict:
+        def status(msg: str, code: str = "S") -> list:
+            return [{"STATUS": code, "When": int(time.time()), "Msg": msg}]
+
+        mhs = self.hashrate_gh * 1000 * self.rng.uniform(0.97, 1.03)
+        if command == "summary":
+            return {"STATUS": status("Summary"), "SUMMARY": [{
+                "Elapsed": int(time.monotonic() - self.started), "MHS av": mhs, "MHS 5s": mhs,
+                "Accepted": self.accepted, "Difficulty Accepted": self.diff_accepted,
+                "Best Share": int(self.best_diff),
+            }]}
+        if command == "devs":
+            return {"STATUS": status("3 ASC(s)"),
+                    "DEVS": [{"ASC": i, "MHS 5s": mhs / 3, "Temperature": 62.0} for i in range(3)]}
+        if command == "pools":
+            return {"STATUS": status("1 Pool(s)"), "POOLS": [{
+                "POOL": 0, "URL": "stratum+tcp://127.0.0.1:3333", "Status": "Alive",
+                "Accepted": self.accepted, "Difficulty Accepted": self.diff_accepted,
+                "Best Share": int(self.best_diff),
+            }]}
+        return {"STATUS": status("Invalid command", "E")}
+
+    async def handle_cgminer(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request = await reader.read(4096)
+            try:
+                command = str(json.loads(request).get("command", ""))
+            except ValueError:
+                command = ""
+            if self.rng.random() < self.args.slow_fraction:
+                await asyncio.sleep(self.args.slow_ms / 1000)
+            commands = command.split("+")
+            if len(commands) == 1:
+                reply = self.cgminer_section(command)
+            else:
+                reply = {cmd: [self.cgminer_section(cmd)] for cmd in commands}
+            writer.write(json.dumps(reply).encode() + b"\x00")
+            await writer.drain()
+        except Exception:
+            pass
+        finally:
+            writer.close()
+
+async def serve_fleet(args: argparse.Namespace) -> None:
+    from websockets.asyncio.server import serve
+
+    share_log = open(args.share_log, "w", buffering=1, encoding="utf-8") if args.share_log else None
+    servers = []
+    tasks = []
+    for i in range(args.miners):
+        miner = VirtualMiner(args.base_port + i, args, random.Random(args.seed * 100_003 + i), share_log)
+        if args.api == "cgminer":
+            servers.append(await asyncio.start_server(miner.handle_cgminer, "127.0.0.1", miner.port))
+            tasks.append(asyncio.create_task(miner.mine()))
+            continue
+        servers.append(await serve(miner.handler, "127.0.0.1", miner.port,
+                                   process_request=miner.process_request,
+                                   ping_interval=None, compression=None))
+    print(f"Serving {args.miners} virtual {args.api} miners on 127.0.0.1:{args.base_port}-{args.base_port + args.miners - 1}",
+          flush=True)
+    await asyncio.Event().wait()
+
+# ====================== MEASUREMENT (app side) ======================
+def thread_cpu_seconds() -> Dict[str, float]:
+    """CPU seconds used so far by each live thread, from /proc (Linux only)."""
+    ticks = os.sysconf("SC_CLK_TCK")
+    usage = {}
+    for t in threading.enumerate():
+        try:
+            with open(f"/proc/self/task/{t.native_id}/stat", "r", encoding="utf-8") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        usage[t.name] = (int(fields[11]) + int(fields[12])) / ticks
+    return usage
+
+def thread_group(name: str) -> Optional[str]:
+    if name.startswith("WS-") or name in ("IngestLoop", "IngestWorker"):
+        return "listeners"
+    if name == "MinersPoller" or name.startswith("ThreadPoolExecutor"):
+        return "poller"
+    return None
+
+def measure(args: argparse.Namespace) -> None:
+    import logging
+    logging.basicConfig(level=logging.ERROR)
+
+    from dataclasses import replace
+    from types import MappingProxyType
+    from src.data import state
+    from src.ingest import IngestionEngine
+    from src.config_watch import log_stream_ips
+    from src.miners import run_miners_polling
+    from src.websockets import websocket_listener
+
+    ips = [f"127.0.0.1:{args.base_port + i}" for i in range(args.miners)]
+    # The poller follows the live settings' IP list and miner types
+    state.update_settings(replace(state.snapshot.settings, miner_ips=tuple(ips),
+                                  miner_types=MappingProxyType(dict.fromkeys(ips, args.api))))
+    # cgminer miners have no log stream: shares come through the poller
+    stream_ips = log_stream_ips(state.snapshot.settings)
+
+    received: List[tuple] = []
+
+    def watch_shares() -> None:
+        seen_seq = 0
+        seen_total = 0
+        while True:
+            seen_seq = state.wait_for_change(seen_seq, 1.0)
+            with state.recent_lock:
+                total = state.recent_diffs.total_appended
+                new = state.recent_diffs.newest(min(total - seen_total, state.recent_diffs.capacity))
+            seen_total = total
+            received.extend(new)
+
+    threading.Thread(target=watch_shares, daemon=True, name="ShareWatch").start()
+    start_cpu = time.process_time()
+    start_wall = time.monotonic()
+    if args.engine == "asyncio":
+        if stream_ips:
+            IngestionEngine().start(stream_ips)
+    else:
+        for ip in stream_ips:
+            threading.Thread(target=websocket_listener, args=(ip,), daemon=True,
+                             name=f"WS-{ip.rsplit(':', 1)[-1]}").start()
+    threading.Thread(target=run_miners_polling, daemon=True, name="MinersPoller").start()
+
+    time.sleep(args.duration)
+    elapsed = time.monotonic() - start_wall
+    groups: Dict[str, float] = {}
+    for name, cpu in thread_cpu_seconds().items():
+        group = thread_group(name)
+        if group is not None:
+            groups[group] = groups.get(group, 0.0) + cpu
+    result = {
+        "elapsed": elapsed,
+        "process_cpu": time.process_time() - start_cpu,
+        "groups": groups,
+        "connected": state.snapshot.connected_count,
+        "active": state.snapshot.active_count,
+        "received": [(ts, diff, ip.rsplit(":", 1)[-1]) for ts, diff, ip in received],
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+
+# ====================== ORCHESTRATION ======================
+SIM_OPTIONS = ("share_rate", "filler_rate", "asic_diff", "pool_diff", "disconnect_every",
+               "slow_fraction", "slow_ms", "seed")
+
+def wait_for_port(port: int, timeout: float = 20.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"simulator did not open port {port}")
+
+def run_size(args: argparse.Namespace, miners: int, threshold: float) -> dict:
+    script = str(Path(__file__).resolve())
+    with tempfile.TemporaryDirectory() as tmp:
+        share_log = os.path.join(tmp, "sent.tsv")
+        out = os.path.join(tmp, "measure.json")
+        sim_cmd = [sys.executable, script, "serve", "--miners", str(miners), "--base-port", str(args.base_port),
+                   "--api", args.api, "--threshold", str(threshold), "--share-log", share_log]
+        for option in SIM_OPTIONS:
+            sim_cmd += [f"--{option.replace('_', '-')}", str(getattr(args, option))]
+        sim = subprocess.Popen(sim_cmd, stdout=subprocess.DEVNULL)
+        try:
+            wait_for_port(args.base_port + miners - 1)
+            subprocess.run([sys.executable, script, "measure", "--miners", str(miners),
+                            "--base-port", str(args.base_port), "--engine", args.engine, "--api", args.api,
+                            "--duration", str(args.duration), "--out", out], check=True)
+        finally:
+            sim.terminate()
+            sim.wait()
+        with open(out, "r", encoding="utf-8") as f:
+            result = json.load(f)
+        sent = {}
+        with open(share_log, "r", encoding="utf-8") as f:
+            for line in f:
+                port, diff, ts = line.rstrip("\n").split("\t")
+                sent.setdefault((port, diff), float(ts))
+    latencies = sorted(
+        (ts - sent[(port, f"{diff:.1f}")]) * 1000
+        for ts, diff, port in result["received"] if (port, f"{diff:.1f}") in sent
+    )
+    result["sent"] = len(sent)
+    result["matched"] = len(latencies)
+    result["latency_ms"] = latencies
+    return result
+
+def run(args: argparse.Namespace) -> int:
+    from src.constants import MIN_DIFF_THRESHOLD
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    print(f"api={args.api} engine={args.engine} duration={args.duration:.0f}s share_rate={args.share_rate}/s per miner "
+          f"threshold={MIN_DIFF_THRESHOLD:,.0f}")
+    print(f"{'miners':>6} {'conn':>5} {'shown':>6} {'sent':>6} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} "
+          f"{'listen %':>9} {'poll %':>7} {'proc %':>7}")
+    for miners in sizes:
+        r = run_size(args, miners, MIN_DIFF_THRESHOLD)
+        lat = r["latency_ms"]
+        elapsed = r["elapsed"]
+        groups = r["groups"]
+        print(f"{miners:>6} {r['connected']:>5} {r['matched']:>6} {r['sent']:>6} "
+              f"{percentile(lat, 50):>8.2f} {percentile(lat, 95):>8.2f} {(lat[-1] if lat else 0.0):>8.2f} "
+              f"{groups.get('listeners', 0.0) / elapsed * 100:>9.1f} {groups.get('poller', 0.0) / elapsed * 100:>7.1f} "
+              f"{r['process_cpu'] / elapsed * 100:>7.1f}", flush=True)
+    return 0
+
+def add_api_option(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--api", choices=["axeos", "cgminer"], default="axeos",
+                        help="Miner API to simulate (cgminer: TCP summary+devs+pools, no log stream)")
+
+def add_sim_options(parser: argparse.ArgumentParser) -> None:
+    add_api_option(parser)
+    parser.add_argument("--base-port", type=int, default=18000)
+    parser.add_argument("--share-rate", type=float, default=1.0, help="asic_result lines per second per miner")
+    parser.add_argument("--filler-rate", type=float, default=2.0, help="Other log lines per second per miner")
+    parser.add_argument("--asic-diff", type=float, default=256.0, help="Minimum difficulty of a logged result")
+    parser.add_argument("--pool-diff", type=int, default=4096)
+    parser.add_argument("--disconnect-every", type=float, default=0.0,
+                        help="Mean seconds between forced websocket disconnects (0 = never)")
+    parser.add_argument("--slow-fraction", type=float, default=0.0,
+                        help="Fraction of stats requests (/api/system/info or cgminer API) answered late")
+    parser.add_argument("--slow-ms", type=float, default=2000.0)
+    parser.add_argument("--seed", type=int, default=1)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Local miner fleet simulator")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="Simulate each fleet size and measure the app against it")
+    add_sim_options(p_run)
+    p_run.add_argument("--sizes", default="10,50,100")
+    p_run.add_argument("--duration", type=float, default=30.0, help="Seconds measured per fleet size")
+    p_run.add_argument("--engine", choices=["threads", "asyncio"], default="threads")
+
+    p_serve = sub.add_parser("serve", help="Run the simulator only")
+    add_sim_options(p_serve)
+    p_serve.add_argument("--miners", type=int, default=10)
+    p_serve.add_argument("--threshold", type=float, default=0.0,
+                         help="Log shares at or above this difficulty to --share-log")
+    p_serve.add_argument("--share-log", default="")
+
+    p_measure = sub.add_parser("measure", help=argparse.SUPPRESS)
+    p_measure.add_argument("--miners", type=int, required=True)
+    p_measure.add_argument("--base-port", type=int, required=True)
+    p_measure.add_argument("--engine", choices=["threads", "asyncio"], default="threads")
+    add_api_option(p_measure)
+    p_measure.add_argument("--duration", type=float, required=True)
+    p_measure.add_argument("--out", required=True)
+
+    args = parser.parse_args()
+    if args.command == "serve":
+        try:
+            asyncio.run(serve_fleet(args))
+        except KeyboardInterrupt:
+            pass
+        return 0
+    if args.command == "measure":
+        measure(args)
+        return 0
+    return run(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+# src/backends.py
+"""
+Miner API backends for the stats poller, selected per IP by `miner_types`.
+
+axeos    AxeOS HTTP API (/api/system/info) over a keep-alive session; shares
+         are streamed separately by the /api/ws log listeners.
+cgminer  cgminer/bmminer JSON API on TCP 4028 (Antminer, Avalon, Whatsminer
+         and other stock firmwares): one batched "summary+devs+pools" request
+         per poll on one connection. These miners have no share log, so
+         accepted shares are derived from the pool counters between polls
+         (at the pool difficulty they met) and a rising "Best Share" is
+         recorded as a share of that difficulty.
+"""
+
+import abc
+import json
+import socket
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Any, Dict, List, Optional, Tuple
+
+from .data import state
+from .websockets import record_share_event, record_shares
+
+logger = logging.getLogger(__name__)
+
+HEADERS = {"User-Agent": "rpi-bitcoin-mining-difficulty-meter-display/1.0"}
+CGMINER_PORT = 4028
+CGMINER_COMMAND = "summary+devs+pools"
+CGMINER_TIMEOUT = 4.0
+# Replies are a few KB; anything far larger is not a cgminer API
+CGMINER_MAX_REPLY = 1024 * 1024
+
+def _new_session() -> requests.Session:
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=1, max_retries=0)
+    session.mount("http://", adapter)
+    session.headers.update(HEADERS)
+    return session
+
+def fetch_miner_stats(ip: str, session: Optional[requests.Session] = None) -> Optional[Tuple[float, float]]:
+    """(hashrate TH/s, best difficulty) from AxeOS, or None if the miner did not answer."""
+    try:
+        resp = (session or requests).get(f"http://{ip}/api/system/info", timeout=4, headers=HEADERS)
+        data = resp.json()
+        hr_gh = data.get("hashRate", 0.0)
+        hr_th = hr_gh / 1000.0
+        diff = data.get("bestDiff", 0.0)
+        return (hr_th, diff) if hr_th > 0.05 else (0.0, diff)
+    except Exception:
+        return None
+
+class MinerBackend(abc.ABC):
+    """Stats source for one miner; the poller runs at most one poll() at a time per miner
+    and calls close() only once no poll() is running."""
+    kind = ""
+    # True when shares arrive through a websocket log listener rather than poll()
+    streams_shares = False
+
+    def __init__(self, ip: str):
+        self.ip = ip
+
+    @abc.abstractmethod
+    def poll(self) -> Optional[Tuple[float, float]]:
+        """(hashrate TH/s, best difficulty), or None if the miner did not answer."""
+
+    def close(self) -> None:
+        pass
+
+class AxeOSBackend(MinerBackend):
+    kind = "axeos"
+    streams_shares = True
+
+    def __init__(self, ip: str):
+        super().__init__(ip)
+        self.session = _new_session()
+
+    def poll(self) -> Optional[Tuple[float, float]]:
+        return fetch_miner_stats(self.ip, self.session)
+
+    def close(self) -> None:
+        self.session.close()
+
+# ----- cgminer / bmminer -----
+def _split_host_port(address: str, default_port: int) -> Tuple[str, int]:
+    """"host", "host:port", "[v6addr]" or "[v6addr]:port"; a bare IPv6 address is host-only."""
+    if address.startswith("["):
+        host, _, rest = address[1:].partition("]")
+        if rest[:1] == ":" and rest[1:].isdigit():
+            return host, int(rest[1:])
+        return host, default_port
+    if address.count(":") == 1:
+        host, _, port = address.partition(":")
+        if port.isdigit():
+            return host, int(port)
+    return address, default_port
+
+def cgminer_command(host: str, port: int, command: str, timeout: float = CGMINER_TIMEOUT) -> Dict[str, Any]:
+    """Send one command ("+"-joined for a batch) and return the decoded reply.
+
+    The API answers with a single JSON document and closes the connection;
+    raises OSError or ValueError.
+    """
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        sock.sendall(json.dumps({"command": command}).encode())
+        chunks: List[bytes] = []
+        received = 0
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            received += len(chunk)
+            if received > CGMINER_MAX_REPLY:
+                raise ValueError("cgminer reply too large")
+    raw = b"".join(chunks).rstrip(b"\x00 \r\n")
+    # Some bmminer builds omit the comma between sections of a batched reply
+    raw = raw.replace(b"}{", b"},{")
+    return json.loads(raw.decode("utf-8", errors="replace"))
+
+def _section(reply: Dict[str, Any], command: str, key: str) -> List[Dict[str, Any]]:
+    """Rows of one command in a batched reply ({"summary": [{"STATUS": ..., "SUMMARY": [...]}], ...})."""
+    part = reply.get(command)
+    if isinstance(part, list):
+        part = part[0] if part else {}
+    if not isinstance(part, dict):
+        return []
+    status = part.get("STATUS") or [{}]
+    if status[0].get("STATUS") in ("E", "F"):
+        raise ValueError(f"{command}: {status[0].get('Msg', 'error')}")
+    return part.get(key) or []
+
+def _number(row: Dict[str, Any], key: str) -> Optional[float]:
+    # bmminer reports some values as strings ("GHS 5s": "13512.34")
+    value = row.get(key)
+    if value in (None, ""):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def _hashrate_th(row: Dict[str, Any]) -> Optional[float]:
+    for key, scale in (("MHS 5s", 1e-6), ("GHS 5s", 1e-3), ("MHS av", 1e-6), ("GHS av", 1e-3)):
+        value = _number(row, key)
+        if value is not None:
+            return value * scale
+    return None
+
+def parse_cgminer_reply(reply: Dict[str, Any]) -> Tuple[float, float, Dict[str, Tuple[int, float]]]:
+    """(hashrate TH/s, best share, {pool: (accepted shares, accepted difficulty)}) from a summary+devs+pools reply."""
+    summary = _section(reply, "summary", "SUMMARY")
+    devs = _section(reply, "devs", "DEVS")
+    pools = _section(reply, "pools", "POOLS")
+    row = summary[0] if summary else {}
+
+    hr_th = _hashrate_th(row)
+    if hr_th is None:
+        hr_th = sum(_hashrate_th(dev) or 0.0 for dev in devs)
+    best = _number(row, "Best Share")
+    if best is None:
+        best = max((_number(pool, "Best Share") or 0.0 for pool in pools), default=0.0)
+    counters = {
+        f"{pool.get('POOL', i)} {pool.get('URL', '')}":
+            (int(_number(pool, "Accepted") or 0), _number(pool, "Difficulty Accepted") or 0.0)
+        for i, pool in enumerate(pools)
+    }
+    return hr_th, best, counters
+
+class CgminerBackend(MinerBackend):
+    """cgminer-compatible TCP API; "host" or "host:port" (default port 4028).
+
+    Each pool's counter deltas become shares of the average difficulty
+    accepted since the last poll (the pool difficulty; a share's own
+    difficulty is not reported), fed through record_shares like AxeOS log
+    lines. They are credited at poll time, so share timestamps are only as
+    precise as the poll interval, and several new bests between two polls
+    show up as the highest one. A counter going backwards (miner or pool
+    restart) just resets that pool's baseline.
+    """
+    kind = "cgminer"
+
+    def __init__(self, ip: str):
+        super().__init__(ip)
+        self.host, self.port = _split_host_port(ip, CGMINER_PORT)
+        # pool -> (accepted shares, accepted difficulty) at the last poll
+        self._pools: Optional[Dict[str, Tuple[int, float]]] = None
+        self._best: Optional[float] = None
+        self._connected = False
+
+    def _set_connected(self, connected: bool) -> None:
+        if connected != self._connected:
+            self._connected = connected
+            state.set_miner_connected(self.ip, connected, owner=self)
+            if connected:
+                logger.info("cgminer API connected → %s", self.ip)
+
+    def poll(self) -> Optional[Tuple[float, float]]:
+        try:
+            hr_th, best, pools = parse_cgminer_reply(
+                cgminer_command(self.host, self.port, CGMINER_COMMAND))
+        except (OSError, ValueError) as e:
+            if self._connected:
+                logger.warning("cgminer API failed (%s): %s", self.ip, e)
+            self._set_connected(False)
+            return None
+        self._set_connected(True)
+
+        if self._pools is not None:
+            shares: List[Tuple[float, Optional[float]]] = []
+            for pool, (accepted, diff_accepted) in pools.items():
+                accepted_before, diff_before = self._pools.get(pool, (accepted, diff_accepted))
+                new_shares = accepted - accepted_before
+                new_diff = diff_accepted - diff_before
+                if new_shares > 0 and new_diff >= 0:
+                    shares.extend([(new_diff / new_shares, None)] * new_shares)
+            if shares:
+                record_shares(shares, self.ip)
+        self._pools = pools
+
+        if self._best is not None and best > self._best:
+            record_share_event(best, self.ip)
+        self._best = best
+        return (hr_th, best) if hr_th > 0.05 else (0.0, best)
+
+    def close(self) -> None:
+        self._set_connected(False)
+
+BACKENDS = {backend.kind: backend for backend in (AxeOSBackend, CgminerBackend)}
+
+def create_backend(ip: str, kind: str) -> MinerBackend:
+    backend = BACKENDS.get(kind)
+    if backend is None:
+        logger.warning("Unknown miner type %r for %s, using axeos", kind, ip)
+        backend = AxeOSBackend
+    return backend(ip)
@@ -0,0 +1,182 @@
+# src/bitcoind.py
+"""
+Network data from a local Bitcoin Core node (JSON-RPC + optional ZMQ).
+
+Fills the same mempool_data keys as src/mempool.py. Chain stats and the fee
+estimate are read in one batched RPC call; new blocks are signalled by ZMQ
+`hashblock` when pyzmq is installed and BITCOIND_ZMQ_HASHBLOCK is set,
+otherwise by polling getbestblockhash every BITCOIND_TIP_POLL_EVERY seconds.
+"""
+
+import os
+import re
+import time
+import logging
+import threading
+import requests
+from typing import Any, Dict, List, Optional
+
+try:
+    import zmq
+except ImportError:  # pyzmq is optional
+    zmq = None
+
+from .constants import (
+    MEMPOOL_UPDATE_EVERY,
+    MEMPOOL_STALE_AFTER,
+    BITCOIND_RPC_URL,
+    BITCOIND_RPC_USER,
+    BITCOIND_RPC_PASSWORD,
+    BITCOIND_RPC_COOKIE,
+    BITCOIND_ZMQ_HASHBLOCK,
+)
+from .data import state, MEMPOOL_FIELDS
+from .metrics import MEMPOOL_FETCH_SECONDS, MEMPOOL_FETCH_ERRORS
+
+logger = logging.getLogger(__name__)
+
+BITCOIND_TIP_POLL_EVERY = 2.0
+FEE_TARGET_BLOCKS = 3
+POOL_TAG_MAX_LEN = 24
+COINBASE_TAG = re.compile(rb"[\x20-\x7e]{4,}")
+
+class RPCError(Exception):
+    pass
+
+class BitcoindRPC:
+    def __init__(self, url: str, user: str = "", password: str = "", cookie_path: str = ""):
+        self.url = url
+        self.user = user
+        self.password = password
+        self.cookie_path = cookie_path
+        self.session = requests.Session()
+        self._next_id = 0
+
+    def _auth(self):
+        if self.cookie_path:
+            # Cookie is rewritten on every bitcoind restart, so read it per call
+            with open(os.path.expanduser(self.cookie_path), "r", encoding="utf-8") as f:
+                user, _, password = f.read().strip().partition(":")
+            return user, password
+        return (self.user, self.password) if self.user else None
+
+    def batch(self, calls: List[tuple]) -> List[Any]:
+        """Run [(method, params), ...] in one HTTP request; raises RPCError on any failed call."""
+        payload = []
+        for method, params in calls:
+            self._next_id += 1
+            payload.append({"jsonrpc": "1.0", "id": self._next_id, "method": method, "params": list(params)})
+        endpoint = "bitcoind:" + "+".join(method for method, _ in calls)
+        start = time.perf_counter()
+        try:
+            r = self.session.post(self.url, json=payload, auth=self._auth(), timeout=10)
+            r.raise_for_status()
+            items = r.json()
+        except Exception:
+            MEMPOOL_FETCH_ERRORS.labels(endpoint).inc()
+            raise
+        finally:
+            MEMPOOL_FETCH_SECONDS.labels(endpoint).observe(time.perf_counter() - start)
+        by_id = {item["id"]: item for item in items}
+        results = []
+        for call in payload:
+            item = by_id.get(call["id"])
+            if item is None or item.get("error"):
+                raise RPCError(f"{call['method']}: {item.get('error') if item else 'no response'}")
+            results.append(item["result"])
+        return results
+
+    def call(self, method: str, *params: Any) -> Any:
+        return self.batch([(method, params)])[0]
+
+def coinbase_pool_tag(coinbase_hex: str) -> str:
+    """Best-effort pool name from the ASCII tag in a coinbase scriptSig ("/Foundry USA Pool/" → "Foundry USA Pool")."""
+    try:
+        raw = bytes.fromhex(coinbase_hex)
+    except ValueError:
+        return "Unknown"
+    for run in COINBASE_TAG.findall(raw):
+        for part in run.decode("ascii").split("/"):
+            part = part.split("#", 1)[0].strip()
+            if len(part) >= 3 and any(c.isalpha() for c in part):
+                return part[:POOL_TAG_MAX_LEN]
+    return "Unknown"
+
+def _block_values(rpc: BitcoindRPC, best_hash: str) -> Dict[str, Any]:
+    block = rpc.call("getblock", best_hash, 1)
+    pool = "Unknown"
+    if block.get("tx"):
+        coinbase_tx = rpc.call("getrawtransaction", block["tx"][0], True, best_hash)
+        pool = coinbase_pool_tag(coinbase_tx["vin"][0].get("coinbase", ""))
+    return {"mining_pool": pool, "block_timestamp": block.get("time")}
+
+def _chain_values(rpc: BitcoindRPC) -> Dict[str, Any]:
+    chain, mining, fee = rpc.batch([
+        ("getblockchaininfo", ()),
+        ("getmininginfo", ()),
+        ("estimatesmartfee", (FEE_TARGET_BLOCKS,)),
+    ])
+    feerate = fee.get("feerate")  # BTC/kvB
+    hashps = mining.get("networkhashps")
+    return {
+        "fees_sats_vb": feerate * 1e5 if feerate is not None else None,
+        "block_height": chain.get("blocks"),
+        "network_difficulty": chain.get("difficulty"),
+        "network_hashrate_eh": hashps / 1e18 if hashps is not None else None,
+        "best_hash": chain.get("bestblockhash"),
+    }
+
+def _zmq_listener(endpoint: str, new_block: threading.Event) -> None:
+    ctx = zmq.Context.instance()
+    sock = ctx.socket(zmq.SUB)
+    sock.setsockopt(zmq.SUBSCRIBE, b"hashblock")
+    sock.connect(endpoint)
+    logger.info("ZMQ hashblock subscribed → %s", endpoint)
+    while True:
+        try:
+            sock.recv_multipart()
+            new_block.set()
+        except Exception as e:
+            logger.warning("ZMQ receive error: %s", e)
+            time.sleep(1)
+
+def bitcoind_polling_thread(stop: Optional[threading.Event] = None) -> None:
+    """Publish node data until `stop` is set (checked once per wait)."""
+    rpc = BitcoindRPC(BITCOIND_RPC_URL, BITCOIND_RPC_USER, BITCOIND_RPC_PASSWORD, BITCOIND_RPC_COOKIE)
+    new_block = threading.Event()
+    use_zmq = bool(BITCOIND_ZMQ_HASHBLOCK) and zmq is not None
+    if BITCOIND_ZMQ_HASHBLOCK and zmq is None:
+        logger.warning("pyzmq not installed, polling getbestblockhash instead of ZMQ")
+    if use_zmq:
+        threading.Thread(target=_zmq_listener, args=(BITCOIND_ZMQ_HASHBLOCK, new_block),
+                         daemon=True, name="BitcoindZMQ").start()
+    wait = MEMPOOL_UPDATE_EVERY if use_zmq else min(BITCOIND_TIP_POLL_EVERY, MEMPOOL_UPDATE_EVERY)
+
+    values: Dict[str, Any] = dict.fromkeys(MEMPOOL_FIELDS)
+    best_hash: Optional[str] = None
+    last_full = float("-inf")
+    last_ok = time.monotonic()
+    published = None
+    while stop is None or not stop.is_set():
+        try:
+            now = time.monotonic()
+            tip_hash = best_hash if use_zmq and not new_block.is_set() else rpc.call("getbestblockhash")
+            new_block.clear()
+            if tip_hash != best_hash or now - last_full >= MEMPOOL_UPDATE_EVERY:
+                chain = _chain_values(rpc)
+                tip_hash = chain.pop("best_hash") or tip_hash
+                values.update(chain)
+                if tip_hash != best_hash:
+                    values.update(_block_values(rpc, tip_hash))
+                    best_hash = tip_hash
+                last_full = now
+            last_ok = now
+        except Exception as e:
+            logger.error("Bitcoin Core RPC error: %s", e)
+            if time.monotonic() - last_ok > MEMPOOL_STALE_AFTER:
+                values = dict.fromkeys(MEMPOOL_FIELDS)
+                best_hash = None
+        if values != published:
+            state.update_mempool(values)
+            published = dict(values)
+        new_block.wait(wait)
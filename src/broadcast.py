@@ -0,0 +1,238 @@
+# src/broadcast.py
+"""
+Local websocket broadcast of the display state for remote viewers (a browser
+dashboard, a second display), so they never poll the miners or mempool.space
+themselves.
+
+A client gets one "snapshot" message on connect, then "delta" messages:
+
+  {"type": "snapshot", "seq": 812, "state": {...}, "shares": [[ts, diff, ip], ...]}
+  {"type": "delta", "seq": 815, "patch": {...}, "shares": [[ts, diff, ip], ...]}
+
+`patch` is a JSON Merge Patch (RFC 7386) against the previous state: only
+changed keys are sent and null removes a key. `shares` lists the shares
+added since the previous message, oldest first. Unknown values are left out
+of the state rather than sent as null.
+
+One watcher thread follows state.wait_for_change, encodes each change once
+and hands it to the event loop; it never waits on a client. Each client has
+a bounded queue: when a slow client lets it fill up, its queued deltas are
+dropped and it is sent a fresh snapshot instead.
+"""
+
+import json
+import time
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Set
+
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed
+
+from .constants import TARGET_FPS, NUM_DIFFS_TO_KEEP, BROADCAST_QUEUE_SIZE
+from .data import Share, StateSnapshot, TickerData
+from .metrics import BROADCAST_CLIENTS, BROADCAST_MESSAGES
+from .stats import HISTOGRAM_BINS_PER_DECADE, ShareStatsView
+
+logger = logging.getLogger(__name__)
+
+# Changes arriving faster than the display frame rate are coalesced into one delta
+PUBLISH_INTERVAL = 1.0 / max(1, TARGET_FPS)
+# Upper bound on a watcher wait, so a stalled state never hides a stuck thread for long
+WATCH_TIMEOUT = 60.0
+# Queued in place of dropped deltas: the sender replaces it with a current snapshot
+RESYNC = object()
+
+def _ticker(ticker: TickerData) -> Dict[str, Any]:
+    if ticker.price is None:
+        return {}
+    return {"price": ticker.price, "change_24h": ticker.change_24h, "last_update": ticker.last_update}
+
+def _histogram(counts: Sequence[int]) -> List[int]:
+    # Bins above the highest share are left out; most of the 10^18 range is always empty
+    end = len(counts)
+    while end and not counts[end - 1]:
+        end -= 1
+    return list(counts[:end])
+
+def encode_snapshot(snap: StateSnapshot, stats: ShareStatsView) -> Dict[str, Any]:
+    """JSON-ready view of a StateSnapshot and the share statistics (without the share list)."""
+    settings = snap.settings
+    return {
+        "binance": _ticker(snap.binance),
+        "kraken": _ticker(snap.kraken),
+        "mempool": {name: value for name, value in snap.mempool.items() if value is not None},
+        "miners": {
+            "ips": list(settings.miner_ips),
+            "names": dict(settings.ip_to_name),
+            "connected": snap.connected_count,
+            "active": snap.active_count,
+            "total_hashrate_th": snap.total_hashrate_th,
+            "best_difficulty": snap.best_difficulty,
+            # ip -> [reported TH/s, effective TH/s over 1m, 15m, 1h]
+            "rates": {ip: list(rates) for ip, rates in snap.miner_rates.items()},
+        },
+        "min_diff_threshold": settings.min_diff_threshold,
+        "shares_total": snap.shares_total,
+        "session_best": ({"ts": snap.session_best_ts, "diff": snap.session_best_diff, "ip": snap.session_best_ip}
+                         if snap.session_best_diff > 0 else {}),
+        "tier_counts": list(stats.tier_counts),
+        # Shares per log10 difficulty bin since start: bin i counts [10^(i/n), 10^((i+1)/n)), n = bins_per_decade
+        "histogram": {
+            "bins_per_decade": HISTOGRAM_BINS_PER_DECADE,
+            "all": _histogram(stats.histogram),
+            "miners": {ip: _histogram(counts) for ip, counts in stats.miner_histograms},
+        },
+    }
+
+def merge_patch(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """JSON Merge Patch turning `old` into `new` (empty if they are equal)."""
+    patch: Dict[str, Any] = {}
+    for key, value in new.items():
+        if key not in old:
+            patch[key] = value
+        elif old[key] != value:
+            if isinstance(value, dict) and isinstance(old[key], dict):
+                patch[key] = merge_patch(old[key], value)
+            else:
+                patch[key] = value
+    for key in old:
+        if key not in new:
+            patch[key] = None
+    return patch
+
+def _dumps(message: Dict[str, Any]) -> str:
+    return json.dumps(message, separators=(",", ":"), default=str)
+
+class _Client:
+    __slots__ = ("queue", "synced_seq")
+
+    def __init__(self):
+        # (seq, message text) or RESYNC
+        self.queue: asyncio.Queue = asyncio.Queue(BROADCAST_QUEUE_SIZE)
+        # seq of the last snapshot sent; deltas up to it are already included
+        self.synced_seq = -1
+
+class StateBroadcaster:
+    """Websocket server pushing AppState snapshots and deltas to local clients."""
+
+    def __init__(self, state):
+        self.state = state
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._clients: Set[_Client] = set()
+        self._ready = threading.Event()
+        self._error: Optional[BaseException] = None
+        # Loop-side copy of what clients have been sent: the basis of snapshots for new clients
+        self._seq = 0
+        self._encoded: Dict[str, Any] = {}
+        self._shares: Deque[List[Any]] = deque(maxlen=NUM_DIFFS_TO_KEEP)
+        self._sent = BROADCAST_MESSAGES.labels("sent")
+        self._resyncs = BROADCAST_MESSAGES.labels("resync")
+
+    def start(self, host: str, port: int) -> None:
+        """Bind host:port and start serving from daemon threads (raises OSError if the bind fails)."""
+        threading.Thread(target=self._run_loop, args=(host, port), daemon=True, name="Broadcast").start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+        threading.Thread(target=self._run_watcher, daemon=True, name="BroadcastWatch").start()
+        logger.info("State broadcast → ws://%s:%d/", host, port)
+
+    # ----- event loop thread -----
+    def _run_loop(self, host: str, port: int) -> None:
+        try:
+            asyncio.run(self._main(host, port))
+        except BaseException as e:
+            self._error = e
+            self._ready.set()
+
+    async def _main(self, host: str, port: int) -> None:
+        self._loop = asyncio.get_running_loop()
+        async with serve(self._serve_client, host, port, compression=None):
+            self._ready.set()
+            await asyncio.Event().wait()
+
+    def _snapshot_message(self) -> str:
+        return _dumps({"type": "snapshot", "seq": self._seq, "state": self._encoded, "shares": list(self._shares)})
+
+    async def _serve_client(self, ws) -> None:
+        client = _Client()
+        client.queue.put_nowait(RESYNC)
+        self._clients.add(client)
+        BROADCAST_CLIENTS.set(len(self._clients))
+        logger.info("Broadcast client connected: %s", ws.remote_address)
+        sender = asyncio.create_task(self._send_loop(ws, client))
+        try:
+            # Clients only listen; anything they send is discarded until the connection closes
+            async for _ in ws:
+                pass
+        except ConnectionClosed:
+            pass
+        finally:
+            sender.cancel()
+            self._clients.discard(client)
+            BROADCAST_CLIENTS.set(len(self._clients))
+            logger.info("Broadcast client disconnected: %s", ws.remote_address)
+
+    async def _send_loop(self, ws, client: _Client) -> None:
+        try:
+            while True:
+                item = await client.queue.get()
+                if item is RESYNC:
+                    client.synced_seq = self._seq
+                    message = self._snapshot_message()
+                else:
+                    seq, message = item
+                    if seq <= client.synced_seq:
+                        continue
+                await ws.send(message)
+                self._sent.inc()
+        except ConnectionClosed:
+            pass
+
+    def _fan_out(self, seq: int, encoded: Dict[str, Any], shares: List[List[Any]], message: str) -> None:
+        self._seq = seq
+        self._encoded = encoded
+        self._shares.extend(shares)
+        for client in self._clients:
+            queue = client.queue
+            if queue.full():
+                # Too far behind for deltas to be worth sending: replace them with one snapshot
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESYNC)
+                self._resyncs.inc()
+            else:
+                queue.put_nowait((seq, message))
+
+    # ----- watcher thread -----
+    def _new_shares(self, seen_total: int) -> tuple:
+        state = self.state
+        with state.recent_lock:
+            total = state.recent_diffs.total_appended
+            shares: List[Share] = state.recent_diffs.newest(min(total - seen_total, state.recent_diffs.capacity))
+        return total, [list(share) for share in reversed(shares)]
+
+    def _run_watcher(self) -> None:
+        seq = 0
+        seen_total = 0
+        previous: Dict[str, Any] = {}
+        while True:
+            new_seq = self.state.wait_for_change(seq, WATCH_TIMEOUT)
+            if new_seq == seq:
+                continue
+            seq = new_seq
+            encoded = encode_snapshot(self.state.snapshot, self.state.share_stats_view())
+            shares: List[List[Any]] = []
+            if encoded["shares_total"] != seen_total:
+                seen_total, shares = self._new_shares(seen_total)
+            patch = merge_patch(previous, encoded)
+            if patch or shares:
+                message = {"type": "delta", "seq": seq, "patch": patch}
+                if shares:
+                    message["shares"] = shares
+                self._loop.call_soon_threadsafe(self._fan_out, seq, encoded, shares, _dumps(message))
+                previous = encoded
+            time.sleep(PUBLISH_INTERVAL)
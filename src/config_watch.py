@@ -0,0 +1,151 @@
+# src/config_watch.py
+"""
+Live config reload.
+
+config.json is polled by mtime every CONFIG_RELOAD_INTERVAL seconds. Miner
+IPs, names, API types and the share/active thresholds are applied without a
+restart: log listeners are started or stopped for added/removed AxeOS miners
+(the stats poller follows the published IP list and types), and the new values are published in the
+state snapshot so the render loop never waits on a reload. Other keys still
+take effect on the next start; a reload that changes them logs which ones.
+"""
+
+import os
+import time
+import logging
+import threading
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Optional
+
+from .constants import CONFIG, CONFIG_PATH, CONFIG_RELOAD_INTERVAL, read_config
+from .backends import BACKENDS
+from .data import state, LiveSettings
+from .ingest import IngestionEngine
+from .websockets import frame_queue, websocket_listener
+
+logger = logging.getLogger(__name__)
+
+LIVE_KEYS = ("miner_ips", "ip_to_name", "miner_types", "min_diff_threshold", "min_active_hashrate_th")
+
+def settings_from_config(config: Dict[str, Any]) -> LiveSettings:
+    """LiveSettings from a config dict; raises ValueError/TypeError on malformed values."""
+    ips = config["miner_ips"]
+    names = config["ip_to_name"]
+    types = config["miner_types"]
+    if not isinstance(ips, list) or not all(isinstance(ip, str) for ip in ips):
+        raise ValueError("miner_ips must be a list of strings")
+    if not isinstance(names, dict):
+        raise ValueError("ip_to_name must be an object")
+    if not isinstance(types, dict):
+        raise ValueError("miner_types must be an object")
+    unknown = sorted({str(kind) for kind in types.values()} - set(BACKENDS))
+    if unknown:
+        raise ValueError(f"unknown miner_types {', '.join(unknown)} (expected {', '.join(BACKENDS)})")
+    return LiveSettings(
+        miner_ips=tuple(dict.fromkeys(ips)),
+        ip_to_name=MappingProxyType({str(ip): str(name) for ip, name in names.items()}),
+        miner_types=MappingProxyType({str(ip): str(kind) for ip, kind in types.items()}),
+        min_diff_threshold=float(config["min_diff_threshold"]),
+        min_active_hashrate_th=float(config["min_active_hashrate_th"]),
+    )
+
+def log_stream_ips(settings: LiveSettings) -> List[str]:
+    """Miners whose shares come from a websocket log listener (the others report through polling)."""
+    return [ip for ip in settings.miner_ips
+            if BACKENDS.get(settings.miner_type(ip), BACKENDS["axeos"]).streams_shares]
+
+class MinerListeners:
+    """Miner log listeners keyed by IP, on either ingest engine ("threads" or "asyncio")."""
+
+    def __init__(self, engine: str):
+        self._engine = IngestionEngine() if engine == "asyncio" else None
+        self._engine_started = False
+        self._stops: Dict[str, threading.Event] = {}
+        self._ips: List[str] = []
+
+    def sync(self, ips: Iterable[str]) -> None:
+        """Start listeners for new IPs and stop those no longer listed (never blocks on I/O)."""
+        wanted = list(dict.fromkeys(ips))
+        for ip in self._ips:
+            if ip not in wanted:
+                self._stop(ip)
+        for ip in wanted:
+            if ip not in self._ips:
+                self._start(ip)
+        self._ips = wanted
+
+    def _start(self, ip: str) -> None:
+        if self._engine is not None:
+            if not self._engine_started:
+                self._engine.start(())
+                self._engine_started = True
+            self._engine.add(ip)
+            return
+        stop = threading.Event()
+        self._stops[ip] = stop
+        threading.Thread(
+            target=websocket_listener,
+            args=(ip, stop),
+            daemon=True,
+            name=f"WS-{ip.split('.')[-1]}",
+        ).start()
+
+    def _stop(self, ip: str) -> None:
+        if self._engine is not None:
+            self._engine.remove(ip)
+        else:
+            stop = self._stops.pop(ip)
+            stop.set()
+            # Done here rather than when the thread exits (up to MINER_WS_TIMEOUT_SEC later),
+            # so a listener started for the same IP right after is never affected
+            frame_queue.discard(ip)
+            state.set_miner_connected(ip, False, owner=stop)
+
+def apply_config(config: Dict[str, Any], previous: Dict[str, Any], listeners: MinerListeners) -> bool:
+    """Apply the live keys of a reloaded config; False if it was rejected."""
+    try:
+        settings = settings_from_config(config)
+    except (KeyError, TypeError, ValueError) as e:
+        logger.warning("Config reload rejected: %s", e)
+        return False
+
+    current = state.snapshot.settings
+    if settings != current:
+        added = [ip for ip in settings.miner_ips if ip not in current.miner_ips]
+        removed = [ip for ip in current.miner_ips if ip not in settings.miner_ips]
+        listeners.sync(log_stream_ips(settings))
+        state.update_settings(settings)
+        logger.info("Config reloaded: %d miners (+%d / -%d), threshold %s",
+                    len(settings.miner_ips), len(added), len(removed), settings.min_diff_threshold)
+
+    restart_keys = sorted(k for k in set(config) | set(previous)
+                          if k not in LIVE_KEYS and config.get(k) != previous.get(k))
+    if restart_keys:
+        logger.warning("Config changes that apply after a restart: %s", ", ".join(restart_keys))
+    return True
+
+def _config_stamp(path: str) -> Optional[tuple]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+def config_watch_thread(listeners: MinerListeners, path: str = CONFIG_PATH,
+                        interval: float = CONFIG_RELOAD_INTERVAL) -> None:
+    previous = dict(CONFIG)
+    stamp = _config_stamp(path)
+    while True:
+        time.sleep(interval)
+        new_stamp = _config_stamp(path)
+        if new_stamp is None or new_stamp == stamp:
+            continue
+        stamp = new_stamp
+        try:
+            config = read_config(path)
+        except (OSError, ValueError) as e:
+            # Typically an editor mid-save; the next write changes the stamp again
+            logger.warning("Config reload skipped: %s", e)
+            continue
+        if apply_config(config, previous, listeners):
+            previous = config
@@ -4,9 +4,10 @@ Global constants and configuration loading.
 """
 
 import json
+import math
 import os
 import re
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 import logging
 
 logger = logging.getLogger(__name__)
@@ -17,6 +18,7 @@ CONFIG_PATH = os.path.join(PROJECT_ROOT, 'config.json')
 DEFAULT_CONFIG = {
     "miner_ips": [],
     "ip_to_name": {},
+    "miner_types": {},
     "btc_logo_path": "logos/btc.png",
     "min_diff_threshold": 75000,
     "min_active_hashrate_th": 0.25,
@@ -26,12 +28,46 @@ DEFAULT_CONFIG = {
     "screen_width": 480,
     "screen_height": 320,
     "target_fps": 8,
-    "mempool_update_every": 30.0
+    "mempool_update_every": 30.0,
+    "text_cache_size": 256,
+    "event_driven_render": True,
+    "ingest_engine": "threads",
+    "ingest_queue_size": 256,
+    "ingest_queue_policy": "drop_oldest",
+    "journal_path": "data/shares.journal",
+    "journal_capacity": 4096,
+    "journal_flush_interval": 5.0,
+    "miner_poll_interval": 10.0,
+    "mempool_slow_update_every": 300.0,
+    "mempool_stale_after": 600.0,
+    "mempool_push": False,
+    "mempool_api_url": "https://mempool.space/api",
+    "mempool_ws_url": "wss://mempool.space/api/v1/ws",
+    "network_source": "mempool",
+    "bitcoind_rpc_url": "http://127.0.0.1:8332",
+    "bitcoind_rpc_user": "",
+    "bitcoind_rpc_password": "",
+    "bitcoind_rpc_cookie": "",
+    "bitcoind_zmq_hashblock": "",
+    "metrics_port": 0,
+    "metrics_bind": "127.0.0.1",
+    "broadcast_port": 0,
+    "broadcast_bind": "127.0.0.1",
+    "broadcast_queue_size": 64,
+    "output_backend": "sdl",
+    "fb_device": "/dev/fb0",
+    "fb_size": None,
+    "fb_bpp": 16,
+    "config_reload_interval": 2
 }
 
+def read_config(path: str = CONFIG_PATH) -> Dict[str, Any]:
+    """DEFAULT_CONFIG overlaid with the JSON file (raises OSError / ValueError)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return {**DEFAULT_CONFIG, **json.load(f)}
+
 try:
-    with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
-        CONFIG: Dict[str, Any] = json.load(f)
+    CONFIG: Dict[str, Any] = read_config()
     logger.info("Config loaded successfully")
 except FileNotFoundError as e:
     logger.warning(f"Config file not found: {e}. Using default configuration.")
@@ -42,6 +78,7 @@ except json.JSONDecodeError as e:
 
 MINER_IPS = CONFIG['miner_ips']
 IP_TO_NAME = CONFIG['ip_to_name']
+MINER_TYPES = CONFIG['miner_types']
 NUM_MINERS = len(MINER_IPS)
 NUM_DIFFS_TO_KEEP = CONFIG['num_diffs_to_keep']
 MAX_LINES_ON_SCREEN = CONFIG['max_lines_on_screen']
@@ -49,12 +86,55 @@ SCREEN_WIDTH = CONFIG['screen_width']
 SCREEN_HEIGHT = CONFIG['screen_height']
 TARGET_FPS = CONFIG['target_fps']
 MEMPOOL_UPDATE_EVERY = CONFIG['mempool_update_every']
+MEMPOOL_SLOW_UPDATE_EVERY = CONFIG['mempool_slow_update_every']
+MEMPOOL_STALE_AFTER = CONFIG['mempool_stale_after']
+MEMPOOL_PUSH = CONFIG['mempool_push']
+MEMPOOL_API_URL = CONFIG['mempool_api_url']
+MEMPOOL_WS_URL = CONFIG['mempool_ws_url']
+NETWORK_SOURCE = CONFIG['network_source']
+BITCOIND_RPC_URL = CONFIG['bitcoind_rpc_url']
+BITCOIND_RPC_USER = CONFIG['bitcoind_rpc_user']
+BITCOIND_RPC_PASSWORD = CONFIG['bitcoind_rpc_password']
+BITCOIND_RPC_COOKIE = CONFIG['bitcoind_rpc_cookie']
+BITCOIND_ZMQ_HASHBLOCK = CONFIG['bitcoind_zmq_hashblock']
+METRICS_PORT = CONFIG['metrics_port']
+METRICS_BIND = CONFIG['metrics_bind']
+BROADCAST_PORT = CONFIG['broadcast_port']
+BROADCAST_BIND = CONFIG['broadcast_bind']
+BROADCAST_QUEUE_SIZE = CONFIG['broadcast_queue_size']
+OUTPUT_BACKEND = CONFIG['output_backend']
+FB_DEVICE = CONFIG['fb_device']
+FB_SIZE = CONFIG['fb_size']
+FB_BPP = CONFIG['fb_bpp']
+CONFIG_RELOAD_INTERVAL = CONFIG['config_reload_interval']
 MIN_DIFF_THRESHOLD = CONFIG['min_diff_threshold']
 MIN_ACTIVE_HASHRATE_TH = CONFIG['min_active_hashrate_th']
 DATA_TIMEOUT_SEC = CONFIG['data_timeout_sec']
+TEXT_CACHE_SIZE = CONFIG['text_cache_size']
+EVENT_DRIVEN_RENDER = CONFIG['event_driven_render']
+INGEST_ENGINE = CONFIG['ingest_engine']
+INGEST_QUEUE_SIZE = CONFIG['ingest_queue_size']
+INGEST_QUEUE_POLICY = CONFIG['ingest_queue_policy']
+JOURNAL_PATH = os.path.join(PROJECT_ROOT, CONFIG['journal_path']) if CONFIG['journal_path'] else ""
+JOURNAL_CAPACITY = CONFIG['journal_capacity']
+JOURNAL_FLUSH_INTERVAL = CONFIG['journal_flush_interval']
+MINER_POLL_INTERVAL = CONFIG['miner_poll_interval']
+MINER_POLL_INTERVAL_FAST = min(5.0, MINER_POLL_INTERVAL)
+MINER_POLL_INTERVAL_MAX = 120.0
 BTC_LOGO_PATH = os.path.join(PROJECT_ROOT, CONFIG['btc_logo_path'])
 
+MINER_WS_TIMEOUT_SEC = 15.0
+RECONNECT_DELAY_START = 5.0
+RECONNECT_DELAY_MAX = 60.0
+RECONNECT_BACKOFF = 1.5
+
 ANSI_ESCAPE = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
+# Share difficulty X in asic_result lines ("diff X of Y", "diff X/Y" or "diff=X") and,
+# when logged, the pool target Y ("diff=X, pool diff Y" on NerdQAxe)
+SHARE_DIFF_PATTERN = re.compile(
+    r'diff ([0-9][0-9.]*)\s*(?:of |/)\s*([0-9]+(?:\.[0-9]+)?)?'
+    r'|diff=([0-9][0-9.]*)(?:,\s*pool diff ([0-9]+(?:\.[0-9]+)?))?'
+)
 
 COLOR_POOR = (157, 157, 157)
 COLOR_COMMON = (255, 255, 255)
@@ -62,6 +142,15 @@ COLOR_UNCOMMON = (21, 158, 16)
 COLOR_RARE = (0, 112, 221)
 COLOR_EPIC = (163, 53, 238)
 COLOR_LEGENDARY = (255, 128, 0)
+# Share rarity tiers: (name, exclusive upper difficulty bound, color)
+RARITY_TIERS = (
+    ("Poor", 1_000_000, COLOR_POOR),
+    ("Common", 50_000_000, COLOR_COMMON),
+    ("Uncommon", 1_000_000_000, COLOR_UNCOMMON),
+    ("Rare", 500_000_000_000, COLOR_RARE),
+    ("Epic", 1_000_000_000_000, COLOR_EPIC),
+    ("Legendary", math.inf, COLOR_LEGENDARY),
+)
 INDICATOR_GREEN = (21, 158, 16)
 INDICATOR_ORANGE = (255, 165, 0)
 INDICATOR_RED = (255, 0, 0)
@@ -74,4 +163,5 @@ BASE_HEIGHT = 320
 MAX_LINES_ON_SCREEN = min(CONFIG['max_lines_on_screen'], 21)
 LOGICAL_HEIGHT = BASE_HEIGHT + max(0, (MAX_LINES_ON_SCREEN - 6) * LINE_HEIGHT)
 
-IS_DESKTOP_MODE: bool = False
+# Set by app.py: time.perf_counter() at process start, for the first-frame measurement
+STARTUP_T0: Optional[float] = None
@@ -3,13 +3,28 @@
 Shared data structures and global state.
 """
 
-from dataclasses import dataclass
-from typing import Optional
-from collections import deque
+from dataclasses import dataclass, field, replace
+from types import MappingProxyType
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple, TYPE_CHECKING
 import threading
 import time
 
-from .constants import NUM_DIFFS_TO_KEEP, DATA_TIMEOUT_SEC
+from .constants import (
+    NUM_DIFFS_TO_KEEP,
+    DATA_TIMEOUT_SEC,
+    MAX_LINES_ON_SCREEN,
+    MINER_IPS,
+    IP_TO_NAME,
+    MINER_TYPES,
+    MIN_DIFF_THRESHOLD,
+    MIN_ACTIVE_HASHRATE_TH,
+)
+from .stats import ShareRates, ShareDistribution, ShareStatsView
+from .metrics import LOCK_WAIT_SECONDS
+
+if TYPE_CHECKING:
+    from .journal import ShareJournal
 
 @dataclass
 class TickerData:
@@ -28,30 +43,134 @@ class TickerData:
         self.change_24h = change
         self.last_update = time.time()
 
+Share = Tuple[float, float, str]
+
+_RECENT_LOCK_WAIT = LOCK_WAIT_SECONDS.labels("recent")
+_CHANGE_LOCK_WAIT = LOCK_WAIT_SECONDS.labels("change")
+
+class ShareRing:
+    """Fixed-capacity share history stored as parallel arrays.
+
+    Timestamps and difficulties live in array('d') columns; miner IPs are
+    interned into a small table and stored as array('H') indices.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self._ts = array('d', [0.0]) * self.capacity
+        self._diff = array('d', [0.0]) * self.capacity
+        self._miner = array('H', [0]) * self.capacity
+        self._miner_ips: List[str] = []
+        self._miner_index: Dict[str, int] = {}
+        self._head = 0
+        self._count = 0
+        self.total_appended = 0
+
+    def _intern(self, ip: str) -> int:
+        idx = self._miner_index.get(ip)
+        if idx is None:
+            idx = len(self._miner_ips)
+            self._miner_ips.append(ip)
+            self._miner_index[ip] = idx
+        return idx
+
+    def append(self, share: Share) -> None:
+        ts, diff, ip = share
+        head = self._head
+        self._ts[head] = ts
+        self._diff[head] = diff
+        self._miner[head] = self._intern(ip)
+        self._head = (head + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+        self.total_appended += 1
+
+    def extend(self, shares: Iterable[Share]) -> None:
+        for share in shares:
+            self.append(share)
+
+    def newest(self, k: int) -> List[Share]:
+        """Up to k most recent shares, newest first, in O(k)."""
+        k = min(k, self._count)
+        out = []
+        idx = self._head
+        for _ in range(k):
+            idx = (idx - 1) % self.capacity
+            out.append((self._ts[idx], self._diff[idx], self._miner_ips[self._miner[idx]]))
+        return out
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[Share]:
+        return iter(reversed(self.newest(self._count)))
+
+MEMPOOL_FIELDS = (
+    "fees_sats_vb",
+    "block_height",
+    "mining_pool",
+    "network_hashrate_eh",
+    "network_difficulty",
+    "block_timestamp",
+)
+
+@dataclass(frozen=True)
+class LiveSettings:
+    """Config values that are applied without a restart (see src/config_watch.py)."""
+    miner_ips: Tuple[str, ...] = tuple(MINER_IPS)
+    ip_to_name: Mapping[str, str] = field(default_factory=lambda: MappingProxyType(dict(IP_TO_NAME)))
+    min_diff_threshold: float = MIN_DIFF_THRESHOLD
+    min_active_hashrate_th: float = MIN_ACTIVE_HASHRATE_TH
+    # ip -> miner API ("axeos" when not listed; see src/backends.py)
+    miner_types: Mapping[str, str] = field(default_factory=lambda: MappingProxyType(dict(MINER_TYPES)))
+
+    def miner_type(self, ip: str) -> str:
+        return self.miner_types.get(ip, "axeos")
+
+@dataclass(frozen=True)
+class StateSnapshot:
+    """Immutable view of AppState; a new one is swapped in atomically on every change."""
+    version: int = 0
+    binance: TickerData = field(default_factory=lambda: TickerData("binance"))
+    kraken: TickerData = field(default_factory=lambda: TickerData("kraken"))
+    connected_count: int = 0
+    mempool: Mapping[str, Any] = field(default_factory=lambda: MappingProxyType(dict.fromkeys(MEMPOOL_FIELDS)))
+    total_hashrate_th: float = 0.0
+    best_difficulty: float = 0.0
+    active_count: int = 0
+    recent: Tuple[Share, ...] = ()
+    shares_total: int = 0
+    session_best_ts: float = 0.0
+    session_best_diff: float = 0.0
+    session_best_ip: str = ""
+    # ip -> (reported TH/s, effective TH/s over 1m, 15m, 1h)
+    miner_rates: Mapping[str, Tuple[float, ...]] = field(default_factory=lambda: MappingProxyType({}))
+    settings: LiveSettings = field(default_factory=LiveSettings)
+
 class AppState:
     def __init__(self):
         self.binance = TickerData("binance")
         self.kraken = TickerData("kraken")
         self.ticker_lock = threading.Lock()
 
-        self.recent_diffs = deque(maxlen=NUM_DIFFS_TO_KEEP)
+        self.recent_diffs = ShareRing(NUM_DIFFS_TO_KEEP)
         self.recent_lock = threading.Lock()
+        # Long-run distribution of accepted shares (guarded by recent_lock); its view is
+        # built on demand by readers, not on every share
+        self.share_distribution = ShareDistribution()
+        self._share_stats_view = ShareStatsView()
+        self._share_stats_dirty = False
 
         self.session_best_ts: float = 0.0
         self.session_best_diff: float = 0.0
         self.session_best_ip: str = ""
+        self.journal: Optional["ShareJournal"] = None
 
-        self.connected_miners = set()
+        # ip -> owner of the live connection (see set_miner_connected)
+        self.connected_miners: Dict[str, object] = {}
         self.connected_lock = threading.Lock()
 
-        self.mempool_data = {
-            "fees_sats_vb": None,
-            "block_height": None,
-            "mining_pool": None,
-            "network_hashrate_eh": None,
-            "network_difficulty": None,
-            "block_timestamp": None,
-        }
+        self.mempool_data = dict.fromkeys(MEMPOOL_FIELDS)
         self.mempool_lock = threading.Lock()
 
         self.miner_stats = {
@@ -60,5 +179,132 @@ class AppState:
             "active_count": 0,
         }
         self.miners_lock = threading.Lock()
+        # Windowed share count / effective hashrate per miner (has its own lock)
+        self.share_rates = ShareRates()
+
+        # Readers take `snapshot` without locking; writers publish a new one under their own
+        # lock (so publishes follow mutation order) and bump change_seq == snapshot.version.
+        self.snapshot = StateSnapshot()
+        self.change_seq = 0
+        self._change_cond = threading.Condition()
+
+    # ----- writers -----
+    def update_ticker(self, source: str, price: float, change: float) -> None:
+        with self.ticker_lock:
+            ticker = self.binance if source == "binance" else self.kraken
+            ticker.update(price, change)
+            self._publish(**{source: replace(ticker)})
+
+    def set_miner_connected(self, ip: str, connected: bool, owner: object = None) -> None:
+        """Mark a miner (dis)connected on behalf of `owner` (a listener or backend).
+
+        A disconnect only applies if the same owner made the last connect, so a
+        listener that is winding down can't clear its replacement's flag.
+        """
+        with self.connected_lock:
+            if connected:
+                self.connected_miners[ip] = owner
+            elif ip in self.connected_miners and (owner is None or self.connected_miners[ip] is owner):
+                del self.connected_miners[ip]
+            else:
+                return
+            self._publish(connected_count=len(self.connected_miners))
+
+    def update_settings(self, settings: LiveSettings) -> None:
+        self._publish(settings=settings)
+
+    def update_mempool(self, values: Mapping[str, Any]) -> None:
+        with self.mempool_lock:
+            self.mempool_data.update(values)
+            self._publish(mempool=MappingProxyType(dict(self.mempool_data)))
+
+    def update_miner_stats(self, total_hashrate_th: float, best_difficulty: float, active_count: int) -> None:
+        with self.miners_lock:
+            self.miner_stats["total_hashrate_th"] = total_hashrate_th
+            self.miner_stats["best_difficulty"] = best_difficulty
+            self.miner_stats["active_count"] = active_count
+            self._publish(
+                total_hashrate_th=total_hashrate_th,
+                best_difficulty=best_difficulty,
+                active_count=active_count,
+            )
+
+    def update_miner_rates(self, rates: Mapping[str, Tuple[float, ...]]) -> None:
+        with self.miners_lock:
+            self._publish(miner_rates=MappingProxyType(dict(rates)))
+
+    def attach_journal(self, journal: "ShareJournal") -> None:
+        """Restore shares and session best from the journal, then persist new shares to it."""
+        shares, best = journal.load()
+        with self.recent_lock:
+            self.recent_diffs.extend(shares[-NUM_DIFFS_TO_KEEP:])
+            for share in shares:
+                self.share_distribution.restore(share)
+            if best is not None and best[1] > self.session_best_diff:
+                self.session_best_ts, self.session_best_diff, self.session_best_ip = best
+            self.journal = journal
+            self._publish_shares()
+
+    def add_share(self, ts: float, diff: float, ip: str) -> bool:
+        """Record an accepted share; returns True if it is a new session best."""
+        return self.add_shares(((ts, diff, ip),)) is not None
+
+    def add_shares(self, shares: Sequence[Share]) -> Optional[Share]:
+        """Record accepted shares (oldest first) under one lock hold and one publish.
+
+        Returns the new session best if the batch raised it, else None.
+        """
+        wait_start = time.perf_counter()
+        with self.recent_lock:
+            _RECENT_LOCK_WAIT.observe(time.perf_counter() - wait_start)
+            new_best = None
+            for share in shares:
+                self.recent_diffs.append(share)
+                self.share_distribution.add(share)
+                if share[1] > self.session_best_diff:
+                    self.session_best_ts, self.session_best_diff, self.session_best_ip = share
+                    new_best = share
+            journal = self.journal
+            self._publish_shares()
+        if journal is not None:
+            for ts, diff, ip in shares:
+                journal.append(ts, diff, ip)
+            if new_best is not None:
+                journal.set_best(*new_best)
+        return new_best
+
+    def _publish_shares(self) -> None:
+        # Caller holds recent_lock
+        self._publish(
+            recent=tuple(self.recent_diffs.newest(MAX_LINES_ON_SCREEN)),
+            shares_total=self.recent_diffs.total_appended,
+            session_best_ts=self.session_best_ts,
+            session_best_diff=self.session_best_diff,
+            session_best_ip=self.session_best_ip,
+        )
+        self._share_stats_dirty = True
+
+    def _publish(self, **changes: Any) -> None:
+        wait_start = time.perf_counter()
+        with self._change_cond:
+            _CHANGE_LOCK_WAIT.observe(time.perf_counter() - wait_start)
+            self.change_seq += 1
+            self.snapshot = replace(self.snapshot, version=self.change_seq, **changes)
+            self._change_cond.notify_all()
+
+    # ----- readers -----
+    def share_stats_view(self) -> ShareStatsView:
+        """Immutable copy of the share distribution, rebuilt only if shares were added since the last call."""
+        with self.recent_lock:
+            if self._share_stats_dirty:
+                self._share_stats_view = self.share_distribution.view()
+                self._share_stats_dirty = False
+            return self._share_stats_view
+
+    def wait_for_change(self, seen_seq: int, timeout: float) -> int:
+        """Block until change_seq differs from seen_seq or timeout expires; returns the current seq."""
+        with self._change_cond:
+            self._change_cond.wait_for(lambda: self.change_seq != seen_seq, timeout)
+            return self.change_seq
 
 state = AppState()
@@ -0,0 +1,158 @@
+# src/framebuffer.py
+"""
+Framebuffer output: writes frames straight into /dev/fbN (or a plain file
+with the same layout) through a memory map, bypassing the SDL video stack.
+
+Pixel conversion to the framebuffer format (RGB565, RGB888 or XRGB8888) is
+done by pygame's blit into a surface with the framebuffer's masks, and
+only rows that differ from the last written frame are copied to the map.
+"""
+
+import os
+import math
+import mmap
+import logging
+import pygame
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# bits per pixel -> (R, G, B, A) masks, little-endian as used by the Pi framebuffers
+FB_FORMATS = {
+    16: (0xF800, 0x07E0, 0x001F, 0),
+    24: (0xFF0000, 0x00FF00, 0x0000FF, 0),
+    32: (0xFF0000, 0x00FF00, 0x0000FF, 0),
+}
+
+def read_fb_geometry(path: str) -> Optional[Tuple[int, int, int, int]]:
+    """(width, height, bits per pixel, stride) of a framebuffer device from sysfs, or None."""
+    base = os.path.join("/sys/class/graphics", os.path.basename(os.path.realpath(path)))
+    try:
+        with open(os.path.join(base, "virtual_size"), "r", encoding="utf-8") as f:
+            width, height = (int(v) for v in f.read().strip().split(","))
+        with open(os.path.join(base, "bits_per_pixel"), "r", encoding="utf-8") as f:
+            bpp = int(f.read())
+        with open(os.path.join(base, "stride"), "r", encoding="utf-8") as f:
+            stride = int(f.read())
+    except (OSError, ValueError):
+        return None
+    return width, height, bpp, stride
+
+class FramebufferOutput:
+    """Memory-mapped framebuffer target for the logical screen surface.
+
+    Geometry comes from sysfs for real devices; for plain files (or when sysfs
+    is unavailable) pass `size` and `bpp`, and the file is created/extended to fit.
+    """
+
+    def __init__(self, path: str, size: Optional[Sequence[int]] = None, bpp: int = 16):
+        geometry = read_fb_geometry(path)
+        if geometry is not None:
+            width, height, bpp, stride = geometry
+        elif size:
+            width, height = int(size[0]), int(size[1])
+            stride = width * bpp // 8
+        else:
+            raise ValueError(f"no geometry for {path}: set fb_size (and fb_bpp)")
+        if bpp not in FB_FORMATS:
+            raise ValueError(f"unsupported framebuffer depth {bpp} bpp")
+        self.path = path
+        self.width = width
+        self.height = height
+        self.bpp = bpp
+        self.stride = stride
+        self.row_bytes = width * bpp // 8
+        map_size = stride * height
+
+        self._file = open(path, "r+b" if os.path.exists(path) else "w+b")
+        if os.path.isfile(path) and os.fstat(self._file.fileno()).st_size < map_size:
+            self._file.truncate(map_size)
+        self._map = mmap.mmap(self._file.fileno(), map_size)
+        self._surface = pygame.Surface((width, height), 0, bpp, FB_FORMATS[bpp])
+        # Copy of the rows last written, so unchanged rows are never touched (fb reads can be slow)
+        self._shadow = bytearray(self.row_bytes * height)
+        self._shadow_valid = False
+        self._logical_size: Optional[Tuple[int, int]] = None
+        self.scale = 1.0
+        self.offset_x = 0
+        self.offset_y = 0
+        self.rows_written = 0
+        logger.info("Framebuffer output → %s (%d×%d, %d bpp)", path, width, height, bpp)
+
+    def _fit(self, logical_w: int, logical_h: int) -> None:
+        self._logical_size = (logical_w, logical_h)
+        self.scale = min(self.width / logical_w, self.height / logical_h)
+        self.offset_x = (self.width - int(logical_w * self.scale)) // 2
+        self.offset_y = (self.height - int(logical_h * self.scale)) // 2
+        self._surface.fill((0, 0, 0))
+
+    def compose(self, surface: pygame.Surface, rects: Optional[Iterable[pygame.Rect]] = None) -> List[Tuple[int, int]]:
+        """Scale/convert the given regions (all of `surface` if None) into the framebuffer format.
+
+        Returns the touched row ranges [(y0, y1), ...] to pass to flush().
+        """
+        if surface.get_size() != self._logical_size:
+            self._fit(*surface.get_size())
+            rects = None
+        bounds = surface.get_rect()
+        if rects is None:
+            rects = [bounds]
+        bands = []
+        for rect in rects:
+            rect = rect.clip(bounds)
+            if rect.width <= 0 or rect.height <= 0:
+                continue
+            if self.scale == 1.0:
+                x0, y0 = self.offset_x + rect.x, self.offset_y + rect.y
+                self._surface.blit(surface, (x0, y0), rect)
+                bands.append((y0, y0 + rect.height))
+                continue
+            x0 = self.offset_x + int(rect.x * self.scale)
+            y0 = self.offset_y + int(rect.y * self.scale)
+            x1 = min(self.width, self.offset_x + math.ceil(rect.right * self.scale))
+            y1 = min(self.height, self.offset_y + math.ceil(rect.bottom * self.scale))
+            if x1 <= x0 or y1 <= y0:
+                continue
+            part = pygame.transform.smoothscale(surface.subsurface(rect), (x1 - x0, y1 - y0))
+            self._surface.blit(part, (x0, y0))
+            bands.append((y0, y1))
+        return bands
+
+    def flush(self, bands: Iterable[Tuple[int, int]]) -> int:
+        """Copy changed rows within `bands` to the framebuffer; returns the number of rows written."""
+        rows = set()
+        for y0, y1 in bands:
+            rows.update(range(max(0, y0), min(self.height, y1)))
+        if not self._shadow_valid:
+            rows = range(self.height)
+        row_bytes = self.row_bytes
+        pitch = self._surface.get_pitch()
+        written = 0
+        shadow = self._shadow
+        view = self._surface.get_view("0")
+        try:
+            src = memoryview(view)
+            for y in sorted(rows):
+                start = y * pitch
+                row = src[start:start + row_bytes]
+                cached = y * row_bytes
+                # bytearray == buffer is a memcmp; memoryview == memoryview is not
+                if self._shadow_valid and shadow[cached:cached + row_bytes] == row:
+                    continue
+                shadow[cached:cached + row_bytes] = row
+                fb_start = y * self.stride
+                self._map[fb_start:fb_start + row_bytes] = row
+                written += 1
+            src.release()
+        finally:
+            del view
+        self._shadow_valid = True
+        self.rows_written += written
+        return written
+
+    def present(self, surface: pygame.Surface, rects: Optional[Iterable[pygame.Rect]] = None) -> int:
+        return self.flush(self.compose(surface, rects))
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
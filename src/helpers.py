@@ -6,7 +6,7 @@ Helper functions for formatting and visuals.
 import math
 from typing import Optional, Tuple
 
-from .constants import COLOR_POOR, COLOR_COMMON, COLOR_UNCOMMON, COLOR_RARE, COLOR_EPIC, COLOR_LEGENDARY
+from .constants import RARITY_TIERS
 
 def format_hashrate(th: float) -> str:
     return f"{th:.2f} TH/s"
@@ -40,22 +40,19 @@ def format_share_diff(diff: float) -> str:
     num_str = f"{scaled:.2f}" if unit else f"{int(scaled)}"
     return f"{num_str:>7} {unit}"
 
+def get_rarity_tier(diff: float) -> int:
+    """Index into RARITY_TIERS for a share difficulty."""
+    for tier, (_, upper, _) in enumerate(RARITY_TIERS):
+        if diff < upper:
+            return tier
+    return len(RARITY_TIERS) - 1
+
 def get_rarity_color_and_prefix(diff: float, net_diff: Optional[float] = None) -> Tuple[Tuple[int, int, int], str]:
+    tier = get_rarity_tier(diff)
+    color = RARITY_TIERS[tier][2]
     prefix = ""
-    if diff < 1_000_000:
-        color = COLOR_POOR
-    elif diff < 50_000_000:
-        color = COLOR_COMMON
-    elif diff < 1_000_000_000:
-        color = COLOR_UNCOMMON
-    elif diff < 500_000_000_000:
-        color = COLOR_RARE
-    elif diff < 1_000_000_000_000:
-        color = COLOR_EPIC
-    else:
-        color = COLOR_LEGENDARY
-        if net_diff is not None and diff > net_diff:
-            prefix = " ✦ "
+    if tier == len(RARITY_TIERS) - 1 and net_diff is not None and diff > net_diff:
+        prefix = " ✦ "
     return color, prefix
 
 def time_ago(seconds: float) -> str:
@@ -75,6 +72,19 @@ def time_ago(seconds: float) -> str:
     years = days // 365
     return f"{years} y ago"
 
+def seconds_until_time_ago_changes(seconds: float) -> float:
+    """Seconds until time_ago(seconds) would return a different label."""
+    seconds = max(0.0, seconds)
+    if seconds < 60:
+        step = 1
+    elif seconds < 3600:
+        step = 60
+    elif seconds < 86400:
+        step = 3600
+    else:
+        step = 86400
+    return step - (seconds % step)
+
 def format_diff_for_network(diff: Optional[float]) -> str:
     if diff is None: return "?"
     if diff <= 0: return "0"
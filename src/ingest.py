@@ -0,0 +1,102 @@
+# src/ingest.py
+"""
+Asyncio ingestion engine: all miner log websockets served from one event loop.
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Dict, Iterable, Optional
+
+from websockets.asyncio.client import connect
+from websockets.exceptions import ConnectionClosed
+
+from .constants import (
+    MINER_WS_TIMEOUT_SEC,
+    RECONNECT_DELAY_START,
+    RECONNECT_DELAY_MAX,
+    RECONNECT_BACKOFF,
+)
+from .data import state
+from .websockets import frame_queue
+
+logger = logging.getLogger(__name__)
+
+# Seconds between retries when a miner's frame queue is full under the "block" policy
+QUEUE_RETRY_DELAY = 0.05
+
+class IngestionEngine:
+    """Runs one listener task per miner on a single asyncio loop in a daemon thread."""
+
+    def __init__(self):
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._ready = threading.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def start(self, ips: Iterable[str]) -> None:
+        threading.Thread(target=self._run, args=(list(ips),), daemon=True, name="IngestLoop").start()
+        self._ready.wait()
+
+    def add(self, ip: str) -> None:
+        """Start listening to a miner (thread-safe)."""
+        self._loop.call_soon_threadsafe(self._add, ip)
+
+    def remove(self, ip: str) -> None:
+        """Stop listening to a miner (thread-safe)."""
+        self._loop.call_soon_threadsafe(self._remove, ip)
+
+    def _add(self, ip: str) -> None:
+        if ip not in self._tasks:
+            self._tasks[ip] = asyncio.create_task(self._listen(ip), name=f"WS-{ip}")
+
+    def _remove(self, ip: str) -> None:
+        task = self._tasks.pop(ip, None)
+        if task is not None:
+            task.cancel()
+            frame_queue.discard(ip)
+            logger.info("WS listener stopped → %s", ip)
+
+    def _run(self, ips: list) -> None:
+        asyncio.run(self._main(ips))
+
+    async def _main(self, ips: list) -> None:
+        self._loop = asyncio.get_running_loop()
+        frame_queue.start()
+        for ip in ips:
+            self._add(ip)
+        self._ready.set()
+        await asyncio.Event().wait()
+
+    async def _listen(self, ip: str) -> None:
+        ws_url = f"ws://{ip}/api/ws"
+        reconnect_delay = RECONNECT_DELAY_START
+        # Identifies this task's connection, so a cancelled task can't clear its replacement's flag
+        owner = object()
+        while True:
+            try:
+                async with connect(ws_url, open_timeout=MINER_WS_TIMEOUT_SEC, ping_interval=None,
+                                   max_size=None, compression=None) as ws:
+                    logger.info("WS connected → %s", ip)
+                    state.set_miner_connected(ip, True, owner=owner)
+                    while True:
+                        try:
+                            message = await asyncio.wait_for(ws.recv(), MINER_WS_TIMEOUT_SEC)
+                            # Logs are text frames; binary frames are skipped as in the threads engine
+                            if isinstance(message, bytes):
+                                continue
+                            # "block" policy: stop reading this miner until the worker catches up
+                            while not frame_queue.offer(ip, message):
+                                await asyncio.sleep(QUEUE_RETRY_DELAY)
+                        except ConnectionClosed:
+                            break
+                        except Exception as e:
+                            logger.warning("WS receive error (%s): %s", ip, e)
+                            break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("WS connection failed (%s): %s", ip, e)
+            finally:
+                state.set_miner_connected(ip, False, owner=owner)
+            await asyncio.sleep(reconnect_delay)
+            reconnect_delay = min(reconnect_delay * RECONNECT_BACKOFF, RECONNECT_DELAY_MAX)
@@ -0,0 +1,123 @@
+# src/ingest_queue.py
+"""
+Bounded per-miner frame queues between websocket receive and log parsing.
+
+Listeners only enqueue raw frames; one worker thread drains the miners in
+turn and hands each miner's pending frames to the handler as one batch, so
+a burst of verbose logs never delays ws.recv(). When a miner's queue is
+full the policy decides what gives:
+
+  drop_oldest  discard the oldest queued frame (default: freshest shares win)
+  drop_newest  discard the incoming frame
+  block        the listener waits for room, pushing back on the miner's socket
+
+Dropped frames are counted per miner (miner_frames_dropped_total).
+"""
+
+import logging
+import threading
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Set
+
+from .constants import INGEST_QUEUE_SIZE, INGEST_QUEUE_POLICY
+from .metrics import INGEST_DROPPED
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ("drop_oldest", "drop_newest", "block")
+
+class FrameQueue:
+    """Per-miner bounded FIFOs of received frames, drained by one worker thread."""
+
+    def __init__(self, handler: Callable[[List[str], str], None],
+                 capacity: int = INGEST_QUEUE_SIZE, policy: str = INGEST_QUEUE_POLICY):
+        if policy not in POLICIES:
+            logger.warning("Unknown ingest_queue_policy %r, using drop_oldest", policy)
+            policy = "drop_oldest"
+        self.handler = handler
+        self.capacity = max(1, capacity)
+        self.policy = policy
+        self._queues: Dict[str, Deque[str]] = {}
+        # Miners with pending frames, in arrival order; the set keeps each listed once
+        self._pending: Deque[str] = deque()
+        self._pending_set: Set[str] = set()
+        self._cond = threading.Condition()
+        self._started = False
+        self._drop_counters: Dict[str, object] = {}
+
+    def start(self) -> None:
+        """Start the worker thread (idempotent)."""
+        with self._cond:
+            if self._started:
+                return
+            self._started = True
+        threading.Thread(target=self._run, daemon=True, name="IngestWorker").start()
+
+    def offer(self, ip: str, message: str, stop: Optional[threading.Event] = None) -> bool:
+        """Queue a frame without waiting; False only when the queue is full under the "block" policy.
+
+        Frames from a listener whose `stop` is set are dropped; the check is made
+        under the queue lock, so nothing is queued after stop.set() + discard().
+        """
+        with self._cond:
+            if stop is not None and stop.is_set():
+                return True
+            queue = self._queues.get(ip)
+            if queue is None:
+                queue = self._queues[ip] = deque()
+            if len(queue) >= self.capacity:
+                if self.policy == "block":
+                    return False
+                self._count_drop(ip)
+                if self.policy == "drop_newest":
+                    return True
+                queue.popleft()
+            queue.append(message)
+            if ip not in self._pending_set:
+                self._pending_set.add(ip)
+                self._pending.append(ip)
+                self._cond.notify_all()
+        return True
+
+    def put(self, ip: str, message: str, stop: Optional[threading.Event] = None) -> None:
+        """Queue a frame, waiting for room under the "block" policy (gives up once `stop` is set)."""
+        while not self.offer(ip, message, stop):
+            with self._cond:
+                self._cond.wait_for(lambda: len(self._queues.get(ip, ())) < self.capacity, 0.5)
+            if stop is not None and stop.is_set():
+                return
+
+    def discard(self, ip: str) -> None:
+        """Drop a removed miner's pending frames."""
+        with self._cond:
+            self._queues.pop(ip, None)
+            if ip in self._pending_set:
+                self._pending_set.discard(ip)
+                self._pending.remove(ip)
+            self._cond.notify_all()
+
+    def _count_drop(self, ip: str) -> None:
+        # Caller holds _cond
+        counter = self._drop_counters.get(ip)
+        if counter is None:
+            counter = self._drop_counters[ip] = INGEST_DROPPED.labels(ip)
+            logger.warning("Ingest queue full for %s, dropping frames (%s)", ip, self.policy)
+        counter.inc()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending)
+                ip = self._pending.popleft()
+                self._pending_set.discard(ip)
+                queue = self._queues.get(ip)
+                if not queue:
+                    continue
+                batch = list(queue)
+                queue.clear()
+                # Wake listeners waiting for room
+                self._cond.notify_all()
+            try:
+                self.handler(batch, ip)
+            except Exception as e:
+                logger.error("Ingest handler error (%s): %s", ip, e)
@@ -0,0 +1,208 @@
+# src/journal.py
+"""
+Crash-safe share journal: a fixed-size, memory-mapped ring of share records.
+
+Layout:
+  header (256 bytes): magic, version, capacity, two session-best slots
+  records (capacity × RECORD.size): seq, timestamp, difficulty, miner ip, crc32
+
+Each record and best slot carries its own CRC, so a torn write after a power
+loss only costs that entry. Best slots are written alternately; the valid slot
+with the highest difficulty wins on load. A file whose size doesn't match its
+header is rewritten with the records that survived; one that can't be parsed
+at all is moved aside to `<path>.corrupt` and a new journal is started.
+Writers only enqueue; a single background thread touches the mapping and
+flushes it to disk every `flush_interval` seconds.
+"""
+
+import os
+import mmap
+import queue
+import struct
+import zlib
+import time
+import logging
+import threading
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"BTCSHRJ1"
+VERSION = 1
+HEADER_SIZE = 256
+HEADER = struct.Struct("<8sII")
+BEST_SLOT = struct.Struct("<dd40sI")
+BEST_SLOT_OFFSETS = (HEADER.size, HEADER.size + BEST_SLOT.size)
+RECORD = struct.Struct("<Qdd40sI")
+IP_FIELD_SIZE = 40
+
+assert BEST_SLOT_OFFSETS[-1] + BEST_SLOT.size <= HEADER_SIZE
+
+Share = Tuple[float, float, str]
+
+def _crc(payload: bytes) -> int:
+    return zlib.crc32(payload) & 0xFFFFFFFF
+
+def _encode_ip(ip: str) -> bytes:
+    return ip.encode("utf-8")[:IP_FIELD_SIZE]
+
+def _decode_ip(raw: bytes) -> str:
+    return raw.rstrip(b"\x00").decode("utf-8", errors="replace")
+
+class ShareJournal:
+    def __init__(self, path: str, capacity: int, flush_interval: float = 5.0):
+        self.path = path
+        self.capacity = max(1, capacity)
+        self.flush_interval = flush_interval
+        self._next_seq = 1
+        self._best_slot = 0
+        self._best: Optional[Share] = None
+        self._records: List[Share] = []
+        self._queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self._open()
+
+    # ----- setup / load -----
+    def _open(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        size = HEADER_SIZE + self.capacity * RECORD.size
+        records: List[Tuple[int, Share]] = []
+        best: Optional[Share] = None
+        if os.path.isfile(self.path):
+            try:
+                with open(self.path, "rb") as f:
+                    data = f.read()
+                records, best, capacity = self._read(data)
+                if capacity != self.capacity:
+                    logger.info("Share journal capacity changed (%d → %d), rewriting", capacity, self.capacity)
+                    records = records[-self.capacity:]
+                    self._rewrite(size, records, best)
+                elif len(data) != size:
+                    # Truncated (or padded) file: mapping it as is would fail or expose garbage
+                    logger.warning("Share journal is %d bytes, expected %d; rewriting %d records",
+                                   len(data), size, len(records))
+                    self._rewrite(size, records, best)
+            except (ValueError, struct.error) as e:
+                logger.warning("Share journal unreadable (%s), moving it to %s.corrupt", e, self.path)
+                os.replace(self.path, self.path + ".corrupt")
+                records, best = [], None
+                self._rewrite(size, [], None)
+        else:
+            self._rewrite(size, [], None)
+
+        self._file = open(self.path, "r+b")
+        self._map = mmap.mmap(self._file.fileno(), size)
+        self._records = [share for _, share in records]
+        self._best = best
+        if records:
+            self._next_seq = records[-1][0] + 1
+
+    def _read(self, data: bytes) -> Tuple[List[Tuple[int, Share]], Optional[Share], int]:
+        if len(data) < HEADER_SIZE:
+            raise ValueError("truncated header")
+        magic, version, capacity = HEADER.unpack_from(data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("bad magic or version")
+        best = None
+        for slot, offset in enumerate(BEST_SLOT_OFFSETS):
+            ts, diff, ip, crc = BEST_SLOT.unpack_from(data, offset)
+            if crc == _crc(data[offset:offset + BEST_SLOT.size - 4]) and diff > 0:
+                if best is None or diff > best[1]:
+                    best = (ts, diff, _decode_ip(ip))
+                    # Next best update goes to the other slot, keeping this one intact
+                    self._best_slot = slot
+        records = []
+        body = data[HEADER_SIZE:HEADER_SIZE + capacity * RECORD.size]
+        body = body[:len(body) - len(body) % RECORD.size]
+        for i, (seq, ts, diff, ip, crc) in enumerate(RECORD.iter_unpack(body)):
+            if seq == 0:
+                continue
+            offset = i * RECORD.size
+            if crc != _crc(body[offset:offset + RECORD.size - 4]):
+                continue
+            records.append((seq, (ts, diff, _decode_ip(ip))))
+        records.sort(key=lambda r: r[0])
+        return records, best, capacity
+
+    def _rewrite(self, size: int, records: List[Tuple[int, Share]], best: Optional[Share]) -> None:
+        buf = bytearray(size)
+        HEADER.pack_into(buf, 0, MAGIC, VERSION, self.capacity)
+        if best is not None:
+            self._pack_best(buf, BEST_SLOT_OFFSETS[0], best)
+            self._best_slot = 0
+        for seq, share in records:
+            self._pack_record(buf, seq, share)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(buf)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def _pack_record(self, buf, seq: int, share: Share) -> None:
+        offset = HEADER_SIZE + (seq % self.capacity) * RECORD.size
+        ts, diff, ip = share
+        RECORD.pack_into(buf, offset, seq, ts, diff, _encode_ip(ip), 0)
+        crc = _crc(bytes(buf[offset:offset + RECORD.size - 4]))
+        struct.pack_into("<I", buf, offset + RECORD.size - 4, crc)
+
+    def _pack_best(self, buf, offset: int, best: Share) -> None:
+        ts, diff, ip = best
+        BEST_SLOT.pack_into(buf, offset, ts, diff, _encode_ip(ip), 0)
+        crc = _crc(bytes(buf[offset:offset + BEST_SLOT.size - 4]))
+        struct.pack_into("<I", buf, offset + BEST_SLOT.size - 4, crc)
+
+    def load(self) -> Tuple[List[Share], Optional[Share]]:
+        """Shares recovered at open (oldest first) and the persisted session best."""
+        return list(self._records), self._best
+
+    # ----- writing -----
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._writer, daemon=True, name="ShareJournal")
+        self._thread.start()
+
+    def append(self, ts: float, diff: float, ip: str) -> None:
+        """Queue a share for persistence; never blocks on disk I/O."""
+        self._queue.put(("share", (ts, diff, ip)))
+
+    def set_best(self, ts: float, diff: float, ip: str) -> None:
+        self._queue.put(("best", (ts, diff, ip)))
+
+    def close(self) -> None:
+        """Write out everything queued so far, stop the writer and release the file (call once, on exit)."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(("stop", None))
+            self._thread.join(timeout=2.0)
+        if self._map is not None and not self._map.closed:
+            self._map.close()
+        if self._file is not None:
+            self._file.close()
+
+    def _writer(self) -> None:
+        dirty = False
+        last_flush = time.monotonic()
+        while True:
+            try:
+                kind, item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                kind, item = None, None
+            try:
+                if kind == "share":
+                    self._pack_record(self._map, self._next_seq, item)
+                    self._next_seq += 1
+                    dirty = True
+                elif kind == "best":
+                    self._best_slot ^= 1
+                    self._pack_best(self._map, BEST_SLOT_OFFSETS[self._best_slot], item)
+                    dirty = True
+                now = time.monotonic()
+                if dirty and (kind == "stop" or now - last_flush >= self.flush_interval):
+                    self._map.flush()
+                    dirty = False
+                    last_flush = now
+            except Exception as e:
+                logger.error("Share journal write failed: %s", e)
+            if kind == "stop":
+                return
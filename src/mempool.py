@@ -1,63 +1,236 @@
 # src/mempool.py
 """
 Polling for mempool data.
+
+Independent endpoints (fees, tip height, hashrate) are fetched concurrently.
+Block details are cached by height, so they are only fetched when the tip
+moves, and the network hashrate is refreshed on its own slower cadence.
+Each field keeps its last good value until it is older than MEMPOOL_STALE_AFTER,
+so a single failed request no longer blanks the whole network line.
+
+With MEMPOOL_PUSH enabled, mempool_websocket_thread subscribes to the
+mempool.space websocket and applies new blocks and fees as they arrive.
+While that feed is live the poller refreshes the network hashrate and only
+those of fees and tip height the feed has not sent for PUSH_LIVE_WINDOW
+(a quiet hour between blocks, or a feed that never sends fees).
 """
 
+import json
 import time
 import logging
+import threading
 import requests
+import websocket
+from requests.adapters import HTTPAdapter
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
 
-from .constants import MEMPOOL_UPDATE_EVERY
-from .data import state
+from .constants import (
+    MEMPOOL_UPDATE_EVERY,
+    MEMPOOL_SLOW_UPDATE_EVERY,
+    MEMPOOL_STALE_AFTER,
+    MEMPOOL_API_URL,
+    MEMPOOL_WS_URL,
+)
+from .data import state, MEMPOOL_FIELDS
+from .metrics import MEMPOOL_FETCH_SECONDS, MEMPOOL_FETCH_ERRORS
 
 logger = logging.getLogger(__name__)
 
+API_BASE = MEMPOOL_API_URL.rstrip("/")
+HEADERS = {"User-Agent": "rpi-bitcoin-mining-difficulty-meter-display/1.0"}
+BLOCK_CACHE_SIZE = 8
+# Push feed counts as live while messages arrive at least this often (stats come every few seconds)
+PUSH_LIVE_WINDOW = 60.0
+
+@dataclass
+class FieldValue:
+    value: Any = None
+    updated: float = 0.0
+
+# Last good value of every mempool_data field, with the time it was fetched
+mempool_fields: Dict[str, FieldValue] = {name: FieldValue() for name in MEMPOOL_FIELDS}
+# height -> (pool name, difficulty, block timestamp)
+_block_cache: "OrderedDict[int, Tuple[str, Optional[float], Optional[int]]]" = OrderedDict()
+# Own lock: the cache is filled by the poller and by the push thread (which holds _fields_lock)
+_block_cache_lock = threading.Lock()
+_fields_lock = threading.Lock()
+_published: Optional[Dict[str, Any]] = None
+_push_last_message = float("-inf")
+
+def push_is_live() -> bool:
+    return time.monotonic() - _push_last_message < PUSH_LIVE_WINDOW
+
+def fields_to_poll(now: float) -> Tuple[str, ...]:
+    """Which of fees and tip height to fetch over HTTP this round (all of them without a live push feed)."""
+    if not push_is_live():
+        return ("fees_sats_vb", "block_height")
+    return tuple(name for name in ("fees_sats_vb", "block_height")
+                 if now - mempool_fields[name].updated >= PUSH_LIVE_WINDOW)
+
+def fetch_fees(session: requests.Session) -> float:
+    r = session.get(f"{API_BASE}/v1/fees/precise", timeout=12, headers=HEADERS)
+    return float(r.json()["halfHourFee"])
+
+def fetch_tip_height(session: requests.Session) -> int:
+    r = session.get(f"{API_BASE}/blocks/tip/height", timeout=10, headers=HEADERS)
+    if not r.text.isdigit():
+        raise ValueError(f"unexpected tip height {r.text[:32]!r}")
+    return int(r.text)
+
+def fetch_hashrate_eh(session: requests.Session) -> float:
+    r = session.get(f"{API_BASE}/v1/mining/hashrate/3m", timeout=12, headers=HEADERS)
+    return r.json()["currentHashrate"] / 1e18
+
+def _timed_fetch(endpoint: str, fetch, *args):
+    start = time.perf_counter()
+    try:
+        return fetch(*args)
+    except Exception:
+        MEMPOOL_FETCH_ERRORS.labels(endpoint).inc()
+        raise
+    finally:
+        MEMPOOL_FETCH_SECONDS.labels(endpoint).observe(time.perf_counter() - start)
+
+def _cache_block(height: int, details: Tuple[str, Optional[float], Optional[int]]) -> None:
+    with _block_cache_lock:
+        _block_cache[height] = details
+        while len(_block_cache) > BLOCK_CACHE_SIZE:
+            _block_cache.popitem(last=False)
+
+def _cached_block(height: int) -> Optional[Tuple[str, Optional[float], Optional[int]]]:
+    with _block_cache_lock:
+        return _block_cache.get(height)
+
+def fetch_block_details(session: requests.Session, height: int) -> Tuple[str, Optional[float], Optional[int]]:
+    cached = _cached_block(height)
+    if cached is not None:
+        return cached
+    r = session.get(f"{API_BASE}/block-height/{height}", timeout=10, headers=HEADERS)
+    blk_hash = r.text.strip()
+    if not blk_hash:
+        raise ValueError(f"no block hash for height {height}")
+    r = session.get(f"{API_BASE}/v1/block/{blk_hash}", timeout=12, headers=HEADERS)
+    data = r.json()
+    details = (
+        data.get("extras", {}).get("pool", {}).get("name", "Unknown"),
+        data.get("difficulty"),
+        data.get("timestamp"),
+    )
+    _cache_block(height, details)
+    return details
+
+def _set_field(name: str, value: Any, now: float) -> None:
+    mempool_fields[name].value = value
+    mempool_fields[name].updated = now
+
+def _set_block(height: int, details: Tuple[str, Optional[float], Optional[int]], now: float) -> None:
+    pool_name, difficulty, block_ts = details
+    _set_field("block_height", height, now)
+    _set_field("mining_pool", pool_name, now)
+    _set_field("network_difficulty", difficulty, now)
+    _set_field("block_timestamp", block_ts, now)
+
+def _publish() -> None:
+    """Push current (non-stale) values to the shared state if anything changed."""
+    global _published
+    now = time.time()
+    with _fields_lock:
+        values = {
+            name: fv.value if now - fv.updated <= MEMPOOL_STALE_AFTER else None
+            for name, fv in mempool_fields.items()
+        }
+        if values != _published:
+            state.update_mempool(values)
+            _published = values
+
 def mempool_polling_thread() -> None:
-    headers = {"User-Agent": "rpi-bitcoin-mining-difficulty-meter-display/1.0"}
     session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_maxsize=3))
+    last_hashrate_fetch = float("-inf")
+    with ThreadPoolExecutor(max_workers=3, thread_name_prefix="Mempool") as executor:
+        while True:
+            now = time.time()
+            # Blocks and fees come from the push feed while it keeps them fresh
+            polled = fields_to_poll(now)
+            jobs = {}
+            if "fees_sats_vb" in polled:
+                jobs["fees_sats_vb"] = executor.submit(_timed_fetch, "fees", fetch_fees, session)
+            if "block_height" in polled:
+                jobs["block_height"] = executor.submit(_timed_fetch, "tip_height", fetch_tip_height, session)
+            if time.monotonic() - last_hashrate_fetch >= MEMPOOL_SLOW_UPDATE_EVERY:
+                jobs["network_hashrate_eh"] = executor.submit(_timed_fetch, "hashrate", fetch_hashrate_eh, session)
+            for name, future in jobs.items():
+                try:
+                    value = future.result()
+                    with _fields_lock:
+                        _set_field(name, value, now)
+                    if name == "network_hashrate_eh":
+                        last_hashrate_fetch = time.monotonic()
+                except Exception as e:
+                    logger.error("Mempool API error (%s): %s", name, e)
+
+            height = mempool_fields["block_height"].value
+            if height and "block_height" in polled:
+                try:
+                    details = _cached_block(height) or _timed_fetch("block", fetch_block_details, session, height)
+                    with _fields_lock:
+                        _set_block(height, details, now)
+                except Exception as e:
+                    logger.error("Mempool API error (block %s): %s", height, e)
+
+            _publish()
+            time.sleep(MEMPOOL_UPDATE_EVERY)
+
+def _block_details_from_push(block: Dict[str, Any]) -> Tuple[str, Optional[float], Optional[int]]:
+    return (
+        block.get("extras", {}).get("pool", {}).get("name", "Unknown"),
+        block.get("difficulty"),
+        block.get("timestamp"),
+    )
+
+def handle_mempool_push_message(message: str) -> None:
+    global _push_last_message
+    data = json.loads(message)
+    if not isinstance(data, dict):
+        return
+    _push_last_message = time.monotonic()
+    now = time.time()
+    # "blocks" is the recent-block list sent on subscribe, "block" a newly found block
+    blocks = list(data.get("blocks") or [])
+    if isinstance(data.get("block"), dict):
+        blocks.append(data["block"])
+    # Only the fields a message carries are refreshed; the poller covers those it stops sending
+    with _fields_lock:
+        if blocks:
+            tip = max(blocks, key=lambda b: b.get("height", -1))
+            height = tip.get("height")
+            current = mempool_fields["block_height"].value
+            if isinstance(height, int) and (current is None or height >= current):
+                details = _block_details_from_push(tip)
+                _cache_block(height, details)
+                _set_block(height, details, now)
+        fees = data.get("fees")
+        if isinstance(fees, dict) and fees.get("halfHourFee") is not None:
+            _set_field("fees_sats_vb", float(fees["halfHourFee"]), now)
+    _publish()
+
+def mempool_websocket_thread() -> None:
+    def on_message(ws, message):
+        try:
+            handle_mempool_push_message(message)
+        except Exception as e:
+            logger.warning("Mempool WS parse error: %s", e)
+
+    def on_open(ws):
+        ws.send(json.dumps({"action": "want", "data": ["blocks", "stats"]}))
+
     while True:
         try:
-            r = session.get("https://mempool.space/api/v1/fees/precise", timeout=12, headers=headers)
-            fees = float(r.json().get("halfHourFee", None))
-
-            r = session.get("https://mempool.space/api/blocks/tip/height", timeout=10, headers=headers)
-            height = int(r.text) if r.text.isdigit() else None
-
-            pool_name = "Unknown"
-            net_difficulty = None
-            block_ts = None
-            if height:
-                r = session.get(f"https://mempool.space/api/block-height/{height}", timeout=10, headers=headers)
-                blk_hash = r.text.strip()
-                if blk_hash:
-                    r = session.get(f"https://mempool.space/api/v1/block/{blk_hash}", timeout=12, headers=headers)
-                    data = r.json()
-                    pool_name = data.get("extras", {}).get("pool", {}).get("name", "Unknown")
-                    net_difficulty = data.get("difficulty")
-                    block_ts = data.get("timestamp")
-
-            r = session.get("https://mempool.space/api/v1/mining/hashrate/3m", timeout=12, headers=headers)
-            current_hr = r.json().get("currentHashrate")
-            hr_eh = (current_hr / 1e18) if current_hr is not None else None
-
-            with state.mempool_lock:
-                state.mempool_data.update({
-                    "fees_sats_vb": fees,
-                    "block_height": height,
-                    "mining_pool": pool_name,
-                    "network_hashrate_eh": hr_eh,
-                    "network_difficulty": net_difficulty,
-                    "block_timestamp": block_ts,
-                })
+            ws = websocket.WebSocketApp(MEMPOOL_WS_URL, on_message=on_message, on_open=on_open)
+            ws.run_forever(ping_interval=30, ping_timeout=10)
         except Exception as e:
-            logger.error("Mempool API error: %s", e)
-            with state.mempool_lock:
-                state.mempool_data.update({
-                    "fees_sats_vb": None,
-                    "block_height": None,
-                    "mining_pool": None,
-                    "network_hashrate_eh": None,
-                    "network_difficulty": None,
-                    "block_timestamp": None,
-                })
-        time.sleep(MEMPOOL_UPDATE_EVERY)
+            logger.error("Mempool WS error: %s", e)
+        time.sleep(5)
@@ -0,0 +1,199 @@
+# src/metrics.py
+"""
+Lightweight in-process metrics (counters and histograms) with a Prometheus
+text-format endpoint.
+
+Metrics are always collected and cheap enough to stay on for a Pi: counter
+children are plain attribute increments (every labelled counter here has a
+single writer thread per child: one listener per miner, one ingest worker,
+one in-flight poll per miner/endpoint, one render loop), histograms take a short uncontended
+lock. The HTTP endpoint is only started when METRICS_PORT is set.
+"""
+
+import bisect
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; fine-grained at the low end for per-frame parse and lock waits
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _label_str(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _fmt(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1) -> None:
+        # Lock-free: one writer per child (see module docstring)
+        self.value += amount
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[idx] += 1
+            self.sum += value
+            self.count += 1
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """Child for these label values; callers on hot paths can keep the result."""
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _items(self) -> List[Tuple[Tuple[str, ...], object]]:
+        with self._lock:
+            return list(self._children.items())
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1) -> None:
+        self.labels().inc(amount)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for values, child in self._items():
+            lines.append(f"{self.name}{_label_str(self.labelnames, values)} {_fmt(child.value)}")
+        return lines
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float) -> None:
+        self.labels().value = value
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help_text, labelnames)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for values, child in self._items():
+            with child._lock:
+                counts = list(child.counts)
+                total, count = child.sum, child.count
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = 'le="%s"' % ("+Inf" if bound == float("inf") else _fmt(bound))
+                lines.append(f"{self.name}_bucket{_label_str(self.labelnames, values, le)} {cumulative}")
+            labels = _label_str(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_fmt(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+REGISTRY: List[_Metric] = []
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+# ----- application metrics -----
+WS_FRAMES = Counter("miner_ws_frames_total", "Websocket messages received from miners", ["miner"])
+WS_LINES = Counter("miner_ws_lines_total", "Log lines received from miners", ["miner"])
+SHARES = Counter("miner_shares_total", "asic_result shares parsed", ["miner"])
+INGEST_DROPPED = Counter("miner_frames_dropped_total", "Miner websocket frames dropped because the ingest queue was full",
+                         ["miner"])
+PARSE_SECONDS = Histogram("miner_parse_seconds", "Time to parse a batch of messages containing share results")
+LOCK_WAIT_SECONDS = Histogram("state_lock_wait_seconds", "Time spent waiting for shared state locks", ["lock"])
+POLL_SECONDS = Histogram("miner_poll_seconds", "Miner /api/system/info request latency", ["miner"])
+POLL_FAILURES = Counter("miner_poll_failures_total", "Miner stats requests that failed", ["miner"])
+MEMPOOL_FETCH_SECONDS = Histogram("mempool_fetch_seconds", "Network data request duration", ["endpoint"])
+MEMPOOL_FETCH_ERRORS = Counter("mempool_fetch_errors_total", "Network data requests that failed", ["endpoint"])
+PRICE_MESSAGES = Counter("price_feed_messages_total",
+                         "Exchange websocket frames: rejected unparsed, received ticks, published after coalescing",
+                         ["source", "result"])
+RENDER_FRAMES = Counter("render_frames_total", "Render loop iterations by outcome (drawn or skipped)", ["result"])
+FRAME_SECONDS = Histogram("render_frame_seconds", "Time to draw and present a frame")
+BROADCAST_CLIENTS = Gauge("broadcast_clients", "Connected state broadcast clients")
+BROADCAST_MESSAGES = Counter("broadcast_messages_total",
+                             "State broadcast messages sent, and resyncs of clients whose queue filled up",
+                             ["result"])
+FIRST_FRAME_SECONDS = Gauge("app_first_frame_seconds", "Time from process start to the first presented frame")
+
+# ----- HTTP endpoint -----
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_metrics().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_metrics_server(host: str, port: int) -> ThreadingHTTPServer:
+    """Serve /metrics on host:port from a daemon thread."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True, name="Metrics").start()
+    logger.info("Metrics endpoint → http://%s:%d/metrics", host, port)
+    return server
@@ -1,43 +1,157 @@
 # src/miners.py
 """
 Polling for miner stats.
+
+Each miner gets its own API backend (src/backends.py: an AxeOS keep-alive
+HTTP session or a cgminer TCP client) and its own polling interval: offline
+miners back off exponentially, miners whose hashrate is moving are polled
+faster, and stable ones settle on MINER_POLL_INTERVAL.
+
+Every MINER_POLL_INTERVAL the reported hashrates are published next to the
+effective hashrate implied by each miner's submitted shares (src/stats.py),
+and a warning is logged when the two disagree.
 """
 
 import time
-import requests
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Tuple
+import logging
+from concurrent.futures import ThreadPoolExecutor, Future
+from dataclasses import dataclass, field
+from typing import Dict
 
-from .constants import MINER_IPS, MIN_ACTIVE_HASHRATE_TH
+from .constants import (
+    MINER_POLL_INTERVAL,
+    MINER_POLL_INTERVAL_FAST,
+    MINER_POLL_INTERVAL_MAX,
+)
+from .backends import MinerBackend, create_backend
 from .data import state
+from .metrics import POLL_SECONDS, POLL_FAILURES
+
+logger = logging.getLogger(__name__)
+
+HASHRATE_CHANGE_RATIO = 0.05
+LATENCY_EWMA_ALPHA = 0.2
+# Shares needed in the 1h window before its effective hashrate is compared (±1/√n noise)
+RATE_CHECK_MIN_SHARES = 30
+RATE_MISMATCH_RATIO = 0.5
 
-def fetch_miner_stats(ip: str) -> Tuple[float, float]:
-    try:
-        resp = requests.get(f"http://{ip}/api/system/info", timeout=4,
-                            headers={"User-Agent": "rpi-bitcoin-mining-difficulty-meter-display/1.0"})
-        data = resp.json()
-        hr_gh = data.get("hashRate", 0.0)
-        hr_th = hr_gh / 1000.0
-        diff = data.get("bestDiff", 0.0)
-        return (hr_th, diff) if hr_th > 0.05 else (0.0, diff)
-    except Exception:
-        return 0.0, 0.0
+@dataclass
+class MinerPollState:
+    ip: str
+    backend: MinerBackend = field(repr=False)
+    interval: float = MINER_POLL_INTERVAL
+    next_due: float = 0.0
+    online: bool = False
+    hashrate_th: float = 0.0
+    best_diff: float = 0.0
+    polls: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    last_latency: float = 0.0
+    avg_latency: float = 0.0
+    rate_mismatch: bool = False
+
+# Per-miner polling state and counters, keyed by IP (read by diagnostics)
+miner_poll_states: Dict[str, MinerPollState] = {}
+
+def _poll_miner(ps: MinerPollState) -> None:
+    start = time.monotonic()
+    result = ps.backend.poll()
+    ps.last_latency = time.monotonic() - start
+    ps.avg_latency = (ps.last_latency if ps.polls == 0 else
+                      ps.avg_latency + LATENCY_EWMA_ALPHA * (ps.last_latency - ps.avg_latency))
+    ps.polls += 1
+    POLL_SECONDS.labels(ps.ip).observe(ps.last_latency)
+    if result is None:
+        POLL_FAILURES.labels(ps.ip).inc()
+        ps.failures += 1
+        ps.consecutive_failures += 1
+        ps.online = False
+        ps.hashrate_th = 0.0
+        ps.best_diff = 0.0
+        ps.interval = min(MINER_POLL_INTERVAL * 2 ** ps.consecutive_failures, MINER_POLL_INTERVAL_MAX)
+    else:
+        hr, diff = result
+        changing = ps.online and abs(hr - ps.hashrate_th) > HASHRATE_CHANGE_RATIO * max(ps.hashrate_th, 0.001)
+        ps.consecutive_failures = 0
+        ps.online = True
+        ps.hashrate_th = hr
+        ps.best_diff = diff
+        ps.interval = MINER_POLL_INTERVAL_FAST if changing else MINER_POLL_INTERVAL
+    ps.next_due = time.monotonic() + ps.interval
+
+def _publish_miner_rates() -> None:
+    names = state.snapshot.settings.ip_to_name
+    summary = state.share_rates.summary(time.monotonic())
+    rates = {}
+    for ip, ps in miner_poll_states.items():
+        windows = summary.get(ip, [])
+        rates[ip] = (ps.hashrate_th, *(th for _, _, th in windows))
+        if not windows or ps.hashrate_th <= 0:
+            continue
+        count, _, effective_th = windows[-1]
+        if count < RATE_CHECK_MIN_SHARES:
+            continue
+        mismatch = abs(effective_th / ps.hashrate_th - 1.0) > RATE_MISMATCH_RATIO
+        if mismatch != ps.rate_mismatch:
+            ps.rate_mismatch = mismatch
+            name = names.get(ip, ip)
+            if mismatch:
+                logger.warning("%s reports %.2f TH/s but its shares imply %.2f TH/s over 1h",
+                               name, ps.hashrate_th, effective_th)
+            else:
+                logger.info("%s share rate agrees with reported hashrate again", name)
+    state.update_miner_rates(rates)
 
 def run_miners_polling() -> None:
+    in_flight: Dict[str, Future] = {}
+    published = None
+    last_rates_publish = float("-inf")
     with ThreadPoolExecutor(max_workers=16) as executor:
         while True:
-            futures = {executor.submit(fetch_miner_stats, ip): ip for ip in MINER_IPS}
+            now = time.monotonic()
+            settings = state.snapshot.settings
+            # Miners added, removed or switched to another API by a config reload
+            for ip in settings.miner_ips:
+                ps = miner_poll_states.get(ip)
+                kind = settings.miner_type(ip)
+                if ps is None:
+                    miner_poll_states[ip] = MinerPollState(ip, create_backend(ip, kind))
+                    state.share_rates.start(ip, now)
+                elif ps.backend.kind != kind and (ip not in in_flight or in_flight[ip].done()):
+                    ps.backend.close()
+                    ps.backend = create_backend(ip, kind)
+            for ip in [ip for ip in miner_poll_states if ip not in settings.miner_ips]:
+                backend = miner_poll_states.pop(ip).backend
+                future = in_flight.pop(ip, None)
+                if future is None:
+                    backend.close()
+                else:
+                    # Closed once a poll still in flight is done, so it can't reconnect the miner after
+                    # (runs at once if the poll already finished)
+                    future.add_done_callback(lambda _, backend=backend: backend.close())
+            # Also catches shares that arrived from a listener after its miner was removed
+            state.share_rates.retain(settings.miner_ips)
+            for ip, ps in miner_poll_states.items():
+                future = in_flight.get(ip)
+                if future is not None and not future.done():
+                    continue
+                if ps.next_due <= now:
+                    in_flight[ip] = executor.submit(_poll_miner, ps)
+
             total_hr = 0.0
             best_diff = 0.0
             active_count = 0
-            for future in as_completed(futures):
-                hr, diff = future.result()
-                total_hr += hr
-                best_diff = max(best_diff, diff)
-                if hr > MIN_ACTIVE_HASHRATE_TH:
+            for ps in miner_poll_states.values():
+                total_hr += ps.hashrate_th
+                best_diff = max(best_diff, ps.best_diff)
+                if ps.hashrate_th > settings.min_active_hashrate_th:
                     active_count += 1
-            with state.miners_lock:
-                state.miner_stats["total_hashrate_th"] = total_hr
-                state.miner_stats["best_difficulty"] = best_diff
-                state.miner_stats["active_count"] = active_count
-            time.sleep(10)
+            stats = (total_hr, best_diff, active_count)
+            if stats != published:
+                state.update_miner_stats(*stats)
+                published = stats
+            if now - last_rates_publish >= MINER_POLL_INTERVAL:
+                _publish_miner_rates()
+                last_rates_publish = now
+            time.sleep(1.0)
@@ -0,0 +1,211 @@
+# src/pricefeed.py
+"""
+BTC price feed: Binance websocket as primary, Kraken as hot standby.
+
+Websocket callbacks only reject uninteresting frames with substring checks
+and keep the latest raw tick per exchange; one worker decodes and publishes
+it at most once per render frame (1 / TARGET_FPS). Kraken is only connected
+until Binance's first tick and while Binance has been silent for
+DATA_TIMEOUT_SEC, and is closed again once Binance ticks resume.
+"""
+
+import json
+import time
+import logging
+import threading
+import requests
+import websocket
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .constants import TARGET_FPS, DATA_TIMEOUT_SEC
+from .metrics import PRICE_MESSAGES
+
+logger = logging.getLogger(__name__)
+
+BINANCE_WS_URL = "wss://stream.binance.com:9443/ws/btcusdt@miniTicker"
+KRAKEN_WS_URL = "wss://ws.kraken.com/"
+KRAKEN_SUBSCRIBE = json.dumps({"event": "subscribe", "pair": ["XBT/USD"], "subscription": {"name": "ticker"}})
+INITIAL_FETCH_HEADERS = {"User-Agent": "rpi-bitcoin-mining-difficulty-meter-display/1.0"}
+RECONNECT_DELAY = 5.0
+PUBLISH_INTERVAL = 1.0 / max(1, TARGET_FPS)
+# How often the worker re-checks Binance staleness when no ticks arrive
+STANDBY_CHECK_INTERVAL = 1.0
+
+def parse_binance_tick(message: str) -> Optional[Tuple[float, float]]:
+    """(price, 24h change %) from a Binance miniTicker frame."""
+    data = json.loads(message)
+    if data.get("s") != "BTCUSDT":
+        return None
+    price = float(data["c"])
+    open_24h = float(data["o"])
+    return price, ((price - open_24h) / open_24h * 100) if open_24h > 0 else 0.0
+
+def parse_kraken_tick(message: str) -> Optional[Tuple[float, float]]:
+    """(price, 24h change %) from a Kraken v1 ticker frame."""
+    msg = json.loads(message)
+    if not isinstance(msg, list) or len(msg) != 4 or msg[2] != "ticker" or msg[3] != "XBT/USD":
+        return None
+    ticker_data = msg[1]
+    price = float(ticker_data["c"][0])
+    open_24h = float(ticker_data["o"][1])
+    return price, ((price - open_24h) / open_24h * 100) if open_24h > 0 else 0.0
+
+# source -> (first character and substring of every tick frame, parser)
+PARSERS: Dict[str, Tuple[str, str, Callable[[str], Optional[Tuple[float, float]]]]] = {
+    # Binance pushes nothing but miniTicker events on this stream
+    "binance": ("{", '"24hrMiniTicker"', parse_binance_tick),
+    # Kraken heartbeats and status/subscription events are JSON objects, ticks are arrays
+    "kraken": ("[", '"ticker"', parse_kraken_tick),
+}
+
+class PriceFeed:
+    """Exchange websockets feeding AppState tickers through one coalescing worker."""
+
+    def __init__(self, state):
+        self.state = state
+        self._latest: Dict[str, str] = {}
+        self._latest_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        # Stale until the first Binance tick, so an unreachable Binance at boot falls back at once
+        self._primary_last_tick = float("-inf")
+        self._standby_ws: Optional[websocket.WebSocketApp] = None
+        self._standby_thread: Optional[threading.Thread] = None
+        self._standby_wanted = False
+        self._counters = {
+            source: tuple(PRICE_MESSAGES.labels(source, result) for result in ("rejected", "received", "published"))
+            for source in PARSERS
+        }
+
+    def start(self) -> None:
+        fetch_initial_prices(self.state)
+        threading.Thread(target=self._run_primary, daemon=True, name="BinanceWS").start()
+        threading.Thread(target=self._run_worker, daemon=True, name="PriceFeed").start()
+
+    # ----- websocket callbacks (hot path: no JSON decoding) -----
+    def _on_message(self, source: str, message: str) -> None:
+        rejected, received, _ = self._counters[source]
+        first, marker, _ = PARSERS[source]
+        if message[:1] != first or marker not in message:
+            rejected.inc()
+            return
+        received.inc()
+        if source == "binance":
+            self._primary_last_tick = time.monotonic()
+        with self._latest_lock:
+            self._latest[source] = message
+        self._wakeup.set()
+
+    def _run_socket(self, source: str, url: str, keep_running: Callable[[], bool],
+                    on_open: Optional[Callable] = None, ping_interval: int = 30) -> None:
+        while keep_running():
+            try:
+                ws = websocket.WebSocketApp(
+                    url,
+                    on_message=lambda ws, message: self._on_message(source, message),
+                    on_open=on_open,
+                )
+                if source == "kraken":
+                    self._standby_ws = ws
+                    if not keep_running():
+                        break
+                ws.run_forever(ping_interval=ping_interval, ping_timeout=10)
+            except Exception as e:
+                logger.error("%s WS error: %s", source.capitalize(), e)
+            if keep_running():
+                time.sleep(RECONNECT_DELAY)
+
+    def _run_primary(self) -> None:
+        self._run_socket("binance", BINANCE_WS_URL, lambda: True)
+
+    def _run_standby(self) -> None:
+        self._run_socket("kraken", KRAKEN_WS_URL, lambda: self._standby_wanted,
+                         on_open=lambda ws: ws.send(KRAKEN_SUBSCRIBE), ping_interval=25)
+        self._standby_ws = None
+        logger.info("Kraken standby disconnected")
+
+    # ----- worker -----
+    def _update_standby(self) -> None:
+        # Only called from the worker thread, so the check-and-spawn below can't race itself
+        stale = time.monotonic() - self._primary_last_tick > DATA_TIMEOUT_SEC
+        if stale:
+            if not self._standby_wanted:
+                if self._primary_last_tick == float("-inf"):
+                    logger.info("No Binance tick yet, connecting Kraken standby")
+                else:
+                    logger.warning("Binance silent for %ds, connecting Kraken standby", DATA_TIMEOUT_SEC)
+                self._standby_wanted = True
+            # A standby thread still winding down either keeps running (wanted again)
+            # or exits shortly; only then is a new one started
+            thread = self._standby_thread
+            if thread is None or not thread.is_alive():
+                self._standby_thread = threading.Thread(target=self._run_standby, daemon=True, name="KrakenWS")
+                self._standby_thread.start()
+        else:
+            if self._standby_wanted:
+                logger.info("Binance ticks resumed, closing Kraken standby")
+                self._standby_wanted = False
+            # Repeated until the standby thread has let go of its socket
+            ws = self._standby_ws
+            if ws is not None:
+                ws.close()
+
+    def _publish_latest(self) -> None:
+        with self._latest_lock:
+            latest, self._latest = self._latest, {}
+        for source, message in latest.items():
+            try:
+                tick = PARSERS[source][2](message)
+            except (ValueError, KeyError, IndexError, TypeError) as e:
+                logger.warning("%s parse error: %s", source.capitalize(), e)
+                continue
+            if tick is not None:
+                self.state.update_ticker(source, *tick)
+                self._counters[source][2].inc()
+
+    def _run_worker(self) -> None:
+        while True:
+            self._wakeup.wait(STANDBY_CHECK_INTERVAL)
+            self._wakeup.clear()
+            self._publish_latest()
+            self._update_standby()
+            # Ticks arriving meanwhile are coalesced into the next publish
+            time.sleep(PUBLISH_INTERVAL)
+
+# ----- initial REST prices -----
+def _set_initial_ticker(state, source: str, price: float, change_pct: float) -> None:
+    # The websocket may already have delivered a fresher tick
+    if getattr(state.snapshot, source).last_update is None:
+        state.update_ticker(source, price, change_pct)
+
+def _fetch_initial_binance(state) -> None:
+    try:
+        r = requests.get("https://api.binance.com/api/v3/ticker/24hr?symbol=BTCUSDT", timeout=5, headers=INITIAL_FETCH_HEADERS)
+        if r.status_code == 200:
+            data = r.json()
+            price = float(data["lastPrice"])
+            change_pct = float(data["priceChangePercent"])
+            _set_initial_ticker(state, "binance", price, change_pct)
+    except Exception as e:
+        logger.warning("Binance initial fetch failed: %s", e)
+
+def _fetch_initial_kraken(state) -> None:
+    try:
+        r = requests.get("https://api.kraken.com/0/public/Ticker?pair=XBTUSD", timeout=5, headers=INITIAL_FETCH_HEADERS)
+        if r.status_code == 200:
+            data = r.json()["result"]["XXBTZUSD"]
+            price = float(data["c"][0])
+            open_24h = float(data["o"])
+            change_pct = ((price - open_24h) / open_24h * 100) if open_24h > 0 else 0.0
+            _set_initial_ticker(state, "kraken", price, change_pct)
+    except Exception as e:
+        logger.warning("Kraken initial fetch failed: %s", e)
+
+def fetch_initial_prices(state) -> List[threading.Thread]:
+    """Fetch Binance and Kraken REST prices in parallel background threads (does not block)."""
+    threads = [
+        threading.Thread(target=_fetch_initial_binance, args=(state,), daemon=True, name="BinanceInit"),
+        threading.Thread(target=_fetch_initial_kraken, args=(state,), daemon=True, name="KrakenInit"),
+    ]
+    for thread in threads:
+        thread.start()
+    return threads
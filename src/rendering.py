@@ -3,10 +3,13 @@ Display rendering module
 """
 import os
 import sys
+import math
 import time
 import pygame
 import logging
-from typing import Optional
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Hashable, List, Mapping, Optional, Tuple
 from .constants import (
     SCREEN_WIDTH,
     SCREEN_HEIGHT,
@@ -19,11 +22,15 @@ from .constants import (
     INDICATOR_RED,
     COLOR_PRICE_UP,
     COLOR_PRICE_DOWN,
-    NUM_MINERS,
-    MIN_DIFF_THRESHOLD,
     MAX_LINES_ON_SCREEN,
-    IP_TO_NAME,
-    IS_DESKTOP_MODE,
+    TEXT_CACHE_SIZE,
+    EVENT_DRIVEN_RENDER,
+    RARITY_TIERS,
+    OUTPUT_BACKEND,
+    FB_DEVICE,
+    FB_SIZE,
+    FB_BPP,
+    STARTUP_T0,
 )
 from .helpers import (
     format_hashrate,
@@ -31,96 +38,370 @@ from .helpers import (
     format_compact_threshold,
     get_rarity_color_and_prefix,
     time_ago,
+    seconds_until_time_ago_changes,
     format_network_hashrate,
     format_diff_for_network,
     format_share_diff,
 )
 from .data import state, AppState
+from .stats import ShareStatsView
+from .framebuffer import FramebufferOutput
+from .metrics import RENDER_FRAMES, FRAME_SECONDS, FIRST_FRAME_SECONDS
 
 logger = logging.getLogger(__name__)
 
-# Display variables
+_FRAMES_DRAWN = RENDER_FRAMES.labels("drawn")
+_FRAMES_SKIPPED = RENDER_FRAMES.labels("skipped")
+
+# Display variables (set by init_display)
+display_mode: str = "headless"
 screen: Optional[pygame.Surface] = None
 logical_screen: Optional[pygame.Surface] = None
 scale: float = 1.0
 scaled_w: int = SCREEN_WIDTH
-scaled_h: int = LOGICAL_HEIGHT if IS_DESKTOP_MODE else SCREEN_HEIGHT
+scaled_h: int = LOGICAL_HEIGHT
 offset_x: int = 0
 offset_y: int = 0
+# Direct framebuffer target when output_backend is "framebuffer" (pi/headless modes)
+fb_output: Optional[FramebufferOutput] = None
 last_render_data_hash: Optional[int] = None
+needs_full_present: bool = True
+# Share statistics view in place of the share list (toggled by tapping the list)
+show_share_stats: bool = False
 
-MIN_WINDOW_W = 520
-MIN_WINDOW_H = 380
+# Dirty-region bookkeeping: last inputs drawn per region, and rects changed this frame
+region_keys: Dict[str, Tuple[Tuple[int, int, int, int], Hashable]] = {}
+dirty_rects: List[pygame.Rect] = []
 
-# ====================== INITIALISATION ======================
-if IS_DESKTOP_MODE:
-    os.environ['SDL_VIDEO_CENTERED'] = '1'
-
-    initial_scale = 1.5
-    initial_w = int(SCREEN_WIDTH * initial_scale)
-    initial_h = int(LOGICAL_HEIGHT * initial_scale)
-
-    screen = pygame.display.set_mode((initial_w, initial_h), pygame.RESIZABLE)
-    pygame.display.set_caption("Bitcoin Mining Difficulty Meter - Desktop Mode")
-    logical_screen = pygame.Surface((SCREEN_WIDTH, LOGICAL_HEIGHT))
-
-    scale = initial_scale
-    scaled_w = initial_w
-    scaled_h = initial_h
-    offset_x = 0
-    offset_y = 0
-    pygame.mouse.set_visible(True)
-    logger.info(f"Desktop scale: {MAX_LINES_ON_SCREEN} lines → {initial_w}×{initial_h}px (width max, ratio ok)")
-else:
-    info = pygame.display.Info()
-    pw, ph = info.current_w, info.current_h
-    screen = pygame.display.set_mode((pw, ph), pygame.FULLSCREEN)
-    logical_screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-    scale_x = pw / SCREEN_WIDTH
-    scale_y = ph / SCREEN_HEIGHT
-    scale = min(scale_x, scale_y)
-    scaled_w = int(SCREEN_WIDTH * scale)
-    scaled_h = int(SCREEN_HEIGHT * scale)
-    offset_x = (pw - scaled_w) // 2
-    offset_y = (ph - scaled_h) // 2
-    pygame.mouse.set_visible(False)
-    logger.info(f"RPi fullscreen – logical {SCREEN_WIDTH}×{SCREEN_HEIGHT} → physical {pw}×{ph}")
+HEADER_HEIGHT = 50
+NETWORK_HEIGHT = 34
+HASHRATE_HEIGHT = 36
+SESSION_BEST_BG = (21, 21, 21)
 
-clock = pygame.time.Clock()
+# Longest event-driven sleep; bounds latency of window events and ticker staleness changes
+IDLE_WAIT_MAX = 1.0
 
-# Fonts & logo
-FONT_TOP_TITLE = pygame.font.SysFont("dejavusans", 16)
-FONT_TITLE = pygame.font.SysFont("dejavusans", 15, bold=True)
-FONT_BTC_PRICE = pygame.font.SysFont("dejavusans", 21)
-FONT_HASHRATE = pygame.font.SysFont("dejavusansmedium", 31)
-FONT_NETWORK = pygame.font.SysFont("dejavusans", 16)
-FONT_DIFF = pygame.font.SysFont("dejavusansmono", 20, bold=True)
-FONT_SMALL = pygame.font.SysFont("dejavusans", 20)
+MIN_WINDOW_W = 520
+MIN_WINDOW_H = 380
 
-btc_logo: Optional[pygame.Surface] = None
-if os.path.isfile(BTC_LOGO_PATH):
+# ====================== INITIALISATION ======================
+def _load_logo() -> Optional[pygame.Surface]:
+    if not os.path.isfile(BTC_LOGO_PATH):
+        return None
     try:
         logo_raw = pygame.image.load(BTC_LOGO_PATH).convert_alpha()
         scale_factor = 28 / logo_raw.get_height()
         new_size = (int(logo_raw.get_width() * scale_factor), 28)
-        btc_logo = pygame.transform.smoothscale(logo_raw, new_size)
         logger.info("Bitcoin logo loaded")
+        return pygame.transform.smoothscale(logo_raw, new_size)
     except Exception as e:
         logger.error("BTC logo load failed: %s", e)
+        return None
 
-def main_render_loop(app_state: AppState) -> None:
-    global last_render_data_hash, scale, scaled_w, scaled_h, offset_x, offset_y
+def _fit_output(out_w: int, out_h: int, logical_h: int) -> None:
+    """Largest aspect-preserving scale of the logical surface into out_w×out_h, centered."""
+    global scale, scaled_w, scaled_h, offset_x, offset_y
+    scale = min(out_w / SCREEN_WIDTH, out_h / logical_h)
+    scaled_w = int(SCREEN_WIDTH * scale)
+    scaled_h = int(logical_h * scale)
+    offset_x = (out_w - scaled_w) // 2
+    offset_y = (out_h - scaled_h) // 2
+
+def init_display(mode: str, size: Optional[Tuple[int, int]] = None) -> None:
+    """Create the output surfaces for "pi" (fullscreen), "desktop" (window) or "headless" mode.
+
+    Headless renders offscreen and expects the SDL dummy video driver; `size`
+    sets its output resolution (default: the logical size, i.e. no scaling).
+    With output_backend "framebuffer", pi and headless modes write frames to
+    FB_DEVICE instead (SDL then only needs the dummy driver).
+    """
+    global display_mode, screen, logical_screen, scale, scaled_w, scaled_h, offset_x, offset_y
+    global needs_full_present, last_render_data_hash, IDLE_WAIT_MAX, fb_output
+    display_mode = mode
+    if fb_output is not None:
+        fb_output.close()
+        fb_output = None
+    if mode == "desktop":
+        os.environ['SDL_VIDEO_CENTERED'] = '1'
+
+        initial_scale = 1.5
+        initial_w = int(SCREEN_WIDTH * initial_scale)
+        initial_h = int(LOGICAL_HEIGHT * initial_scale)
+
+        screen = pygame.display.set_mode((initial_w, initial_h), pygame.RESIZABLE)
+        pygame.display.set_caption("Bitcoin Mining Difficulty Meter - Desktop Mode")
+        logical_screen = pygame.Surface((SCREEN_WIDTH, LOGICAL_HEIGHT))
+
+        scale = initial_scale
+        scaled_w = initial_w
+        scaled_h = initial_h
+        offset_x = 0
+        offset_y = 0
+        pygame.mouse.set_visible(True)
+        IDLE_WAIT_MAX = 0.25
+        logger.info(f"Desktop scale: {MAX_LINES_ON_SCREEN} lines → {initial_w}×{initial_h}px (width max, ratio ok)")
+    elif OUTPUT_BACKEND == "framebuffer":
+        logical_h = SCREEN_HEIGHT if mode == "pi" else LOGICAL_HEIGHT
+        # Dummy 1×1 display: only needed so images can be converted
+        screen = pygame.display.set_mode((1, 1))
+        logical_screen = pygame.Surface((SCREEN_WIDTH, logical_h))
+        fb_output = FramebufferOutput(FB_DEVICE, FB_SIZE, FB_BPP)
+        _fit_output(fb_output.width, fb_output.height, logical_h)
+        logger.info(f"Framebuffer – logical {SCREEN_WIDTH}×{logical_h} → {FB_DEVICE} {fb_output.width}×{fb_output.height}")
+    elif mode == "headless":
+        out_w, out_h = size or (SCREEN_WIDTH, LOGICAL_HEIGHT)
+        screen = pygame.display.set_mode((out_w, out_h))
+        logical_screen = pygame.Surface((SCREEN_WIDTH, LOGICAL_HEIGHT))
+        _fit_output(out_w, out_h, LOGICAL_HEIGHT)
+        logger.info(f"Headless – logical {SCREEN_WIDTH}×{LOGICAL_HEIGHT} → offscreen {out_w}×{out_h}")
+    else:
+        info = pygame.display.Info()
+        pw, ph = info.current_w, info.current_h
+        screen = pygame.display.set_mode((pw, ph), pygame.FULLSCREEN)
+        logical_screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        _fit_output(pw, ph, SCREEN_HEIGHT)
+        pygame.mouse.set_visible(False)
+        logger.info(f"RPi fullscreen – logical {SCREEN_WIDTH}×{SCREEN_HEIGHT} → physical {pw}×{ph}")
+
+    region_keys.clear()
+    last_render_data_hash = None
+    needs_full_present = True
+
+clock = pygame.time.Clock()
+
+# Fonts and logo, loaded on the first frame (SysFont's font lookup is slow on a cold Pi)
+FONT_TOP_TITLE: Optional[pygame.font.Font] = None
+FONT_TITLE: Optional[pygame.font.Font] = None
+FONT_BTC_PRICE: Optional[pygame.font.Font] = None
+FONT_HASHRATE: Optional[pygame.font.Font] = None
+FONT_NETWORK: Optional[pygame.font.Font] = None
+FONT_DIFF: Optional[pygame.font.Font] = None
+FONT_SMALL: Optional[pygame.font.Font] = None
+NETWORK_FONT_SIZES = range(9, 17)
+NETWORK_FONTS: Dict[int, pygame.font.Font] = {}
+
+btc_logo: Optional[pygame.Surface] = None
+_assets_loaded = False
+_first_frame_done = False
+
+def _load_assets() -> None:
+    global FONT_TOP_TITLE, FONT_TITLE, FONT_BTC_PRICE, FONT_HASHRATE, FONT_NETWORK, FONT_DIFF, FONT_SMALL
+    global time_col_width, btc_logo, _assets_loaded
+    FONT_TOP_TITLE = pygame.font.SysFont("dejavusans", 16)
+    FONT_TITLE = pygame.font.SysFont("dejavusans", 15, bold=True)
+    FONT_BTC_PRICE = pygame.font.SysFont("dejavusans", 21)
+    FONT_HASHRATE = pygame.font.SysFont("dejavusansmedium", 31)
+    FONT_NETWORK = pygame.font.SysFont("dejavusans", 16)
+    FONT_DIFF = pygame.font.SysFont("dejavusansmono", 20, bold=True)
+    FONT_SMALL = pygame.font.SysFont("dejavusans", 20)
+    NETWORK_FONTS.update({size: pygame.font.SysFont("dejavusans", size) for size in NETWORK_FONT_SIZES})
+    time_col_width = FONT_SMALL.size("000 days ago")[0]
+    btc_logo = _load_logo()
+    _assets_loaded = True
+
+def _log_first_frame() -> None:
+    global _first_frame_done
+    _first_frame_done = True
+    if STARTUP_T0 is not None:
+        elapsed = time.perf_counter() - STARTUP_T0
+        FIRST_FRAME_SECONDS.set(elapsed)
+        logger.info("First frame presented %.0f ms after start", elapsed * 1000)
+
+class TextSurfaceCache:
+    """Bounded LRU cache of rendered text surfaces keyed by (text, font, color)."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max(1, max_size)
+        self._surfaces: "OrderedDict[Tuple[str, pygame.font.Font, Tuple[int, int, int]], pygame.Surface]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def render(self, font: pygame.font.Font, text: str, color: Tuple[int, int, int]) -> pygame.Surface:
+        key = (text, font, color)
+        surf = self._surfaces.get(key)
+        if surf is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surf
+        self.misses += 1
+        surf = font.render(text, True, color)
+        self._surfaces[key] = surf
+        if len(self._surfaces) > self.max_size:
+            self._surfaces.popitem(last=False)
+            self.evictions += 1
+        return surf
+
+    def __len__(self) -> int:
+        return len(self._surfaces)
+
+text_cache = TextSurfaceCache(TEXT_CACHE_SIZE)
+
+# Widest possible "time ago" label, so the time column never overlaps the difficulty (set with the fonts)
+time_col_width = 0
+
+@lru_cache(maxsize=8)
+def network_string(fees: Optional[float], height: Optional[int], pool: Optional[str],
+                   hashrate_eh: Optional[float], difficulty: Optional[float]) -> str:
+    network_parts = [
+        f"{fees:.1f} sats/vB" if fees is not None else "?",
+        str(height) if height is not None else "?",
+        pool or "?",
+        format_network_hashrate(hashrate_eh),
+        format_diff_for_network(difficulty)
+    ]
+    return " | ".join(network_parts)
+
+@lru_cache(maxsize=32)
+def fit_network_font(text: str) -> pygame.font.Font:
+    """Largest preloaded network font whose rendering of text fits the line (binary search)."""
+    max_width = SCREEN_WIDTH - 40
+    lo, hi = 0, len(NETWORK_FONT_SIZES) - 1
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if NETWORK_FONTS[NETWORK_FONT_SIZES[mid]].size(text)[0] <= max_width:
+            lo = mid
+        else:
+            hi = mid - 1
+    return NETWORK_FONTS[NETWORK_FONT_SIZES[lo]]
+
+def _begin_region(name: str, rect: Tuple[int, int, int, int], key: Hashable,
+                  bg: Tuple[int, int, int] = (0, 0, 0)) -> bool:
+    """Prepare a screen region for redraw if its inputs changed; drawing is clipped to it."""
+    rect = tuple(rect)
+    if region_keys.get(name) == (rect, key):
+        return False
+    region_keys[name] = (rect, key)
+    logical_screen.set_clip(None)
+    logical_screen.fill(bg, rect)
+    logical_screen.set_clip(rect)
+    dirty_rects.append(pygame.Rect(rect))
+    return True
+
+def _present(timings: Optional[Dict[str, List[float]]] = None) -> None:
+    """Scale and push the dirty regions (or the full frame after init/resize) to the display."""
+    global needs_full_present
+    t0 = time.perf_counter()
+    if fb_output is not None:
+        bands = fb_output.compose(logical_screen, None if needs_full_present else dirty_rects)
+        t1 = time.perf_counter()
+        fb_output.flush(bands)
+        needs_full_present = False
+    elif needs_full_present:
+        scaled_surface = pygame.transform.smoothscale(logical_screen, (scaled_w, scaled_h))
+        screen.fill((0, 0, 0))
+        screen.blit(scaled_surface, (offset_x, offset_y))
+        t1 = time.perf_counter()
+        pygame.display.flip()
+        needs_full_present = False
+    else:
+        bounds = logical_screen.get_rect()
+        update_rects = []
+        for rect in dirty_rects:
+            rect = rect.clip(bounds)
+            if rect.width <= 0 or rect.height <= 0:
+                continue
+            x0 = offset_x + int(rect.x * scale)
+            y0 = offset_y + int(rect.y * scale)
+            x1 = offset_x + min(scaled_w, math.ceil(rect.right * scale))
+            y1 = offset_y + min(scaled_h, math.ceil(rect.bottom * scale))
+            if x1 <= x0 or y1 <= y0:
+                continue
+            if scale == 1.0:
+                screen.blit(logical_screen, (x0, y0), rect)
+            else:
+                part = pygame.transform.smoothscale(logical_screen.subsurface(rect), (x1 - x0, y1 - y0))
+                screen.blit(part, (x0, y0))
+            update_rects.append(pygame.Rect(x0, y0, x1 - x0, y1 - y0))
+        t1 = time.perf_counter()
+        if update_rects:
+            pygame.display.update(update_rects)
+    if timings is not None:
+        timings["scale"].append(t1 - t0)
+        timings["present"].append(time.perf_counter() - t1)
+
+def _wait_for_next_frame(app_state: AppState, seen_seq: int, now: float, label_times: List[float]) -> None:
+    """Sleep until state changes or a visible time_ago label ticks over, capped at TARGET_FPS."""
+    if EVENT_DRIVEN_RENDER:
+        timeout = min([IDLE_WAIT_MAX] + [seconds_until_time_ago_changes(now - ts) for ts in label_times])
+        app_state.wait_for_change(seen_seq, max(0.0, timeout - (time.time() - now)))
+    clock.tick(TARGET_FPS)
+
+def _draw_share_stats(view: ShareStatsView, names: Mapping[str, str], now: float,
+                      y_start: int, logical_w: int, logical_h: int) -> None:
+    """Compact view: best share of the last hour / 24 hours and accepted shares per rarity tier."""
+    best_hour = view.best_hour.best(now)
+    best_day = view.best_day.best(now)
+    best_names = tuple(names.get(best[2], best[2].rsplit(".", 1)[-1]) if best else None
+                       for best in (best_hour, best_day))
+    key = ("stats", best_hour, best_day, best_names, view.tier_counts)
+    if not _begin_region("list", (0, y_start, logical_w, logical_h - y_start), key):
+        return
+    line_height = 28
+    for i, (label, best, name) in enumerate((("BEST 1H", best_hour, best_names[0]),
+                                             ("BEST 24H", best_day, best_names[1]))):
+        y_pos = y_start + i * line_height
+        label_surf = text_cache.render(FONT_TITLE, label, (255, 255, 255))
+        logical_screen.blit(label_surf, (20, y_pos + (line_height - label_surf.get_height()) // 2))
+        if best is None:
+            diff_surf = text_cache.render(FONT_SMALL, "-", (140, 140, 140))
+            logical_screen.blit(diff_surf, (SCREEN_WIDTH - 20 - diff_surf.get_width(), y_pos))
+            continue
+        diff = best[1]
+        color, _ = get_rarity_color_and_prefix(diff)
+        name_surf = text_cache.render(FONT_SMALL, "→ " + name, color)
+        logical_screen.blit(name_surf, (110, y_pos + (line_height - name_surf.get_height()) // 2))
+        diff_surf = text_cache.render(FONT_DIFF, format_share_diff(diff), color)
+        logical_screen.blit(diff_surf, (SCREEN_WIDTH - 20 - diff_surf.get_width(),
+                                        y_pos + (line_height - diff_surf.get_height()) // 2))
+
+    tiers_y = y_start + 2 * line_height + 6
+    pygame.draw.line(logical_screen, (70, 70, 70), (20, tiers_y - 3), (SCREEN_WIDTH - 20, tiers_y - 3), 1)
+    row_h = min(24, (logical_h - tiers_y) // len(RARITY_TIERS))
+    bar_x = 120
+    bar_max_w = SCREEN_WIDTH - 20 - 80 - bar_x
+    # Log scale so a handful of rare shares still shows next to thousands of poor ones
+    max_count = max(view.tier_counts)
+    for tier, ((name, _, color), count) in enumerate(zip(RARITY_TIERS, view.tier_counts)):
+        y_pos = tiers_y + tier * row_h
+        name_surf = text_cache.render(FONT_TITLE, name.upper(), color)
+        logical_screen.blit(name_surf, (20, y_pos + (row_h - name_surf.get_height()) // 2))
+        if count:
+            bar_w = max(2, int(bar_max_w * math.log1p(count) / math.log1p(max_count)))
+            pygame.draw.rect(logical_screen, color, (bar_x, y_pos + 5, bar_w, row_h - 10))
+        count_surf = text_cache.render(FONT_TITLE, f"{count:,}", color)
+        logical_screen.blit(count_surf, (SCREEN_WIDTH - 20 - count_surf.get_width(),
+                                         y_pos + (row_h - count_surf.get_height()) // 2))
+
+RENDER_PHASES = ("snapshot", "hash", "draw", "scale", "present", "frame")
+
+def main_render_loop(app_state: AppState, max_frames: Optional[int] = None,
+                     timings: Optional[Dict[str, List[float]]] = None, paced: bool = True) -> None:
+    """Draw the dashboard until the window closes.
+
+    For benchmarks: stop after `max_frames` loop iterations, append per-phase
+    durations (RENDER_PHASES, seconds) of each drawn frame to `timings`, and
+    with paced=False skip the wait for new data and the TARGET_FPS cap.
+    """
+    global last_render_data_hash, needs_full_present, scale, scaled_w, scaled_h, offset_x, offset_y
+    global show_share_stats
 
     line_height = 28
     y_start = 120
+    frames = 0
 
-    while True:
+    if not _assets_loaded:
+        _load_assets()
+
+    while max_frames is None or frames < max_frames:
+        frames += 1
+        t_start = time.perf_counter()
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 pygame.quit()
                 sys.exit(0)
 
-            if IS_DESKTOP_MODE and event.type == pygame.VIDEORESIZE:
+            if display_mode == "desktop" and event.type == pygame.VIDEORESIZE:
                 win_w = max(MIN_WINDOW_W, event.w)
                 win_h = max(MIN_WINDOW_H, event.h)
 
@@ -138,168 +419,192 @@ def main_render_loop(app_state: AppState) -> None:
                 offset_y = 0
 
                 last_render_data_hash = None
+                needs_full_present = True
                 logger.debug(f"Desktop resize → {win_w}×{win_h} | scale={scale:.3f} | {MAX_LINES_ON_SCREEN} visible lines")
 
-        # === DATA SNAPSHOTS ===
+            # Touchscreens deliver taps as left clicks
+            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and scale > 0:
+                if (event.pos[1] - offset_y) / scale >= y_start:
+                    show_share_stats = not show_share_stats
+                    last_render_data_hash = None
+
+        # === DATA SNAPSHOT (one atomic reference, no locks) ===
+        snap = app_state.snapshot
         now = time.time()
-        with app_state.ticker_lock:
-            binance_fresh = app_state.binance.is_fresh(now)
-            kraken_fresh = app_state.kraken.is_fresh(now)
-            ticker = app_state.binance if binance_fresh else app_state.kraken if kraken_fresh else None
-            ticker_price = ticker.price if ticker else None
-            ticker_change = ticker.change_24h if ticker else 0.0
-            ticker_source = ticker.source if ticker else "none"
-        with app_state.connected_lock:
-            connected_count = len(app_state.connected_miners)
-        with app_state.mempool_lock:
-            mempool_snapshot = app_state.mempool_data.copy()
-            network_difficulty = mempool_snapshot.get("network_difficulty")
-        with app_state.miners_lock:
-            miner_stats_snapshot = app_state.miner_stats.copy()
-            total_hashrate = miner_stats_snapshot["total_hashrate_th"]
-            session_best_diff_global = miner_stats_snapshot["best_difficulty"]
-            active_miner_count = miner_stats_snapshot["active_count"]
-        with app_state.recent_lock:
-            recent_diffs_snapshot = list(app_state.recent_diffs)
-            session_best_ts = app_state.session_best_ts
-            session_best_diff = app_state.session_best_diff
-            session_best_ip = app_state.session_best_ip
-
-        # Network string & hash check
-        network_parts = [
-            f"{mempool_snapshot['fees_sats_vb']:.1f} sats/vB" if mempool_snapshot['fees_sats_vb'] is not None else "?",
-            str(mempool_snapshot['block_height']) if mempool_snapshot['block_height'] is not None else "?",
-            mempool_snapshot['mining_pool'] or "?",
-            format_network_hashrate(mempool_snapshot['network_hashrate_eh']),
-            format_diff_for_network(network_difficulty)
-        ]
-        network_str = " | ".join(network_parts)
-        miners_connected_str = f"MINERS: {connected_count}/{NUM_MINERS}"
-        recent_for_hash = recent_diffs_snapshot[-MAX_LINES_ON_SCREEN:]
-        time_sensitive_hash = sum(max(0, int(now - ts)) for ts, _, _ in recent_for_hash)
-        current_hash = hash((
-            network_str, miners_connected_str, connected_count, len(recent_diffs_snapshot),
-            recent_diffs_snapshot[-1][1] if recent_diffs_snapshot else 0.0,
-            ticker_price or 0.0, ticker_change, ticker_source,
-            total_hashrate, session_best_diff_global, active_miner_count, time_sensitive_hash,
-        ))
+        ticker = snap.binance if snap.binance.is_fresh(now) else snap.kraken if snap.kraken.is_fresh(now) else None
+        ticker_source = ticker.source if ticker else "none"
+        recent_shown = snap.recent
+        session_best_ts = snap.session_best_ts
+        session_best_diff = snap.session_best_diff
+        session_best_ip = snap.session_best_ip
+        t_snapshot = time.perf_counter()
+
+        # Redraw check: state version plus the inputs that change with wall-clock time only
+        if show_share_stats:
+            # Rolling bests expire by the minute
+            time_sensitive_hash = int(now // 60)
+            label_times = []
+        else:
+            time_sensitive_hash = sum(max(0, int(now - ts)) for ts, _, _ in recent_shown)
+            label_times = [ts for ts, _, _ in recent_shown]
+            if session_best_diff > 0:
+                time_sensitive_hash += max(0, int(now - session_best_ts))
+                label_times.append(session_best_ts)
+        current_hash = hash((snap.version, ticker_source, show_share_stats, time_sensitive_hash))
 
         if current_hash == last_render_data_hash:
-            clock.tick(TARGET_FPS)
+            _FRAMES_SKIPPED.inc()
+            if paced:
+                _wait_for_next_frame(app_state, snap.version, now, label_times)
             continue
         last_render_data_hash = current_hash
+        t_hash = time.perf_counter()
+
+        ticker_price = ticker.price if ticker else None
+        ticker_change = ticker.change_24h if ticker else 0.0
+        connected_count = snap.connected_count
+        mempool_snapshot = snap.mempool
+        network_difficulty = mempool_snapshot["network_difficulty"]
+        total_hashrate = snap.total_hashrate_th
+        session_best_diff_global = snap.best_difficulty
+        active_miner_count = snap.active_count
+        settings = snap.settings
+        ip_to_name = settings.ip_to_name
+        num_miners = len(settings.miner_ips)
+        min_diff_threshold = settings.min_diff_threshold
+        network_str = network_string(
+            mempool_snapshot['fees_sats_vb'], mempool_snapshot['block_height'], mempool_snapshot['mining_pool'],
+            mempool_snapshot['network_hashrate_eh'], network_difficulty,
+        )
+        miners_connected_str = f"MINERS: {connected_count}/{num_miners}"
+        dirty_rects.clear()
+        logical_w, logical_h = logical_screen.get_size()
+
+        # === DRAWING (per region, only where inputs changed) ===
+        miner_surf = text_cache.render(FONT_TOP_TITLE, miners_connected_str, (255, 255, 255))
+        miner_x = SCREEN_WIDTH - miner_surf.get_width() - 35
 
-        logical_screen.fill((0, 0, 0))
-
-        # === DRAWING ===
-        if btc_logo:
+        price_color = COLOR_PRICE_UP if ticker_change >= 0 else COLOR_PRICE_DOWN
+        if _begin_region("price", (0, 0, miner_x, HEADER_HEIGHT), (ticker_price, price_color)) and btc_logo:
             logo_x, logo_y = 20, 13
             logical_screen.blit(btc_logo, (logo_x, logo_y))
-            btc_text = FONT_BTC_PRICE.render("BTC:", True, (255, 255, 255))
+            btc_text = text_cache.render(FONT_BTC_PRICE, "BTC:", (255, 255, 255))
             btc_text_x = logo_x + btc_logo.get_width() + 8
             btc_text_y = logo_y + (btc_logo.get_height() - btc_text.get_height()) // 2
             logical_screen.blit(btc_text, (btc_text_x, btc_text_y))
             if ticker_price is not None:
                 price_str = f"${ticker_price:,.2f}"
-                price_color = COLOR_PRICE_UP if ticker_change >= 0 else COLOR_PRICE_DOWN
-                price_surf = FONT_BTC_PRICE.render(price_str, True, price_color)
+                price_surf = text_cache.render(FONT_BTC_PRICE, price_str, price_color)
                 price_x = btc_text_x + btc_text.get_width() + 5
                 price_y = logo_y + (btc_logo.get_height() - price_surf.get_height()) // 2
                 logical_screen.blit(price_surf, (price_x, price_y))
 
-        miner_status_y = 19
-        miner_surf = FONT_TOP_TITLE.render(miners_connected_str, True, (255, 255, 255))
-        miner_x = SCREEN_WIDTH - miner_surf.get_width() - 35
-        logical_screen.blit(miner_surf, (miner_x, miner_status_y))
-        conn_color = (INDICATOR_GREEN if connected_count == NUM_MINERS else
+        conn_color = (INDICATOR_GREEN if connected_count == num_miners else
                       INDICATOR_ORANGE if connected_count > 0 else INDICATOR_RED)
-        circle_x = miner_x + miner_surf.get_width() + 10
-        circle_y = miner_status_y + miner_surf.get_height() // 2
-        pygame.draw.circle(logical_screen, conn_color, (circle_x, circle_y), 4)
-
-        max_net_width = SCREEN_WIDTH - 40
-        font_size = 16
-        net_font = pygame.font.SysFont("dejavusans", font_size)
-        net_surf = net_font.render(network_str, True, (180, 180, 180))
-        while net_surf.get_width() > max_net_width and font_size > 9:
-            font_size -= 1
-            net_font = pygame.font.SysFont("dejavusans", font_size)
-            net_surf = net_font.render(network_str, True, (180, 180, 180))
-        net_y = 57
-        net_x = 20 + (max_net_width - net_surf.get_width()) // 2
-        logical_screen.blit(net_surf, (net_x, net_y))
-
-        threshold_color, _ = get_rarity_color_and_prefix(MIN_DIFF_THRESHOLD, network_difficulty)
-        title_fixed = FONT_TITLE.render("LAST SHARES > ", True, (255, 255, 255))
-        threshold_text = FONT_TITLE.render(format_compact_threshold(MIN_DIFF_THRESHOLD), True, threshold_color)
-        title_y = 90
-        logical_screen.blit(title_fixed, (20, title_y))
-        logical_screen.blit(threshold_text, (20 + title_fixed.get_width(), title_y))
-
+        if _begin_region("status", (miner_x, 0, SCREEN_WIDTH - miner_x, HEADER_HEIGHT),
+                         (miners_connected_str, conn_color)):
+            miner_status_y = 19
+            logical_screen.blit(miner_surf, (miner_x, miner_status_y))
+            circle_x = miner_x + miner_surf.get_width() + 10
+            circle_y = miner_status_y + miner_surf.get_height() // 2
+            pygame.draw.circle(logical_screen, conn_color, (circle_x, circle_y), 4)
+
+        if _begin_region("network", (0, HEADER_HEIGHT, SCREEN_WIDTH, NETWORK_HEIGHT), network_str):
+            max_net_width = SCREEN_WIDTH - 40
+            net_surf = text_cache.render(fit_network_font(network_str), network_str, (180, 180, 180))
+            net_y = 57
+            net_x = 20 + (max_net_width - net_surf.get_width()) // 2
+            logical_screen.blit(net_surf, (net_x, net_y))
+
+        threshold_color, _ = get_rarity_color_and_prefix(min_diff_threshold, network_difficulty)
         hr_str = format_hashrate(total_hashrate)
         best_diff_str = format_difficulty(session_best_diff_global)
         combined_str = f"{hr_str} - {best_diff_str}"
-        all_connected = connected_count == NUM_MINERS
-        all_active = active_miner_count == NUM_MINERS
+        all_connected = connected_count == num_miners
+        all_active = active_miner_count == num_miners
         has_activity = connected_count > 0 and active_miner_count > 0
         hr_color = (COLOR_HASHRATE_UP if all_connected and all_active else
                     INDICATOR_ORANGE if has_activity else INDICATOR_RED)
-        combined_surf = FONT_HASHRATE.render(combined_str, True, hr_color)
-        logical_screen.blit(combined_surf, (SCREEN_WIDTH - combined_surf.get_width() - 20, 87))
-
-        pygame.draw.line(logical_screen, (70, 70, 70), (20, 112), (SCREEN_WIDTH - 20, 112), 1)
-
-        shown_shares = list(reversed(recent_diffs_snapshot))[:MAX_LINES_ON_SCREEN]
-        has_session_best = session_best_diff > 0
-        name_texts = []
-        if has_session_best:
-            name_texts.append("SESSION BEST:")
-        for _, _, ip in shown_shares:
-            miner_name = IP_TO_NAME.get(ip, ip.rsplit(".", 1)[-1] if ip else "Unknown")
-            name_texts.append("→ " + miner_name)
-        max_name_width = max(
-            FONT_SMALL.render(text, True, (255, 255, 255)).get_width() for text in name_texts
-        ) if name_texts else 0
-        gap = 2 if has_session_best else 0
-        list_start_y = y_start + (line_height + gap if has_session_best else 0)
-        name_x = 20
-        diff_x = name_x + max_name_width + 20
-        time_x_end = SCREEN_WIDTH - 20
-
-        if shown_shares or has_session_best:
+        hashrate_rect = pygame.Rect(0, HEADER_HEIGHT + NETWORK_HEIGHT, SCREEN_WIDTH, HASHRATE_HEIGHT)
+        if _begin_region("hashrate", hashrate_rect, (min_diff_threshold, threshold_color, combined_str, hr_color)):
+            title_fixed = text_cache.render(FONT_TITLE, "LAST SHARES > ", (255, 255, 255))
+            threshold_text = text_cache.render(FONT_TITLE, format_compact_threshold(min_diff_threshold), threshold_color)
+            title_y = 90
+            logical_screen.blit(title_fixed, (20, title_y))
+            logical_screen.blit(threshold_text, (20 + title_fixed.get_width(), title_y))
+            combined_surf = text_cache.render(FONT_HASHRATE, combined_str, hr_color)
+            # Raised when the font's line height would overhang the region (and the share list below it),
+            # where the clip would cut the glyphs and the list redraw would not repaint them
+            combined_y = min(87, hashrate_rect.bottom - combined_surf.get_height())
+            logical_screen.blit(combined_surf, (SCREEN_WIDTH - combined_surf.get_width() - 20, combined_y))
+            pygame.draw.line(logical_screen, (70, 70, 70), (20, 112), (SCREEN_WIDTH - 20, 112), 1)
+
+        if show_share_stats:
+            _draw_share_stats(app_state.share_stats_view(), ip_to_name, now, y_start, logical_w, logical_h)
+        else:
+            shown_shares = recent_shown
+            has_session_best = session_best_diff > 0
+            name_texts = []
             if has_session_best:
-                y_pos = y_start
-                pygame.draw.rect(logical_screen, (21, 21, 21), (20, y_pos, SCREEN_WIDTH - 40, line_height))
-                color, prefix = get_rarity_color_and_prefix(session_best_diff, network_difficulty)
-                best_miner = IP_TO_NAME.get(session_best_ip, session_best_ip.rsplit(".", 1)[-1] if session_best_ip else "Unknown")
-                name_surf = FONT_SMALL.render(f"➊ {best_miner} ", True, color)
-                logical_screen.blit(name_surf, (name_x, y_pos + (line_height - name_surf.get_height()) // 2))
-                diff_text = prefix + format_share_diff(session_best_diff)
-                diff_surf = FONT_DIFF.render(diff_text, True, color)
-                logical_screen.blit(diff_surf, (diff_x, y_pos + (line_height - diff_surf.get_height()) // 2))
-                ago_text = time_ago(now - session_best_ts)
-                ago_surf = FONT_SMALL.render(ago_text, True, color)
-                logical_screen.blit(ago_surf, (time_x_end - ago_surf.get_width(), y_pos + (line_height - ago_surf.get_height()) // 2))
-
+                name_texts.append("SESSION BEST:")
+            for _, _, ip in shown_shares:
+                miner_name = ip_to_name.get(ip, ip.rsplit(".", 1)[-1] if ip else "Unknown")
+                name_texts.append("→ " + miner_name)
+            max_name_width = max(
+                text_cache.render(FONT_SMALL, text, (255, 255, 255)).get_width() for text in name_texts
+            ) if name_texts else 0
+            gap = 2 if has_session_best else 0
+            list_start_y = y_start + (line_height + gap if has_session_best else 0)
+            name_x = 20
+            diff_x = name_x + max_name_width + 20
+            time_x_end = SCREEN_WIDTH - 20
+            time_col_x = time_x_end - time_col_width
+
+            # A layout change (row count, name column width) clears the whole list area
+            list_layout = (has_session_best, len(shown_shares), diff_x)
+            if _begin_region("list", (0, y_start, logical_w, logical_h - y_start), list_layout):
+                for name in [n for n in region_keys if n.startswith("row")]:
+                    del region_keys[name]
+                if not shown_shares and not has_session_best:
+                    waiting_surf = text_cache.render(FONT_SMALL, "Waiting for first shares...", (140, 140, 140))
+                    logical_screen.blit(waiting_surf, ((SCREEN_WIDTH - waiting_surf.get_width()) // 2, 185))
+
+            rows = []
+            if has_session_best:
+                best_miner = ip_to_name.get(session_best_ip, session_best_ip.rsplit(".", 1)[-1] if session_best_ip else "Unknown")
+                rows.append((y_start, f"➊ {best_miner} ", session_best_diff, session_best_ts, SESSION_BEST_BG))
             for i, (ts, diff, ip) in enumerate(shown_shares):
-                y_pos = list_start_y + i * line_height
+                miner_name = ip_to_name.get(ip, ip.rsplit(".", 1)[-1])
+                rows.append((list_start_y + i * line_height, "→ " + miner_name, diff, ts, (0, 0, 0)))
+
+            for i, (y_pos, name_text, diff, ts, bg) in enumerate(rows):
                 color, prefix = get_rarity_color_and_prefix(diff, network_difficulty)
-                miner_name = IP_TO_NAME.get(ip, ip.rsplit(".", 1)[-1])
-                name_surf = FONT_SMALL.render("→ " + miner_name, True, color)
-                logical_screen.blit(name_surf, (name_x, y_pos + (line_height - name_surf.get_height()) // 2))
                 diff_text = prefix + format_share_diff(diff)
-                diff_surf = FONT_DIFF.render(diff_text, True, color)
-                logical_screen.blit(diff_surf, (diff_x, y_pos + (line_height - diff_surf.get_height()) // 2))
+                if _begin_region(f"row{i}", (name_x, y_pos, time_col_x - name_x, line_height),
+                                 (name_text, diff_text, color), bg):
+                    name_surf = text_cache.render(FONT_SMALL, name_text, color)
+                    logical_screen.blit(name_surf, (name_x, y_pos + (line_height - name_surf.get_height()) // 2))
+                    diff_surf = text_cache.render(FONT_DIFF, diff_text, color)
+                    logical_screen.blit(diff_surf, (diff_x, y_pos + (line_height - diff_surf.get_height()) // 2))
                 ago_text = time_ago(now - ts)
-                ago_surf = FONT_SMALL.render(ago_text, True, color)
-                logical_screen.blit(ago_surf, (time_x_end - ago_surf.get_width(), y_pos + (line_height - ago_surf.get_height()) // 2))
-        else:
-            waiting_surf = FONT_SMALL.render("Waiting for first shares...", True, (140, 140, 140))
-            logical_screen.blit(waiting_surf, ((SCREEN_WIDTH - waiting_surf.get_width()) // 2, 185))
+                if _begin_region(f"row{i}.time", (time_col_x, y_pos, time_x_end - time_col_x, line_height),
+                                 (ago_text, color), bg):
+                    ago_surf = text_cache.render(FONT_SMALL, ago_text, color)
+                    logical_screen.blit(ago_surf, (time_x_end - ago_surf.get_width(), y_pos + (line_height - ago_surf.get_height()) // 2))
+        logical_screen.set_clip(None)
 
         # Final blit
-        scaled_surface = pygame.transform.smoothscale(logical_screen, (scaled_w, scaled_h))
-        screen.fill((0, 0, 0))
-        screen.blit(scaled_surface, (offset_x, offset_y))
-        pygame.display.flip()
-        clock.tick(TARGET_FPS)
+        t_draw = time.perf_counter()
+        _present(timings)
+        frame_time = time.perf_counter() - t_start
+        if not _first_frame_done:
+            _log_first_frame()
+        _FRAMES_DRAWN.inc()
+        FRAME_SECONDS.observe(frame_time)
+        if timings is not None:
+            timings["snapshot"].append(t_snapshot - t_start)
+            timings["hash"].append(t_hash - t_snapshot)
+            timings["draw"].append(t_draw - t_hash)
+            timings["frame"].append(frame_time)
+        if paced:
+            _wait_for_next_frame(app_state, snap.version, now, label_times)
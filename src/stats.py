@@ -0,0 +1,253 @@
+# src/stats.py
+"""
+Streaming share statistics with constant memory per miner.
+"""
+
+import math
+import threading
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .constants import RARITY_TIERS
+from .helpers import get_rarity_tier
+
+# Expected hashes per share of difficulty 1
+HASHES_PER_DIFF1 = 2 ** 32
+
+# (label, window seconds); each window is split into WINDOW_BUCKETS time buckets
+SHARE_RATE_WINDOWS: Tuple[Tuple[str, float], ...] = (("1m", 60.0), ("15m", 900.0), ("1h", 3600.0))
+WINDOW_BUCKETS = 60
+
+# Share difficulty histogram: HISTOGRAM_BINS_PER_DECADE log10 bins from 1 up to 10^HISTOGRAM_DECADES
+HISTOGRAM_BINS_PER_DECADE = 4
+HISTOGRAM_DECADES = 18
+HISTOGRAM_BINS = HISTOGRAM_BINS_PER_DECADE * HISTOGRAM_DECADES
+
+Share = Tuple[float, float, str]
+
+class WindowedCounter:
+    """Sliding-window share count and difficulty sum, O(1) amortized per update.
+
+    The window is a ring of time buckets; running totals are kept and expired
+    buckets are subtracted as time advances, so reads never scan history.
+    """
+
+    def __init__(self, window: float, buckets: int = WINDOW_BUCKETS):
+        self.window = window
+        self.buckets = buckets
+        self.bucket_width = window / buckets
+        self._counts = [0] * buckets
+        self._sums = [0.0] * buckets
+        self._epoch = None
+        self.count = 0
+        self.total = 0.0
+
+    def _advance(self, now: float) -> int:
+        epoch = int(now // self.bucket_width)
+        if self._epoch is None:
+            self._epoch = epoch
+        steps = epoch - self._epoch
+        if steps > 0:
+            if steps >= self.buckets:
+                self._counts = [0] * self.buckets
+                self._sums = [0.0] * self.buckets
+                self.count = 0
+                self.total = 0.0
+            else:
+                for i in range(1, steps + 1):
+                    idx = (self._epoch + i) % self.buckets
+                    self.count -= self._counts[idx]
+                    self.total -= self._sums[idx]
+                    self._counts[idx] = 0
+                    self._sums[idx] = 0.0
+            self._epoch = epoch
+        return epoch
+
+    def add(self, now: float, diff: float, count: int = 1) -> None:
+        """Record `count` shares whose difficulties sum to `diff`."""
+        epoch = int(now // self.bucket_width)
+        if epoch != self._epoch:
+            self._advance(now)
+        idx = epoch % self.buckets
+        self._counts[idx] += count
+        self._sums[idx] += diff
+        self.count += count
+        self.total += diff
+
+    def totals(self, now: float) -> Tuple[int, float]:
+        self._advance(now)
+        return self.count, max(0.0, self.total)
+
+class ShareRateTracker:
+    """Share count, summed difficulty and effective hashrate over each SHARE_RATE_WINDOWS window."""
+
+    def __init__(self, started: float):
+        self.started = started
+        self.windows = [WindowedCounter(seconds) for _, seconds in SHARE_RATE_WINDOWS]
+
+    def add(self, now: float, diff: float, count: int = 1) -> None:
+        for counter in self.windows:
+            counter.add(now, diff, count)
+
+    def summary(self, now: float) -> List[Tuple[int, float, float]]:
+        """[(count, summed difficulty, effective hashrate TH/s)] per window."""
+        out = []
+        for counter in self.windows:
+            count, total = counter.totals(now)
+            # Until a full window has been observed, divide by the time actually observed
+            span = min(counter.window, max(now - self.started, counter.bucket_width))
+            out.append((count, total, total * HASHES_PER_DIFF1 / span / 1e12))
+        return out
+
+class ShareRates:
+    """Thread-safe per-miner ShareRateTracker registry.
+
+    Each miner's windows start when it is first watched, so a miner added by
+    a config reload isn't averaged over time it wasn't running.
+    """
+
+    def __init__(self):
+        self._trackers: Dict[str, ShareRateTracker] = {}
+        self._lock = threading.Lock()
+
+    def start(self, ip: str, now: float) -> None:
+        """Start a miner's windows at `now` (no-op if it is already tracked)."""
+        with self._lock:
+            if ip not in self._trackers:
+                self._trackers[ip] = ShareRateTracker(now)
+
+    def retain(self, ips: Sequence[str]) -> None:
+        """Drop the trackers of miners not in `ips`."""
+        with self._lock:
+            for ip in [ip for ip in self._trackers if ip not in ips]:
+                del self._trackers[ip]
+
+    def add(self, ip: str, now: float, diff: float, count: int = 1) -> None:
+        with self._lock:
+            tracker = self._trackers.get(ip)
+            if tracker is None:
+                tracker = self._trackers[ip] = ShareRateTracker(now)
+            tracker.add(now, diff, count)
+
+    def effective_hashrates(self, now: float) -> Dict[str, Tuple[float, ...]]:
+        """Effective hashrate (TH/s) per miner for each window, e.g. {ip: (1m, 15m, 1h)}."""
+        with self._lock:
+            return {
+                ip: tuple(th for _, _, th in tracker.summary(now))
+                for ip, tracker in self._trackers.items()
+            }
+
+    def summary(self, now: float) -> Dict[str, List[Tuple[int, float, float]]]:
+        with self._lock:
+            return {ip: tracker.summary(now) for ip, tracker in self._trackers.items()}
+
+class LogHistogram:
+    """Fixed-size histogram of difficulties on a log10 scale; the last bin also takes overflow."""
+
+    def __init__(self):
+        self.counts = array('Q', [0]) * HISTOGRAM_BINS
+        self.total = 0
+
+    @staticmethod
+    def bin_index(diff: float) -> int:
+        if diff < 1.0:
+            return 0
+        return min(int(math.log10(diff) * HISTOGRAM_BINS_PER_DECADE), HISTOGRAM_BINS - 1)
+
+    @staticmethod
+    def bin_floor(index: int) -> float:
+        return 10.0 ** (index / HISTOGRAM_BINS_PER_DECADE)
+
+    def add(self, diff: float) -> None:
+        self.counts[self.bin_index(diff)] += 1
+        self.total += 1
+
+class RollingBest:
+    """Best share in each of the last `buckets` periods of `bucket_seconds`, keyed by share time."""
+
+    def __init__(self, bucket_seconds: float, buckets: int):
+        self.bucket_seconds = bucket_seconds
+        self.buckets = buckets
+        self._epochs: Sequence[int] = [-1] * buckets
+        self._best: Sequence[Optional[Share]] = [None] * buckets
+
+    def add(self, share: Share) -> None:
+        epoch = int(share[0] // self.bucket_seconds)
+        idx = epoch % self.buckets
+        current = self._epochs[idx]
+        if epoch > current:
+            self._epochs[idx] = epoch
+            self._best[idx] = share
+        elif epoch == current and share[1] > self._best[idx][1]:
+            self._best[idx] = share
+
+    def best(self, now: float) -> Optional[Share]:
+        """Best share of the buckets still inside the window ending at `now`."""
+        current = int(now // self.bucket_seconds)
+        best = None
+        for epoch, share in zip(self._epochs, self._best):
+            if share is not None and current - self.buckets < epoch <= current:
+                if best is None or share[1] > best[1]:
+                    best = share
+        return best
+
+    def frozen(self) -> "RollingBest":
+        """Read-only copy for publishing in a snapshot."""
+        copy = RollingBest.__new__(RollingBest)
+        copy.bucket_seconds = self.bucket_seconds
+        copy.buckets = self.buckets
+        copy._epochs = tuple(self._epochs)
+        copy._best = tuple(self._best)
+        return copy
+
+@dataclass(frozen=True)
+class ShareStatsView:
+    """Immutable copy of ShareDistribution for the renderer and the broadcast."""
+    histogram: Tuple[int, ...] = (0,) * HISTOGRAM_BINS
+    tier_counts: Tuple[int, ...] = (0,) * len(RARITY_TIERS)
+    # (ip, histogram) per miner, in order of first share
+    miner_histograms: Tuple[Tuple[str, Tuple[int, ...]], ...] = ()
+    best_hour: RollingBest = field(default_factory=lambda: RollingBest(60.0, 60).frozen())
+    best_day: RollingBest = field(default_factory=lambda: RollingBest(3600.0, 24).frozen())
+
+class ShareDistribution:
+    """Difficulty histograms (overall and per miner), per-tier counts and rolling bests of accepted shares.
+
+    Memory is fixed by the bin count, the tier count and the number of miners,
+    however long the display runs. Histograms and tier counts cover shares
+    accepted since start; restore() only feeds the rolling bests. Not locked;
+    AppState updates it under recent_lock.
+    """
+
+    def __init__(self):
+        self.histogram = LogHistogram()
+        self.per_miner: Dict[str, LogHistogram] = {}
+        self.tier_counts = [0] * len(RARITY_TIERS)
+        # Last hour by minute and last 24 hours by hour
+        self.best_hour = RollingBest(60.0, 60)
+        self.best_day = RollingBest(3600.0, 24)
+
+    def add(self, share: Share) -> None:
+        _, diff, ip = share
+        self.histogram.add(diff)
+        miner_hist = self.per_miner.get(ip)
+        if miner_hist is None:
+            miner_hist = self.per_miner[ip] = LogHistogram()
+        miner_hist.add(diff)
+        self.tier_counts[get_rarity_tier(diff)] += 1
+        self.restore(share)
+
+    def restore(self, share: Share) -> None:
+        """Feed a share from a previous run (the journal) to the rolling bests only."""
+        self.best_hour.add(share)
+        self.best_day.add(share)
+
+    def view(self) -> ShareStatsView:
+        return ShareStatsView(
+            histogram=tuple(self.histogram.counts),
+            tier_counts=tuple(self.tier_counts),
+            miner_histograms=tuple((ip, tuple(hist.counts)) for ip, hist in self.per_miner.items()),
+            best_hour=self.best_hour.frozen(),
+            best_day=self.best_day.frozen(),
+        )
@@ -1,78 +1,165 @@
 # src/websockets.py
 """
-WebSocket connections for miners and exchanges.
+WebSocket connections for miners (exchange price feeds live in src/pricefeed.py).
+
+Listeners only receive: frames go through a bounded per-miner queue
+(src/ingest_queue.py) to one worker that parses them in batches.
 """
 
 import time
+import threading
 import logging
 import websocket
-import json
-import requests
+from typing import Dict, List, Optional, Sequence, Tuple
 
-from .constants import MIN_DIFF_THRESHOLD, ANSI_ESCAPE, IP_TO_NAME
+from .constants import (
+    ANSI_ESCAPE,
+    SHARE_DIFF_PATTERN,
+    MINER_WS_TIMEOUT_SEC,
+    RECONNECT_DELAY_START,
+    RECONNECT_DELAY_MAX,
+    RECONNECT_BACKOFF,
+)
 from .helpers import format_diff_for_network
-from .data import state
+from .data import state, Share
+from .ingest_queue import FrameQueue
+from .metrics import WS_FRAMES, WS_LINES, SHARES, PARSE_SECONDS
 
 logger = logging.getLogger(__name__)
 
-def parse_miner_log_line(line: str, source_ip: str) -> None:
-    if "asic_result" not in line:
-        return
+# ip -> (frames, lines, shares) counter children, looked up once per batch
+_stream_counters: Dict[str, tuple] = {}
+
+def extract_share_diff(line: str) -> Optional[Tuple[float, Optional[float]]]:
+    """(share difficulty, pool target difficulty or None when not logged)."""
+    match = SHARE_DIFF_PATTERN.search(line)
+    if match is None:
+        return None
+    if match.group(1) is not None:
+        diff, target = match.group(1), match.group(2)
+    else:
+        diff, target = match.group(3), match.group(4)
     try:
-        if "diff " in line:
-            after_diff = line.split("diff ", 1)[1]
-            if " of " in after_diff:
-                diff_str = after_diff.split(" of ", 1)[0]
-            elif "/" in after_diff:
-                diff_str = after_diff.split("/", 1)[0]
-            else:
-                return
-        elif "diff=" in line:
-            diff_str = line.split("diff=", 1)[1].split()[0].rstrip(",")
-        else:
-            return
-        diff_val = float(diff_str.strip())
-        if diff_val < MIN_DIFF_THRESHOLD:
-            return
-        ts = time.time()
-        with state.recent_lock:
-            state.recent_diffs.append((ts, diff_val, source_ip))
-            if diff_val > state.session_best_diff:
-                state.session_best_ts = ts
-                state.session_best_diff = diff_val
-                state.session_best_ip = source_ip
-                logger.info(
-                    "New session best! %s → %s",
-                    IP_TO_NAME.get(source_ip, source_ip),
-                    format_diff_for_network(diff_val)
-                )
-        logger.debug(
-            "Accepted share %s → %s",
-            IP_TO_NAME.get(source_ip, source_ip),
-            format_diff_for_network(diff_val)
+        return float(diff), float(target) if target else None
+    except ValueError:
+        return None
+
+def _show_shares(shares: List[Share], settings) -> None:
+    new_best = state.add_shares(shares)
+    if new_best is not None:
+        logger.info(
+            "New session best! %s → %s",
+            settings.ip_to_name.get(new_best[2], new_best[2]),
+            format_diff_for_network(new_best[1])
         )
-    except (IndexError, ValueError, TypeError) as e:
-        logger.debug("Parse failed: %s → %s", line, e)
+    if logger.isEnabledFor(logging.DEBUG):
+        for _, diff_val, source_ip in shares:
+            logger.debug(
+                "Accepted share %s → %s",
+                settings.ip_to_name.get(source_ip, source_ip),
+                format_diff_for_network(diff_val)
+            )
+
+def record_shares(shares: Sequence[Tuple[float, Optional[float]]], source_ip: str) -> None:
+    """Credit one miner's parsed (difficulty, pool target) shares and show those above the threshold."""
+    # A miner's shares come from one thread at a time (the ingest worker or its own poll)
+    _miner_counters(source_ip)[2].value += len(shares)
+    # Only nonces meeting the pool target are submitted, and each one stands for
+    # `target` expected work; without a target the share's own difficulty is used
+    work = 0.0
+    submitted = 0
+    for diff_val, target in shares:
+        if target is None:
+            work += diff_val
+            submitted += 1
+        elif diff_val >= target:
+            work += target
+            submitted += 1
+    if submitted:
+        state.share_rates.add(source_ip, time.monotonic(), work, submitted)
+    settings = state.snapshot.settings
+    shown = [diff_val for diff_val, _ in shares if diff_val >= settings.min_diff_threshold]
+    if shown:
+        now = time.time()
+        _show_shares([(now, diff_val, source_ip) for diff_val in shown], settings)
 
-def websocket_listener(ip: str) -> None:
+def record_share_event(diff_val: float, source_ip: str) -> None:
+    """Show a share in recent_diffs / session best if it clears the display threshold."""
+    settings = state.snapshot.settings
+    if diff_val >= settings.min_diff_threshold:
+        _show_shares([(time.time(), diff_val, source_ip)], settings)
+
+def parse_miner_log_line(line: str) -> Optional[Tuple[float, Optional[float]]]:
+    """(share difficulty, pool target or None) from an asic_result line; None for any other line."""
+    if "asic_result" not in line:
+        return None
+    share = extract_share_diff(line)
+    if share is None and logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Parse failed: %s", ANSI_ESCAPE.sub('', line).strip())
+    return share
+
+def _miner_counters(ip: str) -> tuple:
+    """(frames, lines, shares) counter children of a miner, resolved once."""
+    counters = _stream_counters.get(ip)
+    if counters is None:
+        counters = _stream_counters[ip] = (WS_FRAMES.labels(ip), WS_LINES.labels(ip), SHARES.labels(ip))
+    return counters
+
+def handle_miner_frames(messages: Sequence[str], ip: str) -> None:
+    """Parse a batch of one miner's log frames; its shares are recorded together (one recent_lock hold)."""
+    line_count = 0
+    shares = []
+    start = None
+    for message in messages:
+        line_count += message.count("\n") + (message[-1:] != "\n")
+        # Most frames carry no share result; reject them before splitting into lines
+        if "asic_result" not in message:
+            continue
+        if start is None:
+            start = time.perf_counter()
+        for raw_line in message.splitlines():
+            share = parse_miner_log_line(raw_line)
+            if share is not None:
+                shares.append(share)
+    # Counters are bumped once per batch; frames are processed by one worker, so direct increments are safe
+    frames, lines, _ = _miner_counters(ip)
+    frames.value += len(messages)
+    lines.value += line_count
+    if start is None:
+        return
+    if shares:
+        record_shares(shares, ip)
+    PARSE_SECONDS.observe(time.perf_counter() - start)
+
+def handle_miner_message(message: str, ip: str) -> None:
+    handle_miner_frames((message,), ip)
+
+# Received frames wait here for the parsing worker (see src/ingest_queue.py)
+frame_queue = FrameQueue(handle_miner_frames)
+
+def websocket_listener(ip: str, stop: Optional[threading.Event] = None) -> None:
+    """Stream a miner's log until `stop` is set (checked between messages and on reconnect).
+
+    Whoever sets `stop` also discards the miner's queued frames; after that this
+    listener no longer touches shared state, so a replacement can start at once.
+    """
     ws_url = f"ws://{ip}/api/ws"
-    reconnect_delay = 5.0
+    reconnect_delay = RECONNECT_DELAY_START
     ws = None
-    while True:
+    stop = stop or threading.Event()
+    frame_queue.start()
+    while not stop.is_set():
         try:
-            ws = websocket.create_connection(ws_url, timeout=15)
+            ws = websocket.create_connection(ws_url, timeout=MINER_WS_TIMEOUT_SEC)
             logger.info("WS connected → %s", ip)
-            with state.connected_lock:
-                state.connected_miners.add(ip)
-            while True:
+            if not stop.is_set():
+                state.set_miner_connected(ip, True, owner=stop)
+            while not stop.is_set():
                 try:
                     message = ws.recv()
-                    if isinstance(message, bytes):
+                    if isinstance(message, bytes) or stop.is_set():
                         continue
-                    for raw_line in message.splitlines():
-                        clean_line = ANSI_ESCAPE.sub('', raw_line).strip()
-                        if clean_line:
-                            parse_miner_log_line(clean_line, ip)
+                    frame_queue.put(ip, message, stop)
                 except UnicodeDecodeError:
                     continue
                 except websocket.WebSocketConnectionClosedException:
@@ -83,99 +170,15 @@ def websocket_listener(ip: str) -> None:
         except Exception as e:
             logger.warning("WS connection failed (%s): %s", ip, e)
         finally:
-            with state.connected_lock:
-                state.connected_miners.discard(ip)
+            # No-op once a replacement listener for this IP has connected
+            state.set_miner_connected(ip, False, owner=stop)
             if ws:
                 try:
                     ws.close()
                 except:
                     pass
             ws = None
-        time.sleep(reconnect_delay)
-        reconnect_delay = min(reconnect_delay * 1.5, 60.0)
-
-def run_binance_websocket(state) -> None:
-    def on_message(ws, message):
-        try:
-            data = json.loads(message)
-            if data.get("s", "").lower() != "btcusdt":
-                return
-            price = float(data["c"])
-            change_pct = float(data["P"])
-            with state.ticker_lock:
-                state.binance.update(price, change_pct)
-        except Exception as e:
-            logger.warning("Binance parse error: %s", e)
-
-    while True:
-        try:
-            ws = websocket.WebSocketApp(
-                "wss://stream.binance.com:9443/ws/btcusdt@ticker",
-                on_message=on_message
-            )
-            ws.run_forever(ping_interval=30, ping_timeout=10)
-        except Exception as e:
-            logger.error("Binance WS error: %s", e)
-        time.sleep(5)
-
-def run_kraken_websocket(state) -> None:
-    def on_message(ws, message):
-        try:
-            msg = json.loads(message)
-            if not isinstance(msg, list) or msg[2] != "ticker":
-                return
-            _, ticker_data, _, pair = msg
-            if pair != "XBT/USD":
-                return
-            price = float(ticker_data["c"][0])
-            open_24h = float(ticker_data["o"][1])
-            change_pct = ((price - open_24h) / open_24h * 100) if open_24h > 0 else 0.0
-            with state.ticker_lock:
-                state.kraken.update(price, change_pct)
-        except Exception as e:
-            logger.warning("Kraken parse error: %s", e)
-
-    def on_open(ws):
-        ws.send(json.dumps({
-            "event": "subscribe",
-            "pair": ["XBT/USD"],
-            "subscription": {"name": "ticker"}
-        }))
-
-    while True:
-        try:
-            ws = websocket.WebSocketApp(
-                "wss://ws.kraken.com/",
-                on_message=on_message,
-                on_open=on_open
-            )
-            ws.run_forever(ping_interval=25, ping_timeout=10)
-        except Exception as e:
-            logger.error("Kraken WS error: %s", e)
-        time.sleep(5)
-
-def fetch_initial_prices(state) -> None:
-    headers = {"User-Agent": "rpi-bitcoin-mining-difficulty-meter-display/1.0"}
-    # Binance
-    try:
-        r = requests.get("https://api.binance.com/api/v3/ticker/24hr?symbol=BTCUSDT", timeout=5, headers=headers)
-        if r.status_code == 200:
-            data = r.json()
-            price = float(data["lastPrice"])
-            change_pct = float(data["priceChangePercent"])
-            with state.ticker_lock:
-                state.binance.update(price, change_pct)
-    except Exception as e:
-        logger.warning("Binance initial fetch failed: %s", e)
-    # Kraken
-    try:
-        r = requests.get("https://api.kraken.com/0/public/Ticker?pair=XBTUSD", timeout=5, headers=headers)
-        if r.status_code == 200:
-            data = r.json()["result"]["XXBTZUSD"]
-            price = float(data["c"][0])
-            open_24h = float(data["o"])
-            change_pct = ((price - open_24h) / open_24h * 100) if open_24h > 0 else 0.0
-            with state.ticker_lock:
-                state.kraken.update(price, change_pct)
-    except Exception as e:
-        logger.warning("Kraken initial fetch failed: %s", e)
+        if stop.wait(reconnect_delay):
+            break
+        reconnect_delay = min(reconnect_delay * RECONNECT_BACKOFF, RECONNECT_DELAY_MAX)
+    logger.info("WS listener stopped → %s", ip)
@@ -0,0 +1,77 @@
+import asyncio
+import argparse
+import random
+import time
+import threading
+from dataclasses import replace
+
+import pytest
+
+from benchmarks.fleet_sim import VirtualMiner
+from src.backends import CGMINER_COMMAND, CgminerBackend, _split_host_port, cgminer_command, parse_cgminer_reply
+from src.data import state
+
+POOL_DIFF = 4096
+
+@pytest.fixture
+def cgminer():
+    """fleet_sim's cgminer stand-in on a free local port; its counters are set by the test."""
+    args = argparse.Namespace(share_rate=1.0, asic_diff=256.0, pool_diff=POOL_DIFF, slow_fraction=0.0, slow_ms=0.0)
+    miner = VirtualMiner(0, args, random.Random(1), None)
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(asyncio.start_server(miner.handle_cgminer, "127.0.0.1", 0))
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield miner, "127.0.0.1:%d" % server.sockets[0].getsockname()[1]
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(2)
+
+def _mine(miner, accepted, best=0.0):
+    miner.accepted = accepted
+    miner.diff_accepted = float(accepted * POOL_DIFF)
+    miner.best_diff = best
+
+def _shown_shares(ip):
+    with state.recent_lock:
+        return [share for share in state.recent_diffs.newest(state.recent_diffs.capacity) if share[2] == ip]
+
+def test_batched_reply_parses_despite_trailing_nul(cgminer):
+    miner, address = cgminer
+    _mine(miner, 7, best=123456.0)
+    host, port = _split_host_port(address, 4028)
+    # The stand-in ends its reply with a NUL byte, as cgminer does
+    hr_th, best, pools = parse_cgminer_reply(cgminer_command(host, port, CGMINER_COMMAND))
+    assert hr_th == pytest.approx(miner.hashrate_gh / 1000, rel=0.05)
+    assert best == 123456.0
+    assert list(pools.values()) == [(7, 7.0 * POOL_DIFF)]
+
+def test_counter_deltas_become_shares(cgminer):
+    miner, address = cgminer
+    state.update_settings(replace(state.snapshot.settings, min_diff_threshold=1000.0))
+    backend = CgminerBackend(address)
+    _mine(miner, 10)
+    assert backend.poll() is not None
+    # The first poll only sets the baseline
+    assert _shown_shares(address) == []
+
+    _mine(miner, 13)
+    backend.poll()
+    assert [diff for _, diff, _ in _shown_shares(address)] == [POOL_DIFF] * 3
+
+    # Miner restart: the counters go back to zero and only set a new baseline
+    _mine(miner, 1)
+    backend.poll()
+    assert len(_shown_shares(address)) == 3
+    _mine(miner, 3)
+    backend.poll()
+    assert len(_shown_shares(address)) == 5
+    count, _, _ = state.share_rates.summary(time.monotonic())[address][-1]
+    assert count == 5
+    backend.close()
+
+def test_split_host_port():
+    assert _split_host_port("10.0.0.5", 4028) == ("10.0.0.5", 4028)
+    assert _split_host_port("10.0.0.5:4029", 4028) == ("10.0.0.5", 4029)
+    assert _split_host_port("fe80::1", 4028) == ("fe80::1", 4028)
+    assert _split_host_port("[fe80::1]", 4028) == ("fe80::1", 4028)
+    assert _split_host_port("[fe80::1]:4029", 4028) == ("fe80::1", 4029)
@@ -0,0 +1,150 @@
+import base64
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import src.bitcoind as bitcoind
+from src.bitcoind import BitcoindRPC, _block_values, _chain_values, bitcoind_polling_thread, coinbase_pool_tag
+from src.data import state
+
+COOKIE = "__cookie__:3f9a1c"
+# Height-prefixed coinbase scriptSig carrying the pool's "/Foundry USA Pool/" tag
+COINBASE_HEX = "03a0470d" + b"\x00/Foundry USA Pool #dropgold/".hex() + "2cfabe6d6d"
+
+class StandInNode:
+    """Bitcoin Core JSON-RPC stand-in: answers batches, checks cookie auth and counts calls."""
+
+    def __init__(self):
+        self.height = 870000
+        self.calls = {}
+        node = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                expected = "Basic " + base64.b64encode(COOKIE.encode()).decode()
+                if self.headers.get("Authorization") != expected:
+                    self.send_response(401)
+                    self.end_headers()
+                    return
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                body = json.dumps([node.answer(call) for call in payload]).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = "http://127.0.0.1:%d/" % self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @property
+    def best_hash(self):
+        return "%064x" % self.height
+
+    def answer(self, call):
+        method = call["method"]
+        self.calls[method] = self.calls.get(method, 0) + 1
+        results = {
+            "getbestblockhash": lambda: self.best_hash,
+            "getblockchaininfo": lambda: {"blocks": self.height, "bestblockhash": self.best_hash,
+                                          "difficulty": 101.6e12},
+            "getmininginfo": lambda: {"blocks": self.height, "networkhashps": 7.3e20},
+            "estimatesmartfee": lambda: {"feerate": 0.00012, "blocks": 3},
+            "getblock": lambda: {"hash": call["params"][0], "height": self.height, "time": 1731000000,
+                                 "tx": ["c0ffee" * 10 + "aaaa"]},
+            "getrawtransaction": lambda: {"vin": [{"coinbase": COINBASE_HEX, "sequence": 4294967295}]},
+        }
+        if method not in results:
+            return {"id": call["id"], "result": None, "error": {"code": -32601, "message": "Method not found"}}
+        return {"id": call["id"], "result": results[method](), "error": None}
+
+@pytest.fixture
+def node(tmp_path, monkeypatch):
+    node = StandInNode()
+    cookie = tmp_path / ".cookie"
+    cookie.write_text(COOKIE)
+    node.cookie_path = str(cookie)
+    monkeypatch.setattr(bitcoind, "BITCOIND_RPC_URL", node.url)
+    monkeypatch.setattr(bitcoind, "BITCOIND_RPC_COOKIE", str(cookie))
+    yield node
+    node.server.shutdown()
+
+def _wait(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+def test_coinbase_pool_tag():
+    assert coinbase_pool_tag(COINBASE_HEX) == "Foundry USA Pool"
+    assert coinbase_pool_tag("03a0470d0000") == "Unknown"
+    assert coinbase_pool_tag("not hex") == "Unknown"
+
+def test_batch_with_cookie_auth(node):
+    rpc = BitcoindRPC(node.url, cookie_path=node.cookie_path)
+    chain = _chain_values(rpc)
+    assert chain == {"fees_sats_vb": pytest.approx(12.0), "block_height": 870000, "network_difficulty": 101.6e12,
+                     "network_hashrate_eh": pytest.approx(730.0), "best_hash": node.best_hash}
+    # One HTTP request for the three chain calls
+    assert node.calls == {"getblockchaininfo": 1, "getmininginfo": 1, "estimatesmartfee": 1}
+    assert _block_values(rpc, node.best_hash) == {"mining_pool": "Foundry USA Pool", "block_timestamp": 1731000000}
+    with pytest.raises(requests.HTTPError):
+        BitcoindRPC(node.url, "__cookie__", "wrong").call("getbestblockhash")
+
+def _run_poller(stop):
+    thread = threading.Thread(target=bitcoind_polling_thread, args=(stop,), daemon=True)
+    thread.start()
+    return thread
+
+def test_tip_polling_without_pyzmq(node, monkeypatch):
+    monkeypatch.setattr(bitcoind, "zmq", None)
+    monkeypatch.setattr(bitcoind, "BITCOIND_ZMQ_HASHBLOCK", "tcp://127.0.0.1:28332")
+    monkeypatch.setattr(bitcoind, "BITCOIND_TIP_POLL_EVERY", 0.05)
+    stop = threading.Event()
+    thread = _run_poller(stop)
+    try:
+        assert _wait(lambda: state.snapshot.mempool["block_height"] == 870000)
+        assert state.snapshot.mempool["mining_pool"] == "Foundry USA Pool"
+        node.height += 1
+        assert _wait(lambda: state.snapshot.mempool["block_height"] == 870001)
+        assert node.calls["getbestblockhash"] >= 2
+    finally:
+        stop.set()
+        thread.join(2)
+
+def test_zmq_hashblock_triggers_refresh(node, monkeypatch):
+    zmq = pytest.importorskip("zmq")
+    pub = zmq.Context.instance().socket(zmq.PUB)
+    port = pub.bind_to_random_port("tcp://127.0.0.1")
+    monkeypatch.setattr(bitcoind, "BITCOIND_ZMQ_HASHBLOCK", "tcp://127.0.0.1:%d" % port)
+    # Without the notification nothing would be refetched within the test
+    monkeypatch.setattr(bitcoind, "MEMPOOL_UPDATE_EVERY", 3600.0)
+    stop = threading.Event()
+    _run_poller(stop)
+    try:
+        assert _wait(lambda: state.snapshot.mempool["block_height"] == node.height)
+        node.height += 1
+        seq = 0
+
+        def notified():
+            nonlocal seq
+            # Resent until the subscriber has joined (ZMQ drops messages sent before that)
+            pub.send_multipart([b"hashblock", bytes.fromhex(node.best_hash), seq.to_bytes(4, "little")])
+            seq += 1
+            return state.snapshot.mempool["block_height"] == node.height
+
+        assert _wait(notified)
+        assert node.calls.get("getbestblockhash", 0) <= seq
+    finally:
+        stop.set()
+        pub.close(linger=0)
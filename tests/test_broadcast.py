@@ -0,0 +1,132 @@
+import json
+import socket
+import threading
+import time
+
+from websockets.sync.client import connect
+
+import src.broadcast as broadcast
+from src.broadcast import StateBroadcaster, encode_snapshot
+from src.data import AppState
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _apply_patch(target, patch):
+    for key, value in patch.items():
+        if value is None:
+            target.pop(key, None)
+        elif isinstance(value, dict) and isinstance(target.get(key), dict):
+            _apply_patch(target[key], value)
+        else:
+            target[key] = value
+
+class Viewer:
+    """Rebuilds the broadcast state from snapshot + delta messages."""
+
+    def __init__(self):
+        self.state = None
+        self.shares = []
+        self.types = []
+
+    def apply(self, text):
+        message = json.loads(text)
+        self.types.append(message["type"])
+        if message["type"] == "snapshot":
+            self.state = message["state"]
+            self.shares = list(message["shares"])
+        else:
+            _apply_patch(self.state, message["patch"])
+            self.shares.extend(message.get("shares", []))
+
+def _wait(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+def _start(app_state):
+    port = _free_port()
+    StateBroadcaster(app_state).start("127.0.0.1", port)
+    return "ws://127.0.0.1:%d/" % port
+
+def _encoded(app_state):
+    return encode_snapshot(app_state.snapshot, app_state.share_stats_view())
+
+def test_snapshot_and_deltas_rebuild_state():
+    app_state = AppState()
+    url = _start(app_state)
+    viewer = Viewer()
+    with connect(url) as ws:
+        viewer.apply(ws.recv(timeout=5))
+        assert viewer.types == ["snapshot"]
+        app_state.update_miner_stats(12.5, 3.2e9, 2)
+        app_state.add_share(1000.0, 5.1e6, "10.0.0.1")
+        app_state.update_ticker("binance", 97000.5, 1.2)
+        app_state.add_share(1001.0, 8.4e7, "10.0.0.2")
+
+        def caught_up():
+            while viewer.state != _encoded(app_state):
+                try:
+                    viewer.apply(ws.recv(timeout=0.05))
+                except TimeoutError:
+                    return False
+            return True
+
+        assert _wait(caught_up)
+    assert "delta" in viewer.types
+    assert viewer.shares == [[1000.0, 5.1e6, "10.0.0.1"], [1001.0, 8.4e7, "10.0.0.2"]]
+    assert viewer.state["miners"]["total_hashrate_th"] == 12.5
+    assert viewer.state["binance"]["price"] == 97000.5
+
+def test_stalled_client_gets_snapshot_without_blocking(monkeypatch):
+    monkeypatch.setattr(broadcast, "BROADCAST_QUEUE_SIZE", 2)
+    monkeypatch.setattr(broadcast, "PUBLISH_INTERVAL", 0.0)
+    resyncs = broadcast.BROADCAST_MESSAGES.labels("resync")
+    resyncs_before = resyncs.value
+    app_state = AppState()
+    url = _start(app_state)
+    healthy = Viewer()
+    stalled = Viewer()
+    stop = threading.Event()
+
+    with connect(url) as healthy_ws, connect(url, max_queue=1) as stalled_ws:
+        stalled.apply(stalled_ws.recv(timeout=5))
+
+        def follow():
+            while not stop.is_set():
+                try:
+                    healthy.apply(healthy_ws.recv(timeout=0.1))
+                except TimeoutError:
+                    pass
+
+        reader = threading.Thread(target=follow, daemon=True)
+        reader.start()
+        # Large deltas (every miner's rates change) fill the stalled client's socket, then its queue
+        ips = ["10.0.%d.%d" % (i // 250, i % 250) for i in range(2000)]
+        round_ = 0
+        while resyncs.value == resyncs_before and round_ < 2000:
+            round_ += 1
+            app_state.update_miner_rates({ip: (round_ + i / 7.0, 1.0, 2.0, 3.0) for i, ip in enumerate(ips)})
+            time.sleep(0.002)
+        assert resyncs.value > resyncs_before
+        # The broadcaster kept serving the reading client meanwhile
+        assert _wait(lambda: healthy.state == _encoded(app_state), timeout=10)
+        stop.set()
+        reader.join(2)
+
+        def stalled_caught_up():
+            while stalled.state != _encoded(app_state):
+                try:
+                    stalled.apply(stalled_ws.recv(timeout=0.2))
+                except TimeoutError:
+                    return False
+            return True
+
+        assert _wait(stalled_caught_up, timeout=10)
+    # Dropped deltas were replaced with a fresh snapshot
+    assert stalled.types.count("snapshot") >= 2
@@ -0,0 +1,12 @@
+from src.data import AppState
+
+def test_stale_listener_cannot_clear_replacement():
+    state = AppState()
+    old, new = object(), object()
+    state.set_miner_connected("10.0.0.1", True, owner=old)
+    # The IP is re-added before the old listener has exited
+    state.set_miner_connected("10.0.0.1", True, owner=new)
+    state.set_miner_connected("10.0.0.1", False, owner=old)
+    assert state.snapshot.connected_count == 1
+    state.set_miner_connected("10.0.0.1", False, owner=new)
+    assert state.snapshot.connected_count == 0
@@ -0,0 +1,42 @@
+import pygame
+import pytest
+
+from src.framebuffer import FramebufferOutput
+
+WIDTH, HEIGHT = 8, 4
+COLOR = (0x12, 0x34, 0x56)
+
+def _expected_bytes(bpp):
+    r, g, b = COLOR
+    if bpp == 16:
+        return ((r >> 3) << 11 | (g >> 2) << 5 | b >> 3).to_bytes(2, "little")
+    # RGB888 / XRGB8888 little-endian: B, G, R (then the unused byte)
+    return bytes((b, g, r))
+
+@pytest.mark.parametrize("bpp", [16, 24, 32])
+def test_frames_written_to_plain_file(tmp_path, bpp):
+    path = tmp_path / "fb0"
+    fb = FramebufferOutput(str(path), size=(WIDTH, HEIGHT), bpp=bpp)
+    pixel_bytes = bpp // 8
+    surface = pygame.Surface((WIDTH, HEIGHT))
+    surface.set_at((2, 1), COLOR)
+    try:
+        assert fb.present(surface) == HEIGHT
+        data = path.read_bytes()
+        assert len(data) == WIDTH * HEIGHT * pixel_bytes
+        offset = 1 * fb.stride + 2 * pixel_bytes
+        expected = _expected_bytes(bpp)
+        assert data[offset:offset + len(expected)] == expected
+        assert data[:fb.stride] == bytes(fb.stride)
+
+        # Mark row 0 in the file: a flush that rewrote it would restore the black pixels
+        with open(path, "r+b") as f:
+            f.write(b"\xff" * fb.stride)
+        surface.set_at((5, 2), COLOR)
+        assert fb.present(surface) == 1
+        data = path.read_bytes()
+        assert data[:fb.stride] == b"\xff" * fb.stride
+        offset = 2 * fb.stride + 5 * pixel_bytes
+        assert data[offset:offset + len(expected)] == expected
+    finally:
+        fb.close()
@@ -0,0 +1,55 @@
+import time
+import threading
+
+from websockets.exceptions import ConnectionClosed
+from websockets.sync.server import serve
+
+import src.ingest
+from src.data import state
+from src.ingest import IngestionEngine
+from src.websockets import frame_queue
+
+def _wait(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+def test_engine_connects_reconnects_and_removes(monkeypatch):
+    monkeypatch.setattr(src.ingest, "RECONNECT_DELAY_START", 0.05)
+    lines = []
+    monkeypatch.setattr(frame_queue, "handler", lambda batch, ip: lines.extend(batch))
+    connections = []
+    closed = threading.Event()
+
+    def handler(ws):
+        connections.append(ws)
+        if len(connections) == 1:
+            ws.send("line 1")
+            ws.send(b"\x00\xff binary")
+            ws.send("line 2")
+            return  # drops the connection: the engine must reconnect
+        ws.send("line 3")
+        try:
+            ws.recv()
+        except ConnectionClosed:
+            closed.set()
+
+    with serve(handler, "127.0.0.1", 0) as server:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        ip = "127.0.0.1:%d" % server.socket.getsockname()[1]
+        engine = IngestionEngine()
+        engine.start(())
+        engine.add(ip)
+
+        assert _wait(lambda: len(lines) == 3)
+        assert lines == ["line 1", "line 2", "line 3"]
+        assert _wait(lambda: ip in state.connected_miners)
+
+        engine.remove(ip)
+        assert closed.wait(5)
+        assert _wait(lambda: ip not in state.connected_miners)
+        # Removed for good: no further connection attempts
+        assert not _wait(lambda: len(connections) > 2, timeout=0.3)
@@ -0,0 +1,46 @@
+import threading
+
+from src.ingest_queue import FrameQueue
+
+def _collecting_queue(capacity, policy):
+    handled = []
+    done = threading.Event()
+
+    def handler(batch, ip):
+        handled.append((ip, list(batch)))
+        done.set()
+
+    return FrameQueue(handler, capacity=capacity, policy=policy), handled, done
+
+def test_drop_oldest_capacity_one_lists_miner_once():
+    queue, handled, done = _collecting_queue(1, "drop_oldest")
+    for i in range(5):
+        queue.offer("10.0.0.1", str(i))
+    assert list(queue._pending) == ["10.0.0.1"]
+    queue.start()
+    assert done.wait(2)
+    assert handled == [("10.0.0.1", ["4"])]
+
+def test_discard_after_drop_oldest_keeps_worker_alive():
+    queue, handled, done = _collecting_queue(1, "drop_oldest")
+    queue.offer("10.0.0.1", "a")
+    queue.offer("10.0.0.1", "b")
+    queue.discard("10.0.0.1")
+    assert not queue._pending
+    queue.start()
+    queue.offer("10.0.0.2", "c")
+    assert done.wait(2)
+    done.clear()
+    # The worker survived and still serves a miner re-added under the same IP
+    queue.offer("10.0.0.1", "d")
+    assert done.wait(2)
+    assert handled == [("10.0.0.2", ["c"]), ("10.0.0.1", ["d"])]
+    assert queue._pending_set == set()
+
+def test_offer_from_stopped_listener_is_dropped():
+    queue, handled, done = _collecting_queue(4, "drop_oldest")
+    stop = threading.Event()
+    stop.set()
+    queue.offer("10.0.0.1", "late", stop)
+    assert not queue._pending
+    assert "10.0.0.1" not in queue._queues
@@ -0,0 +1,41 @@
+import os
+
+from src.journal import HEADER_SIZE, RECORD, ShareJournal
+
+def _journal_with_shares(path, shares):
+    journal = ShareJournal(str(path), 16)
+    journal.start()
+    for share in shares:
+        journal.append(*share)
+    journal.set_best(*max(shares, key=lambda s: s[1]))
+    journal.close()
+
+def test_truncated_journal_keeps_surviving_records(tmp_path):
+    path = tmp_path / "shares.journal"
+    shares = [(float(i), 1000.0 + i, "10.0.0.1") for i in range(1, 6)]
+    _journal_with_shares(path, shares)
+    # Cut the file inside the fourth share's slot (slot = seq % capacity, seqs start at 1)
+    os.truncate(path, HEADER_SIZE + 5 * RECORD.size - 3)
+
+    journal = ShareJournal(str(path), 16)
+    restored, best = journal.load()
+    assert restored == shares[:3]
+    assert best == shares[-1]
+    assert os.path.getsize(path) == HEADER_SIZE + 16 * RECORD.size
+    # The rewritten file maps and accepts new shares
+    journal.start()
+    journal.append(10.0, 5.0, "10.0.0.2")
+    journal.close()
+    reopened = ShareJournal(str(path), 16)
+    assert reopened.load()[0][-1] == (10.0, 5.0, "10.0.0.2")
+    reopened.close()
+
+def test_short_header_moves_journal_aside(tmp_path):
+    path = tmp_path / "shares.journal"
+    path.write_bytes(b"BTCSHRJ1\x01")
+
+    journal = ShareJournal(str(path), 16)
+    assert journal.load() == ([], None)
+    assert (tmp_path / "shares.journal.corrupt").read_bytes() == b"BTCSHRJ1\x01"
+    assert os.path.getsize(path) == HEADER_SIZE + 16 * RECORD.size
+    journal.close()
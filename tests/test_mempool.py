@@ -0,0 +1,63 @@
+import json
+import time
+
+import pytest
+
+import src.mempool as mempool
+from src.data import state
+from src.mempool import PUSH_LIVE_WINDOW, fields_to_poll, handle_mempool_push_message, mempool_fields
+
+# Trimmed from mempool.space /api/v1/ws after {"action": "want", "data": ["blocks", "stats"]}
+BLOCKS_MESSAGE = json.dumps({"blocks": [
+    {"id": "00000000000000000001a2", "height": 870001, "timestamp": 1731000000, "difficulty": 101.6e12,
+     "extras": {"pool": {"id": 111, "name": "Foundry USA", "slug": "foundryusa"}}},
+    {"id": "00000000000000000001b3", "height": 870002, "timestamp": 1731000600, "difficulty": 101.6e12,
+     "extras": {"pool": {"id": 44, "name": "AntPool", "slug": "antpool"}}},
+]})
+BLOCK_MESSAGE = json.dumps({"block": {
+    "id": "00000000000000000001c4", "height": 870003, "timestamp": 1731001200, "difficulty": 102.3e12,
+    "extras": {"pool": {"id": 36, "name": "F2Pool", "slug": "f2pool"}},
+}})
+FEES_MESSAGE = json.dumps({
+    "mempoolInfo": {"loaded": True, "size": 120345, "bytes": 51234567},
+    "fees": {"fastestFee": 12, "halfHourFee": 9, "hourFee": 7, "economyFee": 4, "minimumFee": 2},
+    "vBytesPerSecond": 1890,
+})
+
+@pytest.fixture(autouse=True)
+def fresh_fields(monkeypatch):
+    for field in mempool_fields.values():
+        field.value, field.updated = None, 0.0
+    monkeypatch.setattr(mempool, "_block_cache", mempool.OrderedDict())
+    monkeypatch.setattr(mempool, "_push_last_message", float("-inf"))
+
+def test_push_messages_set_block_and_fees():
+    handle_mempool_push_message(BLOCKS_MESSAGE)
+    assert mempool_fields["block_height"].value == 870002
+    assert mempool_fields["mining_pool"].value == "AntPool"
+    handle_mempool_push_message(BLOCK_MESSAGE)
+    handle_mempool_push_message(FEES_MESSAGE)
+    published = state.snapshot.mempool
+    assert published["block_height"] == 870003
+    assert published["mining_pool"] == "F2Pool"
+    assert published["network_difficulty"] == 102.3e12
+    assert published["fees_sats_vb"] == 9.0
+    # Both come from the live feed: nothing to poll
+    assert fields_to_poll(time.time()) == ()
+
+def test_block_only_feed_does_not_refresh_fees():
+    handle_mempool_push_message(FEES_MESSAGE)
+    # A minute later the feed is still sending blocks, but no fees
+    mempool_fields["fees_sats_vb"].updated -= PUSH_LIVE_WINDOW
+    fee_time = mempool_fields["fees_sats_vb"].updated
+    handle_mempool_push_message(BLOCKS_MESSAGE)
+    handle_mempool_push_message(BLOCK_MESSAGE)
+    assert mempool_fields["fees_sats_vb"].updated == fee_time
+    assert fields_to_poll(time.time()) == ("fees_sats_vb",)
+
+def test_polling_takes_over_when_push_goes_stale(monkeypatch):
+    handle_mempool_push_message(BLOCKS_MESSAGE)
+    handle_mempool_push_message(FEES_MESSAGE)
+    assert fields_to_poll(time.time()) == ()
+    monkeypatch.setattr(mempool, "_push_last_message", time.monotonic() - PUSH_LIVE_WINDOW - 1)
+    assert fields_to_poll(time.time()) == ("fees_sats_vb", "block_height")
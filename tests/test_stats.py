@@ -0,0 +1,30 @@
+from src.stats import HASHES_PER_DIFF1, ShareDistribution, ShareRates
+
+def test_added_miner_rate_uses_its_own_start():
+    rates = ShareRates()
+    rates.start("10.0.0.1", 0.0)
+    # Added by a config reload half an hour later
+    rates.start("10.0.0.2", 1800.0)
+    rates.add("10.0.0.1", 1830.0, 1e6)
+    rates.add("10.0.0.2", 1830.0, 1e6)
+    summary = rates.summary(1860.0)
+    one_hour = {ip: windows[-1][2] for ip, windows in summary.items()}
+    assert one_hour["10.0.0.1"] == 1e6 * HASHES_PER_DIFF1 / 1860.0 / 1e12
+    assert one_hour["10.0.0.2"] == 1e6 * HASHES_PER_DIFF1 / 60.0 / 1e12
+
+def test_retain_drops_removed_miners():
+    rates = ShareRates()
+    rates.add("10.0.0.1", 10.0, 1.0)
+    rates.add("10.0.0.2", 10.0, 1.0)
+    rates.retain(["10.0.0.2"])
+    assert list(rates.summary(20.0)) == ["10.0.0.2"]
+
+def test_restored_shares_only_seed_rolling_bests():
+    dist = ShareDistribution()
+    dist.restore((100.0, 5e9, "10.0.0.1"))
+    dist.add((110.0, 20.0, "10.0.0.2"))
+    view = dist.view()
+    assert sum(view.tier_counts) == 1
+    assert sum(view.histogram) == 1
+    assert [ip for ip, _ in view.miner_histograms] == ["10.0.0.2"]
+    assert view.best_hour.best(120.0)[1] == 5e9
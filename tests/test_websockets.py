@@ -0,0 +1,34 @@
+import pytest
+
+from src.websockets import parse_miner_log_line
+
+ESC = "\x1b"
+
+@pytest.mark.parametrize("line, expected", [
+    # AxeOS / Bitaxe
+    ("I (812366) asic_result: Ver: 20000000 Nonce 5D9DC9F8 diff 4744.5 of 4096.", (4744.5, 4096.0)),
+    (f"{ESC}[0;32mI (812366) asic_result: Ver: 20000000 Nonce 5D9DC9F8 diff 4744.5 of 4096.{ESC}[0m",
+     (4744.5, 4096.0)),
+    ("I (1201) asic_result: Nonce 0A1B2C3D diff 12345678.9 of 1024.5", (12345678.9, 1024.5)),
+    # Older firmwares
+    ("I (1201) asic_result: Ver: 20000000 Nonce 0A1B2C3D diff 2048.0/4096", (2048.0, 4096.0)),
+    ("I (1201) asic_result: Ver: 20000000 Nonce 0A1B2C3D diff 2048.0 / 4096", (2048.0, 4096.0)),
+    # NerdQAxe
+    (f"{ESC}[0;32mI (817133) asic_result: (Pri) Job ID: 00 AsicNr: 2 Ver: 1E0B4000 Nonce 4C22CAB7; "
+     f"Extranonce2 00f72d3c diff=1741.4, pool diff 4096{ESC}[0m", (1741.4, 4096.0)),
+    ("I (817133) asic_result: Nonce 4C22CAB7 diff=95123.7", (95123.7, None)),
+])
+def test_share_lines(line, expected):
+    assert parse_miner_log_line(line) == expected
+
+@pytest.mark.parametrize("line", [
+    f"{ESC}[0;32mI (812400) power_management: Vin: 5.12V, Pin: 14.8W, Tchip: 55.3C, Fan: 48%{ESC}[0m",
+    "I (812401) create_jobs_task: New Work Dequeued 0a1b",
+    "I (812402) stratum_task: set difficulty 4096",
+    # Share-like text outside an asic_result line is not a share
+    "I (812403) bm1370Module: diff 4744.5 of 4096",
+    "I (812404) asic_result: Ver: 20000000 Nonce 5D9DC9F8 (no difficulty logged)",
+    "",
+])
+def test_non_share_lines(line):
+    assert parse_miner_log_line(line) is None